@@ -8,6 +8,7 @@ Simple and beginner-friendly implementation.
 """
 
 import os
+import threading
 from redis import Redis
 from rq import Queue
 from typing import Optional
@@ -28,9 +29,20 @@ class QueueConnection:
         self.valkey_port = int(os.getenv('VALKEY_PORT', 6379))
         self.valkey_db = int(os.getenv('VALKEY_DB', 0))
         
-        # Create Redis connection (compatible with Valkey)
-        self.redis_connection = None
-        self.connect()
+        # Redis connection (compatible with Valkey), opened on first use so
+        # importing the queue modules never waits on Valkey
+        self._redis_connection = None
+        self._connect_attempted = False
+        self._connect_lock = threading.Lock()
+    
+    @property
+    def redis_connection(self) -> Optional[Redis]:
+        """Connection to Valkey (connects on first access)"""
+        if not self._connect_attempted:
+            with self._connect_lock:
+                if not self._connect_attempted:
+                    self.connect()
+        return self._redis_connection
     
     def connect(self) -> bool:
         """
@@ -39,8 +51,9 @@ class QueueConnection:
         Returns:
             bool: True if connection successful, False otherwise
         """
+        self._connect_attempted = True
         try:
-            self.redis_connection = Redis(
+            self._redis_connection = Redis(
                 host=self.valkey_host,
                 port=self.valkey_port,
                 db=self.valkey_db,
@@ -53,7 +66,7 @@ class QueueConnection:
             )
             
             # Test the connection
-            self.redis_connection.ping()
+            self._redis_connection.ping()
             print(f"✅ Connected to Valkey at {self.valkey_host}:{self.valkey_port}")
             return True
             
@@ -99,14 +112,9 @@ class QueueConnection:
             return False
 
 
-# Global queue connection instance
+# Global queue connection instance (connects on first use)
 queue_connection = QueueConnection()
 
-# Common queue instances for easy access
-default_queue = queue_connection.get_queue('default')
-chat_queue = queue_connection.get_queue('chat')
-document_queue = queue_connection.get_queue('documents')
-
 
 def get_default_queue() -> Optional[Queue]:
     """Get the default queue for general background jobs"""
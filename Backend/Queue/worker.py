@@ -24,10 +24,27 @@ try:
     from Queue.connection import get_chat_queue, get_document_queue, get_default_queue
     from app.services.query_service import QueryService
     from app.services.document_service import DocumentService
+    from app.services.clients import get_client_registry
+    from app.core.container import get_services
+    from app.services.blob_store import get_blob_store
 except ImportError as e:
     print(f"Warning: Could not import services: {e}")
 
 
+# Services are built once per worker process (in the shared service container)
+# so their clients are reused across jobs
+
+
+def get_query_service() -> "QueryService":
+    """Get the worker's shared QueryService"""
+    return get_services().get('query')
+
+
+def get_document_service() -> "DocumentService":
+    """Get the worker's shared DocumentService"""
+    return get_services().get('document')
+
+
 class JobTracker:
     """
     Simple job tracking for MongoDB
@@ -62,7 +79,7 @@ class JobTracker:
             status (str): Job status ('pending', 'running', 'completed', 'failed')
             result (Dict, optional): Job result data
         """
-        if not self.collection:
+        if self.collection is None:
             print(f"⚠️ MongoDB not available, cannot track job {job_id}")
             return
         
@@ -96,7 +113,7 @@ class JobTracker:
         Returns:
             Dict: Job status and result or None if not found
         """
-        if not self.collection:
+        if self.collection is None:
             return None
         
         try:
@@ -134,15 +151,18 @@ def process_chat_query(job_id: str, query_data: Dict[str, Any]) -> Dict[str, Any
         print(f"🤖 Processing query: {query_text[:100]}...")
         
         # Use QueryService to process the query
-        query_service = QueryService()
-        result = query_service.process_query(query_text)
+        query_service = get_query_service()
+        result = query_service.user_query(
+            query_text, query_data.get('category'), user_id=query_data.get('user_id')
+        )
         
         # Prepare the response
         response = {
             'job_id': job_id,
             'query': query_text,
-            'answer': result.get('answer', 'No answer generated'),
-            'source_documents': result.get('source_documents', []),
+            'answer': result.get('response', 'No answer generated'),
+            'found_documents': result.get('found_documents', 0),
+            'cached': result.get('cached', False),
             'processing_time': time.time(),
             'status': 'completed'
         }
@@ -168,6 +188,66 @@ def process_chat_query(job_id: str, query_data: Dict[str, Any]) -> Dict[str, Any
         return error_response
 
 
+def process_batch_query(job_id: str, query_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process a checklist of queries in the background
+    
+    Args:
+        job_id (str): Unique job identifier
+        query_data (Dict): Query information containing the 'queries' texts
+        
+    Returns:
+        Dict: Per-question answers with timings
+    """
+    print(f"🔄 Starting batch query job: {job_id}")
+    job_tracker.update_job_status(job_id, 'running')
+    
+    try:
+        queries = query_data.get('queries') or []
+        if not queries:
+            raise ValueError("No queries provided")
+        
+        print(f"🤖 Processing {len(queries)} queries...")
+        
+        # One batched embedding call and batch search for the whole checklist
+        query_service = get_query_service()
+        result = query_service.user_query_batch(
+            queries, query_data.get('category'), user_id=query_data.get('user_id'),
+            **(query_data.get('search') or {})
+        )
+        
+        # Prepare the response
+        response = {
+            'job_id': job_id,
+            'count': result['count'],
+            'results': result['results'],
+            'timings': result['timings'],
+            'failed_queries': sum(1 for item in result['results'] if item.get('error')),
+            'processing_time': time.time(),
+            'status': 'completed'
+        }
+        
+        print(f"✅ Batch query completed: {job_id}")
+        job_tracker.update_job_status(job_id, 'completed', response)
+        
+        return response
+        
+    except Exception as e:
+        error_msg = f"Failed to process batch query: {str(e)}"
+        print(f"❌ {error_msg}")
+        print(f"🔍 Traceback: {traceback.format_exc()}")
+        
+        error_response = {
+            'job_id': job_id,
+            'error': error_msg,
+            'status': 'failed',
+            'processing_time': time.time()
+        }
+        
+        job_tracker.update_job_status(job_id, 'failed', error_response)
+        return error_response
+
+
 def process_document_upload(job_id: str, document_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Process a document upload in the background
@@ -184,17 +264,27 @@ def process_document_upload(job_id: str, document_data: Dict[str, Any]) -> Dict[
     
     try:
         # Extract document information
-        file_content = document_data.get('content', '')
+        blob = document_data.get('blob')
         filename = document_data.get('filename', 'unknown.txt')
         
-        if not file_content:
-            raise ValueError("No document content provided")
-        
-        print(f"📄 Processing document: {filename}")
-        
-        # Use DocumentService to process the document
-        document_service = DocumentService()
-        result = document_service.process_document(file_content, filename)
+        if not blob:
+            raise ValueError("No document file provided")
+        
+        # The upload lives in the shared blob store; the job only carries its reference
+        file_path = get_blob_store().open_path(blob)
+        print(f"📄 Processing document: {filename} ({blob['sha256'][:12]}, {blob['size']} bytes)")
+        
+        # Use DocumentService to process the stored upload. The blob is kept so a
+        # failed job can be retried; the job cleanup prunes old blobs.
+        # Without a document_id the upload's file name identifies it, as for synchronous uploads
+        document_service = get_document_service()
+        result = document_service.process_file(
+            file_path, document_data.get('engine'), document_data.get('document_id'),
+            user_id=document_data.get('user_id'), filename=filename
+        )
+        if result.get('status') == 'failed':
+            # Not stored: fail the job so it can be retried (the blob is kept)
+            raise RuntimeError(result.get('error') or 'Document was not stored')
         
         # Prepare the response
         response = {
@@ -203,6 +293,8 @@ def process_document_upload(job_id: str, document_data: Dict[str, Any]) -> Dict[
             'category': result.get('category', 'unknown'),
             'processing_status': result.get('status', 'processed'),
             'document_id': result.get('document_id'),
+            'chunks_embedded': result.get('chunks_embedded'),
+            'chunks_deleted': result.get('chunks_deleted'),
             'processing_time': time.time(),
             'status': 'completed'
         }
@@ -278,7 +370,7 @@ def run_worker():
     This function starts the worker and listens for jobs on all queues.
     """
     try:
-        from rq import Worker
+        from rq import SimpleWorker
         
         # Get all queues
         chat_queue = get_chat_queue()
@@ -300,8 +392,12 @@ def run_worker():
         
         print(f"🚀 Starting worker for queues: {[q.name for q in queues]}")
         
-        # Create and start worker
-        worker = Worker(queues)
+        # Build long-lived Qdrant/Gemini clients once for every job
+        get_client_registry().startup()
+        
+        # SimpleWorker runs jobs in this process (no fork per job), so the
+        # client registry, its connection pools and cached services stay warm
+        worker = SimpleWorker(queues)
         worker.work()
         
     except Exception as e:
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import Optional
 from app.schemas.document import DocumentUploadResponse, DocumentCategoriesResponse, DocumentCategory
-from app.services.document_service import DocumentService
-from app.services.queue_service import QueueService
+from app.core.container import get_document_service, get_queue_service
+from app.services.upload_service import UploadError
+from app.services.blob_store import get_blob_store
+from app.services.pdf_extraction import available_engines, resolve_engine
 
 router = APIRouter()
-document_service = DocumentService()
-queue_service = QueueService()
 
 @router.post("/", response_model=DocumentUploadResponse, summary="Upload and Process Legal Document")
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(file: UploadFile = File(...), engine: Optional[str] = None,
+                          document_id: Optional[str] = None, user_id: Optional[str] = None,
+                          document_service=Depends(get_document_service)):
     """
     Upload and process a legal document.
     
@@ -20,6 +23,15 @@ async def upload_document(file: UploadFile = File(...)):
     **RESTful Design**: POST /api/v1/documents (resource creation - creates a document resource)
     
     Supports: PDF and TXT files
+    
+    **engine** (optional): PDF extraction engine (pypdf, pypdfium2, pymupdf); defaults to the configured engine
+    
+    **document_id** (optional): stable ID of the document. Re-uploading a revised file under the
+    same ID only embeds new or changed chunks and removes the stale ones. Defaults to the file name,
+    so a revision uploaded under the same name (and user_id) replaces the previous version; give
+    different files that share a name their own IDs.
+    
+    **user_id** (optional): owner of the document; queries with the same user_id only search their documents
     """
     try:
         # Validate file
@@ -27,16 +39,24 @@ async def upload_document(file: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="No filename provided")
         
         # Process using exact LangGraph workflow
-        result = await document_service.process_uploaded_file(file)
+        result = await document_service.process_uploaded_file(file, engine, document_id, user_id)
         
         return DocumentUploadResponse(
             filename=file.filename,
             file_path=result.get("file_path", "processed"),
             content_length=result.get("content_length", 0),
             category=result["category"],
-            status=result["status"]
+            status=result["status"],
+            document_id=result.get("document_id"),
+            chunks_total=result.get("chunks_total"),
+            chunks_embedded=result.get("chunks_embedded"),
+            chunks_unchanged=result.get("chunks_unchanged"),
+            chunks_deleted=result.get("chunks_deleted"),
+            error=result.get("error")
         )
         
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -44,7 +64,9 @@ async def upload_document(file: UploadFile = File(...)):
 
 
 @router.post("/async", summary="Upload Document as Background Job")
-async def upload_document_async(file: UploadFile = File(...)):
+async def upload_document_async(file: UploadFile = File(...), engine: Optional[str] = None,
+                                document_id: Optional[str] = None, user_id: Optional[str] = None,
+                                queue_service=Depends(get_queue_service)):
     """
     Upload and process a document as a background job.
     
@@ -63,14 +85,21 @@ async def upload_document_async(file: UploadFile = File(...)):
         if not file.filename:
             raise HTTPException(status_code=400, detail="No filename provided")
         
-        # Read file content
-        file_content = await file.read()
-        content_str = file_content.decode('utf-8', errors='ignore')
+        # Reject unknown engines before the job is queued
+        if engine:
+            resolve_engine(engine)
+        
+        # Stream the file into the blob store shared with the worker;
+        # the job itself only carries the blob reference
+        blob = await get_blob_store().put_upload(file)
         
         # Submit to background queue
         result = queue_service.submit_document_upload(
-            file_content=content_str,
-            filename=file.filename
+            blob=blob,
+            filename=file.filename,
+            engine=engine,
+            document_id=document_id,
+            user_id=user_id
         )
         
         if 'error' in result:
@@ -82,11 +111,17 @@ async def upload_document_async(file: UploadFile = File(...)):
             "message": result["message"],
             "estimated_wait_time": result["estimated_wait_time"],
             "filename": file.filename,
+            "sha256": blob["sha256"],
+            "size": blob["size"],
             "check_status_url": f"/api/v1/jobs/{result['job_id']}"
         }
         
     except HTTPException:
         raise
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to submit async document upload: {str(e)}")
 
@@ -126,6 +161,7 @@ async def get_document_health():
         "service": "document_processing",
         "status": "active",
         "supported_formats": [".pdf", ".txt"],
+        "pdf_engines": available_engines(),
         "workflow_steps": ["load_doc", "decision", "embed_and_store"],
         "categories": ["contracts", "policy"],
         "ai_model": "gemini-1.5-flash"
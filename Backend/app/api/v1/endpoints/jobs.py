@@ -5,20 +5,20 @@ API endpoints for managing background jobs and queue system monitoring.
 Simple and beginner-friendly implementation.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from typing import Optional
-from app.services.queue_service import QueueService
+from app.core.container import get_queue_service
+from app.services.upload_service import UploadError
+from app.services.blob_store import get_blob_store
 from app.schemas.query import QueryRequest
 import time
 
 router = APIRouter()
 
-# Initialize queue service
-queue_service = QueueService()
-
 
 @router.post("/chat")
-async def submit_chat_job(query_request: QueryRequest, user_id: Optional[str] = None):
+async def submit_chat_job(query_request: QueryRequest, user_id: Optional[str] = None,
+                          queue_service=Depends(get_queue_service)):
     """
     Submit a chat query as a background job
     
@@ -32,7 +32,8 @@ async def submit_chat_job(query_request: QueryRequest, user_id: Optional[str] =
     try:
         result = queue_service.submit_chat_query(
             query_text=query_request.query,
-            user_id=user_id
+            user_id=user_id or query_request.user_id,
+            category=query_request.category
         )
         
         if 'error' in result:
@@ -45,7 +46,8 @@ async def submit_chat_job(query_request: QueryRequest, user_id: Optional[str] =
 
 
 @router.post("/document")
-async def submit_document_job(file_content: str, filename: str, user_id: Optional[str] = None):
+async def submit_document_job(file_content: str, filename: str, user_id: Optional[str] = None,
+                              queue_service=Depends(get_queue_service)):
     """
     Submit a document upload as a background job
     
@@ -58,8 +60,11 @@ async def submit_document_job(file_content: str, filename: str, user_id: Optiona
         Job submission result with job_id for tracking
     """
     try:
+        # Write the content to the blob store shared with the worker
+        blob = get_blob_store().put_text(file_content, filename)
+        
         result = queue_service.submit_document_upload(
-            file_content=file_content,
+            blob=blob,
             filename=filename,
             user_id=user_id
         )
@@ -69,12 +74,14 @@ async def submit_document_job(file_content: str, filename: str, user_id: Optiona
         
         return result
         
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to submit document job: {str(e)}")
 
 
 @router.post("/health-check")
-async def submit_health_check_job():
+async def submit_health_check_job(queue_service=Depends(get_queue_service)):
     """
     Submit a health check job for testing the queue system
     
@@ -94,7 +101,7 @@ async def submit_health_check_job():
 
 
 @router.get("/{job_id}")
-async def get_job_status(job_id: str):
+async def get_job_status(job_id: str, queue_service=Depends(get_queue_service)):
     """
     Get the status and result of a specific job
     
@@ -122,7 +129,7 @@ async def get_job_status(job_id: str):
 
 
 @router.get("/")
-async def get_recent_jobs(limit: int = 20):
+async def get_recent_jobs(limit: int = 20, queue_service=Depends(get_queue_service)):
     """
     Get recent jobs for monitoring
     
@@ -151,7 +158,7 @@ async def get_recent_jobs(limit: int = 20):
 
 
 @router.post("/cleanup")
-async def cleanup_old_jobs(days: int = 7):
+async def cleanup_old_jobs(days: int = 7, queue_service=Depends(get_queue_service)):
     """
     Clean up old completed/failed jobs
     
@@ -182,7 +189,7 @@ async def cleanup_old_jobs(days: int = 7):
 
 
 @router.get("/stats")
-async def get_job_statistics():
+async def get_job_statistics(queue_service=Depends(get_queue_service)):
     """
     Get job statistics and system overview
     
@@ -1,14 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.query import QueryRequest, QueryResponse
-from app.services.query_service import QueryService
-from app.services.queue_service import QueueService
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.core.container import get_query_service, get_queue_service
+from app.schemas.query import BatchQueryRequest, BatchQueryResponse, QueryRequest, QueryResponse
 
 router = APIRouter()
-query_service = QueryService()
-queue_service = QueueService()
 
 @router.post("/", response_model=QueryResponse, summary="Query Legal Documents")
-async def query_documents(request: QueryRequest):
+async def query_documents(request: QueryRequest, query_service=Depends(get_query_service)):
     """
     Query legal documents using AI assistance.
     
@@ -23,16 +22,22 @@ async def query_documents(request: QueryRequest):
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        # Call the exact user_query function logic
-        result = query_service.user_query(
+        # Same user_query logic on the async clients, so the event loop keeps serving
+        result = await query_service.auser_query(
             query=request.query,
-            category=request.category
+            category=request.categories or request.category,
+            user_id=request.user_id,
+            hnsw_ef=request.hnsw_ef,
+            exact=request.exact,
+            rescore=request.rescore,
+            oversampling=request.oversampling
         )
         
         return QueryResponse(
             query=result["query"],
             response=result["response"],
-            found_documents=result["found_documents"]
+            found_documents=result["found_documents"],
+            cached=result.get("cached", False)
         )
         
     except ValueError as e:
@@ -41,8 +46,128 @@ async def query_documents(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Failed to process query: {str(e)}")
 
 
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream", summary="Query Legal Documents (streamed answer)")
+async def stream_query(request: QueryRequest, query_service=Depends(get_query_service)):
+    """
+    Query legal documents and stream the answer as server-sent events.
+    
+    Same retrieval and prompt as POST /api/v1/queries, but the client gets:
+    - `retrieval`: found_documents and the sources, as soon as the search is done
+    - `token`: answer text chunks as Gemini generates them
+    - `done`: end of the answer (or `error` if generation failed midway)
+    
+    **RESTful Design**: POST /api/v1/queries/stream (query result delivered as a text/event-stream)
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    try:
+        events = query_service.stream_query(
+            query=request.query,
+            category=request.categories or request.category,
+            user_id=request.user_id,
+            hnsw_ef=request.hnsw_ef,
+            exact=request.exact,
+            rescore=request.rescore,
+            oversampling=request.oversampling
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def event_stream():
+        try:
+            async for event in events:
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            yield _sse("error", {"detail": f"Failed to process query: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/batch", response_model=BatchQueryResponse, summary="Query Legal Documents (batch of questions)")
+async def query_documents_batch(request: BatchQueryRequest, query_service=Depends(get_query_service)):
+    """
+    Answer a checklist of questions against the same documents in one call.
+    
+    All questions are embedded together and searched with one Qdrant batch
+    search per collection; answers are generated with bounded concurrency.
+    Each result carries its own timing, and a failed question reports an
+    `error` instead of failing the whole batch.
+    
+    **RESTful Design**: POST /api/v1/queries/batch (creates a set of query results)
+    """
+    try:
+        result = await query_service.auser_query_batch(
+            queries=request.queries,
+            category=request.categories or request.category,
+            user_id=request.user_id,
+            hnsw_ef=request.hnsw_ef,
+            exact=request.exact,
+            rescore=request.rescore,
+            oversampling=request.oversampling
+        )
+        return BatchQueryResponse(**result)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process batch query: {str(e)}")
+
+
+@router.post("/batch/async", summary="Submit Batch Query as Background Job")
+async def submit_async_batch_query(request: BatchQueryRequest, queue_service=Depends(get_queue_service),
+                                   query_service=Depends(get_query_service)):
+    """
+    Submit a checklist of questions as one background job.
+    
+    The batch is validated like POST /api/v1/queries/batch before it is queued,
+    and the job result has the same shape.
+    
+    **RESTful Design**: POST /api/v1/queries/batch/async (background job creation)
+    """
+    try:
+        category = request.categories or request.category
+        query_service.check_batch(request.queries, category)
+        
+        result = queue_service.submit_batch_query(
+            queries=request.queries,
+            user_id=request.user_id,
+            category=category,
+            search=request.model_dump(include={"hnsw_ef", "exact", "rescore", "oversampling"}, exclude_none=True)
+        )
+        
+        if 'error' in result:
+            raise HTTPException(status_code=500, detail=result['error'])
+        
+        return {
+            "job_id": result["job_id"],
+            "status": result["status"],
+            "message": result["message"],
+            "estimated_wait_time": result["estimated_wait_time"],
+            "count": len(request.queries),
+            "check_status_url": f"/api/v1/jobs/{result['job_id']}"
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to submit batch query: {str(e)}")
+
+
 @router.post("/async", summary="Submit Query as Background Job")
-async def submit_async_query(request: QueryRequest):
+async def submit_async_query(request: QueryRequest, queue_service=Depends(get_queue_service)):
     """
     Submit a query as a background job for processing.
     
@@ -62,7 +187,9 @@ async def submit_async_query(request: QueryRequest):
         
         # Submit query to background queue
         result = queue_service.submit_chat_query(
-            query_text=request.query
+            query_text=request.query,
+            user_id=request.user_id,
+            category=request.categories or request.category
         )
         
         if 'error' in result:
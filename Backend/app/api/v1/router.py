@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.api.v1.endpoints import documents, queries, jobs
 
 # Create main API router
@@ -10,11 +10,10 @@ api_router.include_router(queries.router, prefix="/queries", tags=["queries"])
 api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 # Add queue health endpoint directly to avoid double prefix
-from app.services.queue_service import QueueService
-queue_service = QueueService()
+from app.core.container import get_queue_service
 
 @api_router.get("/queue/health", tags=["queue"])
-async def get_queue_health():
+async def get_queue_health(queue_service=Depends(get_queue_service)):
     """Get queue system health information"""
     try:
         health_info = queue_service.get_queue_health()
@@ -24,4 +23,15 @@ async def get_queue_health():
         return health_info
     except Exception as e:
         from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail=f"Failed to get queue health: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get queue health: {str(e)}")
+
+
+@api_router.get("/embeddings/cache", tags=["embeddings"])
+def get_embedding_cache_stats():
+    """Get embedding cache hit/miss counters for this API process"""
+    # Plain def: opening the SQLite cache and counting its rows runs in the threadpool
+    from app.services.embedding_cache import get_embedding_cache
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
\ No newline at end of file
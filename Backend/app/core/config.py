@@ -23,21 +23,148 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = "gemini-1.5-flash"
     EMBEDDING_MODEL: str = "models/embedding-001"
+    # "gemini", or "hashing"/"random_projection" for deterministic offline embeddings (no key needed)
+    EMBEDDING_PROVIDER: str = "gemini"
+    
+    # Embedding cache (keyed by model + SHA-256 of the text)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500_000
+    # Share cached vectors between processes through Valkey
+    EMBEDDING_CACHE_VALKEY: bool = False
+    EMBEDDING_CACHE_VALKEY_TTL: int = 7 * 24 * 3600
+    
+    # Embedding batching and rate limiting (one token = one embedded text)
+    EMBEDDING_BATCH_SIZE: int = 50
+    EMBEDDING_MAX_IN_FLIGHT: int = 4
+    EMBEDDING_RATE_LIMIT_PER_MINUTE: int = 1500
+    EMBEDDING_RATE_LIMIT_BURST: int = 300
+    # Share of the bucket bulk ingest leaves free for interactive queries
+    EMBEDDING_INTERACTIVE_RESERVE: float = 0.2
+    EMBEDDING_MAX_RETRIES: int = 5
+    EMBEDDING_BACKOFF_BASE: float = 1.0
+    EMBEDDING_BACKOFF_MAX: float = 60.0
     
     # Qdrant Configuration
     QDRANT_URL: str = "http://localhost:6333"
+    QDRANT_TIMEOUT: int = 30
+    QDRANT_UPSERT_BATCH_SIZE: int = 256
+    # Seconds collection metadata is cached by the client registry
+    COLLECTION_INFO_TTL: int = 300
+    
+    # Vector storage layout: "per_category" (one collection per category) or "shared"
+    # (one collection, scoped by indexed category/document/user payload filters)
+    VECTOR_STORAGE_MODE: str = "per_category"
+    SHARED_COLLECTION_NAME: str = "documents"
+    
+    # Vector store backend: "qdrant" (server at QDRANT_URL) or "numpy" (embedded, dense search only)
+    VECTOR_STORE_BACKEND: str = "qdrant"
+    NUMPY_STORE_PATH: str = ".cache/vectors"
+    # Collections this large are searched through an inverted file of k-means lists
+    NUMPY_IVF_MIN_POINTS: int = 20000
+    # IVF lists (0 = square root of the number of points) and lists scanned per query
+    NUMPY_IVF_LISTS: int = 0
+    NUMPY_IVF_PROBES: int = 8
+    
+    # Collection provisioning (applied on create and by provision_collections.py)
+    # Dimension of EMBEDDING_MODEL, used when collections are provisioned ahead of ingest
+    QDRANT_VECTOR_SIZE: int = 768
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_ON_DISK: bool = False
+    QDRANT_VECTORS_ON_DISK: bool = False
+    # Vector quantization: "none", "scalar" (int8, 4x smaller) or "binary" (32x smaller)
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_SCALAR_QUANTILE: float = 0.99
+    
+    # Search-time defaults (overridable per query)
+    QDRANT_SEARCH_HNSW_EF: Optional[int] = None
+    QDRANT_SEARCH_EXACT: bool = False
+    # Re-rank quantized candidates with the original vectors
+    QDRANT_SEARCH_RESCORE: bool = True
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+    
+    # Hybrid retrieval: BM25 sparse vectors next to the dense ones, fused with reciprocal-rank fusion
+    HYBRID_SEARCH_ENABLED: bool = True
+    # Candidates each retriever contributes to the fusion
+    HYBRID_PREFETCH_LIMIT: int = 20
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    # Typical number of terms in a chunk (BM25 length normalization)
+    BM25_AVG_CHUNK_TERMS: int = 120
+    
+    # Concurrent async calls per process to each downstream (queries beyond wait their turn)
+    QDRANT_MAX_CONCURRENCY: int = 32
+    GEMINI_MAX_CONCURRENCY: int = 16
+    
+    # Semantic answer cache (near-duplicate questions in the same scope reuse the answer)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 2000
+    
+    # Single-flight coalescing of identical in-flight queries (per process, and across processes via Valkey)
+    SINGLE_FLIGHT_ENABLED: bool = True
+    # Leader lock expiry, in case the computing process dies
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS: float = 60.0
+    # How long a finished answer stays available to waiting processes
+    SINGLE_FLIGHT_RESULT_TTL_SECONDS: float = 5.0
+    SINGLE_FLIGHT_POLL_INTERVAL_SECONDS: float = 0.05
+    SINGLE_FLIGHT_WAIT_SECONDS: float = 60.0
+    
+    # Batch queries (checklists of questions answered in one request)
+    BATCH_QUERY_MAX_QUESTIONS: int = 200
+    # Answers generated at the same time per batch (also bounded by GEMINI_MAX_CONCURRENCY)
+    BATCH_QUERY_CONCURRENCY: int = 8
     
     # Document Processing Configuration
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 300
     MAX_SEARCH_RESULTS: int = 5
     
+    # Context packing (dedupe, MMR, merge overlapping chunks, token budget)
+    CONTEXT_PACKING_ENABLED: bool = True
+    # Chunks retrieved as packing candidates
+    CONTEXT_CANDIDATES: int = 12
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_CHARS_PER_TOKEN: float = 4.0
+    # 1.0 = pure relevance, lower values favour diverse passages
+    CONTEXT_MMR_LAMBDA: float = 0.7
+    CONTEXT_DEDUP_SIMILARITY: float = 0.97
+
+    # Build the clients and services in a background thread at startup (the app is ready at once)
+    SERVICE_WARMUP_ENABLED: bool = True
+
+    # Number of processes used to parse uploaded documents off the event loop (0 parses inline)
+    PARSE_WORKERS: int = 2
+    # Pages per shard when a PDF is split across the parsing pool
+    PDF_PAGES_PER_SHARD: int = 25
+    # PDF extraction engine: "auto" (fastest installed), "pypdfium2", "pymupdf" or "pypdf"
+    PDF_ENGINE: str = "auto"
+
     # Supported file types
     SUPPORTED_FILE_TYPES: list = [".pdf", ".txt"]
     
+    # Upload streaming configuration
+    MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    UPLOAD_SNIFF_BYTES: int = 8 * 1024
+    # Content-addressed blob store shared with the RQ worker (local or shared volume)
+    BLOB_STORE_DIR: str = "uploads/blobs"
+    # Blobs not uploaded again for this long are pruned by the job cleanup
+    BLOB_TTL_SECONDS: int = 7 * 24 * 3600
+    
     # Document categories
     DOCUMENT_CATEGORIES: list = ["contracts", "policy"]
     
+    # Local document classifier (decision falls back to Gemini below the threshold)
+    CLASSIFIER_ENABLED: bool = True
+    CLASSIFIER_MODEL_PATH: str = ".cache/doc_classifier.json"
+    CLASSIFIER_CONFIDENCE_THRESHOLD: float = 0.9
+    # Characters of each document the classifier looks at
+    CLASSIFIER_MAX_CHARS: int = 20000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,129 @@
+"""
+Service Container
+
+The services are built on first use and shared by every endpoint of the
+process (and by the RQ worker's jobs), instead of every endpoint module
+building its own at import time. Importing the app therefore loads no
+Gemini, LangChain, LangGraph, Qdrant or MongoDB SDK, and opens no
+connections; each is imported when the service that needs it is built.
+
+The FastAPI lifespan owns the container: at startup it warms the clients
+and services up in a background thread (SERVICE_WARMUP_ENABLED), so the
+app accepts requests at once and the first query rarely pays for the
+imports; at shutdown it closes whatever was built.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.document_service import DocumentService
+    from app.services.query_service import QueryService
+    from app.services.queue_service import QueueService
+
+
+def _query_service():
+    from app.services.query_service import QueryService
+    return QueryService()
+
+
+def _document_service():
+    from app.services.document_service import DocumentService
+    return DocumentService()
+
+
+def _queue_service():
+    from app.services.queue_service import QueueService
+    return QueueService()
+
+
+# Service name -> factory (imports the service module when called)
+FACTORIES: Dict[str, Callable[[], Any]] = {
+    "query": _query_service,
+    "document": _document_service,
+    "queue": _queue_service
+}
+
+
+class ServiceContainer:
+    """Lazily built, process-wide services"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._services: Dict[str, Any] = {}
+        self._warm_up: Optional[threading.Thread] = None
+
+    def get(self, name: str) -> Any:
+        """A service, built on first use"""
+        service = self._services.get(name)
+        if service is None:
+            if name not in FACTORIES:
+                raise ValueError(f"Unknown service: {name}")
+            with self.lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = self._services[name] = FACTORIES[name]()
+        return service
+
+    async def aget(self, name: str) -> Any:
+        """Async get - a service that is not built yet is built off the event loop"""
+        service = self._services.get(name)
+        if service is None:
+            service = await asyncio.to_thread(self.get, name)
+        return service
+
+    def warm_up(self):
+        """Build the shared clients and every service"""
+        start = time.perf_counter()
+        try:
+            from app.services.clients import get_client_registry
+            get_client_registry().startup()
+            for name in FACTORIES:
+                self.get(name)
+            print(f"🔥 Services warmed up in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"⚠️ Service warm-up failed (services are built on first use): {e}")
+
+    def startup(self):
+        """Start warming up in the background (returns at once)"""
+        if settings.SERVICE_WARMUP_ENABLED and self._warm_up is None:
+            self._warm_up = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+            self._warm_up.start()
+
+    async def aclose(self):
+        """Close the shared clients and the parsing pool, if they were ever built"""
+        # The warm-up thread is a daemon and is not waited for; the registry
+        # and the pool only exist if something imported their modules
+        if "app.services.clients" in sys.modules:
+            from app.services.clients import get_client_registry
+            await get_client_registry().aclose()
+        if "app.core.executors" in sys.modules:
+            from app.core.executors import shutdown_process_pool
+            shutdown_process_pool()
+
+
+# Process-wide container
+_services = ServiceContainer()
+
+
+def get_services() -> ServiceContainer:
+    """Get the process-wide service container"""
+    return _services
+
+
+# FastAPI dependencies
+
+async def get_query_service() -> "QueryService":
+    return await _services.aget("query")
+
+
+async def get_document_service() -> "DocumentService":
+    return await _services.aget("document")
+
+
+async def get_queue_service() -> "QueueService":
+    return await _services.aget("queue")
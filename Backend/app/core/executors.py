@@ -0,0 +1,41 @@
+"""
+Shared Executors for CPU-bound Work
+
+Document parsing is CPU heavy and would block the FastAPI event loop,
+so it runs in a bounded process pool that is created on first use and
+shared by every request in the API process.
+
+PARSE_WORKERS = 0 disables the pool and parses inline, for processes that
+are themselves pool workers (see bulk_ingest.py).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+
+# Process pool used for PDF/TXT parsing (created lazily)
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the shared parsing process pool
+
+    Returns:
+        ProcessPoolExecutor: Pool bounded by settings.PARSE_WORKERS, or None to parse inline
+    """
+    global _process_pool
+    if settings.PARSE_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS)
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Shut down the parsing process pool if it was started"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -1,14 +1,29 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import os
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the shared services up in the background at startup and close them at shutdown"""
+    from app.core.container import get_services
+
+    services = get_services()
+    app.state.services = services
+    services.startup()
+    yield
+    await services.aclose()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Legal Document AI Assistant",
     description="API for processing legal documents and providing AI-powered legal advice",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -6,6 +6,7 @@ in the Legal AI Assistant system.
 """
 
 import os
+import threading
 import time
 from typing import Dict, Any, Optional, List
 from enum import Enum
@@ -22,6 +23,7 @@ class JobStatus(str, Enum):
 class JobType(str, Enum):
     """Job type enumeration"""
     CHAT_QUERY = "chat_query"
+    BATCH_QUERY = "batch_query"
     DOCUMENT_UPLOAD = "document_upload"
     HEALTH_CHECK = "health_check"
 
@@ -348,5 +350,15 @@ class JobTracker:
             return {}
 
 
-# Global job tracker instance
-global_job_tracker = JobTracker()
\ No newline at end of file
+# Process-wide job tracker (created lazily, so one MongoDB client per process)
+_job_tracker: Optional[JobTracker] = None
+_job_tracker_lock = threading.Lock()
+
+
+def get_job_tracker() -> JobTracker:
+    """Get the shared job tracker"""
+    global _job_tracker
+    with _job_tracker_lock:
+        if _job_tracker is None:
+            _job_tracker = JobTracker()
+    return _job_tracker
\ No newline at end of file
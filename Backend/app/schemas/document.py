@@ -9,6 +9,12 @@ class DocumentUploadResponse(BaseModel):
     content_length: int = Field(..., description="Length of extracted content")
     category: str = Field(..., description="Detected document category (contracts/policy/unknown)")
     status: str = Field(..., description="Processing status")
+    document_id: Optional[str] = Field(None, description="Stable document ID (the file name unless given)")
+    chunks_total: Optional[int] = Field(None, description="Chunks in the document")
+    chunks_embedded: Optional[int] = Field(None, description="New or changed chunks that were embedded")
+    chunks_unchanged: Optional[int] = Field(None, description="Chunks already stored and left as they were")
+    chunks_deleted: Optional[int] = Field(None, description="Stale chunks removed from a previous version")
+    error: Optional[str] = Field(None, description="Why the document was not stored (status 'failed')")
     
     class Config:
         json_schema_extra = {
@@ -17,7 +23,12 @@ class DocumentUploadResponse(BaseModel):
                 "file_path": "/tmp/tmpfile.pdf",
                 "content_length": 1250,
                 "category": "contracts",
-                "status": "success"
+                "status": "success",
+                "document_id": "employment-contract-2024",
+                "chunks_total": 12,
+                "chunks_embedded": 2,
+                "chunks_unchanged": 10,
+                "chunks_deleted": 1
             }
         }
 
@@ -1,10 +1,16 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class QueryRequest(BaseModel):
     """Request model for document queries - matches user_query function signature"""
     query: str = Field(..., min_length=1, description="Legal question or search query")
-    category: Optional[str] = Field("category", description="Document category to search in (contracts/policy), defaults to 'category'")
+    category: Optional[str] = Field(None, description="Document category to search in (contracts/policy), or 'all'/omitted for every category")
+    categories: Optional[List[str]] = Field(None, description="Several categories to search in one request (overrides category)")
+    user_id: Optional[str] = Field(None, description="Only search documents uploaded by this user")
+    hnsw_ef: Optional[int] = Field(None, ge=1, description="HNSW search breadth (higher = better recall, slower)")
+    exact: Optional[bool] = Field(None, description="Exact (full scan) search instead of HNSW")
+    rescore: Optional[bool] = Field(None, description="Re-rank quantized candidates with the original vectors")
+    oversampling: Optional[float] = Field(None, ge=1.0, description="Quantized candidates fetched per result before rescoring")
     
     class Config:
         json_schema_extra = {
@@ -19,6 +25,7 @@ class QueryResponse(BaseModel):
     query: str = Field(..., description="Original query")
     response: str = Field(..., description="AI-generated legal advice response")
     found_documents: int = Field(..., description="Number of relevant documents found")
+    cached: bool = Field(False, description="Answer reused from a near-identical earlier question")
     
     class Config:
         json_schema_extra = {
@@ -27,4 +34,42 @@ class QueryResponse(BaseModel):
                 "response": "Based on the employment contracts in your database, termination conditions typically include...",
                 "found_documents": 3
             }
-        }
\ No newline at end of file
+        }
+
+class BatchQueryRequest(BaseModel):
+    """Request model for a checklist of questions answered in one call"""
+    queries: List[str] = Field(..., min_length=1, description="Questions to answer (at most BATCH_QUERY_MAX_QUESTIONS)")
+    category: Optional[str] = Field(None, description="Document category to search in (contracts/policy), or 'all'/omitted for every category")
+    categories: Optional[List[str]] = Field(None, description="Several categories to search in one request (overrides category)")
+    user_id: Optional[str] = Field(None, description="Only search documents uploaded by this user")
+    hnsw_ef: Optional[int] = Field(None, ge=1, description="HNSW search breadth (higher = better recall, slower)")
+    exact: Optional[bool] = Field(None, description="Exact (full scan) search instead of HNSW")
+    rescore: Optional[bool] = Field(None, description="Re-rank quantized candidates with the original vectors")
+    oversampling: Optional[float] = Field(None, ge=1.0, description="Quantized candidates fetched per result before rescoring")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": [
+                    "What is the notice period for termination?",
+                    "Is there a limitation of liability clause?"
+                ],
+                "category": "contracts"
+            }
+        }
+
+class BatchQueryResult(BaseModel):
+    """Answer to one question of a batch"""
+    query: str = Field(..., description="Original query")
+    response: str = Field(..., description="AI-generated legal advice response (empty if the question failed)")
+    found_documents: int = Field(..., description="Number of relevant documents found")
+    cached: bool = Field(False, description="Answer reused from a near-identical earlier question")
+    generation_ms: float = Field(..., description="Time spent generating this answer")
+    error: Optional[str] = Field(None, description="Why this question could not be answered")
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch queries"""
+    category: str = Field(..., description="Searched categories")
+    count: int = Field(..., description="Number of answered questions")
+    results: List[BatchQueryResult] = Field(..., description="Answers, in question order")
+    timings: Dict[str, float] = Field(..., description="embedding_ms, search_ms, generation_ms and total_ms of the batch")
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Semantic Answer Cache
+
+Many users ask the same legal question in slightly different words. Answers
+are cached per scope (the searched categories, and tenant) together
+with the normalized query embedding; a question whose embedding has a
+cosine similarity of at least ANSWER_CACHE_SIMILARITY_THRESHOLD with a
+cached one in the same scope gets the cached answer without a search or a
+Gemini generation.
+
+Entries expire after ANSWER_CACHE_TTL_SECONDS and the least recently used
+ones are evicted beyond ANSWER_CACHE_MAX_ENTRIES. Every category has a
+version counter that embed_and_store bumps when it writes chunks; entries
+remember the versions they were computed against and are dropped once one
+of them changes. The counters live in Valkey, so ingest in an RQ worker
+invalidates the caches of every API process; without Valkey they are
+per process.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.config import settings
+
+# Valkey key prefix of the per-category version counters
+VERSION_KEY_PREFIX = "answer_cache:version:"
+
+Scope = Tuple[str, str]
+Versions = Tuple[int, ...]
+
+
+def scope_categories(categories: Optional[Sequence[str]]) -> List[str]:
+    """Categories an answer in a scope depends on (None = all categories)"""
+    return list(categories) if categories else list(settings.DOCUMENT_CATEGORIES)
+
+
+class CategoryVersions:
+    """Per-category version counters, shared through Valkey when available"""
+
+    def __init__(self, redis_connection=None):
+        self.redis = redis_connection
+        self.local: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def get(self, categories: List[str]) -> Optional[Versions]:
+        """Current versions of the categories (None if they cannot be read)"""
+        if self.redis is not None:
+            try:
+                values = self.redis.mget([VERSION_KEY_PREFIX + category for category in categories])
+                return tuple(int(value or 0) for value in values)
+            except Exception as e:
+                print(f"⚠️ Answer cache versions unavailable: {e}")
+                return None
+        with self.lock:
+            return tuple(self.local.get(category, 0) for category in categories)
+
+    def bump(self, category: str):
+        with self.lock:
+            self.local[category] = self.local.get(category, 0) + 1
+        if self.redis is not None:
+            try:
+                self.redis.incr(VERSION_KEY_PREFIX + category)
+            except Exception as e:
+                print(f"⚠️ Failed to invalidate cached answers for '{category}': {e}")
+
+
+class SemanticAnswerCache:
+    """LRU/TTL cache of answers looked up by query embedding similarity"""
+
+    def __init__(self, threshold: float, ttl: float, max_entries: int, versions: CategoryVersions):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.versions = versions
+        self.lock = threading.Lock()
+        # Entry ID -> scope, in least-recently-used order
+        self.order: "OrderedDict[int, Scope]" = OrderedDict()
+        # Scope -> entry ID -> entry
+        self.scopes: Dict[Scope, Dict[int, Dict]] = {}
+        # Scope -> (entry IDs, stacked vectors), rebuilt after the scope changes
+        self.matrices: Dict[Scope, Tuple[List[int], np.ndarray]] = {}
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope(categories: Optional[Sequence[str]], user_id: Optional[str]) -> Scope:
+        return ("+".join(categories) if categories else "*", user_id or "")
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def current_versions(self, categories: Optional[Sequence[str]]) -> Optional[Versions]:
+        """Versions to pass to get/put (None disables the cache for this query)"""
+        return self.versions.get(scope_categories(categories))
+
+    def _remove(self, entry_id: int):
+        scope = self.order.pop(entry_id)
+        entries = self.scopes[scope]
+        del entries[entry_id]
+        self.matrices.pop(scope, None)
+        if not entries:
+            del self.scopes[scope]
+
+    def _matrix(self, scope: Scope) -> Tuple[List[int], np.ndarray]:
+        if scope not in self.matrices:
+            entries = self.scopes[scope]
+            ids = list(entries)
+            self.matrices[scope] = (ids, np.stack([entries[i]["vector"] for i in ids]))
+        return self.matrices[scope]
+
+    def get(self, vector: List[float], categories: Optional[Sequence[str]], user_id: Optional[str],
+            versions: Optional[Versions]) -> Optional[Dict]:
+        """
+        Cached answer for a similar question in the same scope
+
+        Returns:
+            Optional[Dict]: response, found_documents and sources, or None on a miss
+        """
+        if versions is None:
+            return None
+        query = self._normalize(vector)
+        now = time.monotonic()
+        scope = self._scope(categories, user_id)
+        with self.lock:
+            entries = self.scopes.get(scope, {})
+            for entry_id in [i for i, e in entries.items() if e["expires"] < now or e["versions"] != versions]:
+                self._remove(entry_id)
+            if scope not in self.scopes:
+                self.misses += 1
+                return None
+
+            ids, matrix = self._matrix(scope)
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.order.move_to_end(ids[best])
+            return dict(self.scopes[scope][ids[best]]["answer"])
+
+    def put(self, vector: List[float], categories: Optional[Sequence[str]], user_id: Optional[str],
+            answer: Dict, versions: Optional[Versions]):
+        """Cache an answer computed against the given category versions"""
+        if versions is None:
+            return
+        scope = self._scope(categories, user_id)
+        with self.lock:
+            entry_id = self.next_id
+            self.next_id += 1
+            self.scopes.setdefault(scope, {})[entry_id] = {
+                "vector": self._normalize(vector),
+                "answer": dict(answer),
+                "versions": versions,
+                "expires": time.monotonic() + self.ttl
+            }
+            self.order[entry_id] = scope
+            self.matrices.pop(scope, None)
+            while len(self.order) > self.max_entries:
+                self._remove(next(iter(self.order)))
+
+    def invalidate(self, category: str):
+        """Drop answers that depend on a category (in every process sharing the versions)"""
+        self.versions.bump(category)
+        with self.lock:
+            for scope in [scope for scope in self.scopes if scope[0] == "*" or category in scope[0].split("+")]:
+                for entry_id in list(self.scopes[scope]):
+                    self._remove(entry_id)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.order),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Process-wide answer cache (created lazily)
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get the shared answer cache, or None when it is disabled"""
+    global _answer_cache
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            redis_connection = None
+            try:
+                from Queue.connection import queue_connection
+                if queue_connection.is_connected():
+                    redis_connection = queue_connection.redis_connection
+            except ImportError:
+                pass
+            if redis_connection is None:
+                print("⚠️ Valkey not available - cached answers are invalidated per process")
+            _answer_cache = SemanticAnswerCache(
+                settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                settings.ANSWER_CACHE_TTL_SECONDS,
+                settings.ANSWER_CACHE_MAX_ENTRIES,
+                CategoryVersions(redis_connection)
+            )
+    return _answer_cache
+
+
+async def aget_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Async get_answer_cache (the first call may wait for Valkey)"""
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    if _answer_cache is not None:
+        return _answer_cache
+    return await asyncio.to_thread(get_answer_cache)
@@ -0,0 +1,130 @@
+"""
+Content-addressed Blob Store
+
+Documents handed to background jobs are written once to BLOB_STORE_DIR
+(a local directory or a volume shared with the workers) under their
+SHA-256. RQ job arguments and Mongo tracking records only carry a small
+BlobRef, never the document itself, and identical uploads share a blob.
+
+Blobs are kept after processing so failed jobs can be retried; blobs
+that were not uploaded again within BLOB_TTL_SECONDS are pruned.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from fastapi import UploadFile
+from typing_extensions import TypedDict
+from app.core.config import settings
+from app.services.upload_service import spool_text, spool_upload
+
+
+class BlobRef(TypedDict):
+    """Reference to a stored blob (what goes into job payloads)"""
+    sha256: str
+    size: int
+    extension: str
+
+
+class BlobNotFoundError(FileNotFoundError):
+    """Raised when a referenced blob is not in the store"""
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Blobs stored as <root>/<sha[:2]>/<sha><extension>"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def path_for(self, ref: BlobRef) -> str:
+        """Path of a blob in the store"""
+        sha256 = ref["sha256"]
+        if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+            raise ValueError(f"Invalid blob hash: {sha256}")
+        if ref["extension"] not in settings.SUPPORTED_FILE_TYPES:
+            raise ValueError(f"Unsupported blob extension: {ref['extension']}")
+        return os.path.join(self.root, sha256[:2], f"{sha256}{ref['extension']}")
+
+    def open_path(self, ref: BlobRef) -> str:
+        """Path of a blob that must exist (raises BlobNotFoundError otherwise)"""
+        path = self.path_for(ref)
+        if not os.path.exists(path):
+            raise BlobNotFoundError(f"Blob {ref['sha256']} not found in {self.root}")
+        return path
+
+    def _commit(self, spool_path: str, sha256: str, extension: str) -> BlobRef:
+        """Move a fully written spool file to its content address"""
+        ref: BlobRef = {"sha256": sha256, "size": os.path.getsize(spool_path), "extension": extension}
+        path = self.path_for(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            # Same content already stored - keep one copy and refresh its age
+            os.unlink(spool_path)
+            os.utime(path)
+        else:
+            os.replace(spool_path, path)
+        return ref
+
+    async def put_upload(self, file: UploadFile) -> BlobRef:
+        """Stream an upload into the store, hashing it while it is written"""
+        digest = hashlib.sha256()
+        spool_path = await spool_upload(file, directory=self.tmp_dir, digest=digest)
+        try:
+            return self._commit(spool_path, digest.hexdigest(), Path(spool_path).suffix)
+        except BaseException:
+            if os.path.exists(spool_path):
+                os.unlink(spool_path)
+            raise
+
+    def put_text(self, content: str, filename: str) -> BlobRef:
+        """Store a document submitted as a string"""
+        spool_path = spool_text(content, filename, directory=self.tmp_dir)
+        try:
+            return self._commit(spool_path, _sha256_file(spool_path), Path(spool_path).suffix)
+        except BaseException:
+            if os.path.exists(spool_path):
+                os.unlink(spool_path)
+            raise
+
+    def prune(self, max_age: Optional[float] = None) -> int:
+        """
+        Remove blobs (and abandoned spool files) older than max_age seconds
+
+        Returns:
+            int: Number of files removed
+        """
+        max_age = settings.BLOB_TTL_SECONDS if max_age is None else max_age
+        cutoff = time.time() - max_age
+        removed = 0
+        if not os.path.isdir(self.root):
+            return 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+# Global blob store instance
+blob_store = BlobStore(settings.BLOB_STORE_DIR)
+
+
+def get_blob_store() -> BlobStore:
+    """Get the blob store shared with the workers"""
+    return blob_store
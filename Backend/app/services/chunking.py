@@ -0,0 +1,103 @@
+"""
+Streaming Chunker
+
+Splits a document into overlapping chunks while its pages are still being
+extracted, so the whole document never has to be held as one string.
+
+Pages are appended to a bounded buffer (joined with the same separator
+the PDF extractor uses). Whenever the buffer outgrows the window, it is
+split with the regular RecursiveCharacterTextSplitter and the chunks that
+end well before the tail of the buffer are emitted. The buffer then
+restarts at the first chunk that was held back, which keeps the overlap
+between consecutive chunks intact.
+"""
+
+import bisect
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.config import settings
+from app.services.pdf_extraction import PAGE_SEPARATOR
+
+
+class StreamingChunker:
+    """Incremental text splitter that tags chunks with their page and absolute offset"""
+
+    def __init__(self, chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None,
+                 window: Optional[int] = None, metadata: Optional[Dict] = None):
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE
+        chunk_overlap = settings.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+        )
+        self.window = window or self.chunk_size * 8
+        self.metadata = metadata or {}
+
+        self.buffer = ""
+        # Absolute offset of buffer[0] in the document
+        self.buffer_start = 0
+        # Characters seen so far (length of the document once finished)
+        self.length = 0
+        self.page_offsets: List[int] = []
+
+    def feed(self, text: str, new_page: bool = True) -> List[Document]:
+        """
+        Add text to the document
+
+        Args:
+            text (str): Page text, or a block continuing the current page
+            new_page (bool): Whether text starts a new page
+
+        Returns:
+            List[Document]: Chunks that are complete
+        """
+        if new_page:
+            if self.length:
+                self.buffer += PAGE_SEPARATOR
+                self.length += len(PAGE_SEPARATOR)
+            self.page_offsets.append(self.length)
+        self.buffer += text
+        self.length += len(text)
+
+        if len(self.buffer) < self.window:
+            return []
+        return self._split(final=False)
+
+    def finish(self) -> List[Document]:
+        """Emit the remaining chunks at the end of the document"""
+        return self._split(final=True)
+
+    def _split(self, final: bool) -> List[Document]:
+        docs = self.splitter.create_documents([self.buffer])
+        if not final:
+            # Chunks ending within a chunk_size of the tail may still grow
+            limit = len(self.buffer) - self.chunk_size
+            ready = 0
+            while ready < len(docs) and docs[ready].metadata["start_index"] + len(docs[ready].page_content) <= limit:
+                ready += 1
+            if ready == 0 or ready == len(docs):
+                return []
+            keep_from = docs[ready].metadata["start_index"]
+            docs = docs[:ready]
+        else:
+            keep_from = len(self.buffer)
+
+        for doc in docs:
+            start_index = self.buffer_start + doc.metadata["start_index"]
+            doc.metadata = {
+                **self.metadata,
+                "start_index": start_index,
+                "page": bisect.bisect_right(self.page_offsets, start_index)
+            }
+
+        self.buffer = self.buffer[keep_from:]
+        self.buffer_start += keep_from
+        return docs
+
+
+def iter_chunks(pieces: Iterable[Tuple[str, bool]], chunker: Optional[StreamingChunker] = None) -> Iterator[Document]:
+    """Chunk a stream of (text, new_page) pieces lazily"""
+    chunker = chunker or StreamingChunker()
+    for text, new_page in pieces:
+        yield from chunker.feed(text, new_page)
+    yield from chunker.finish()
@@ -0,0 +1,216 @@
+"""
+Process-wide Client Registry
+
+Qdrant, embedding and Gemini clients (and the VECTOR_STORE_BACKEND vector
+store) are built once per process and reused, so requests keep HTTP
+keep-alive connections open instead of paying connection setup every time. Collection metadata is cached so
+queries do not fetch collection info on every call.
+
+The registry also owns the per-downstream concurrency limits of the async
+query path, so a burst of queries cannot open unbounded Qdrant searches or
+Gemini generations.
+
+The registry is started by the FastAPI lifespan and by the RQ worker.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
+from app.core.config import settings
+from app.services.embeddings import create_embeddings, embeddings_available
+from app.services.embedding_batcher import PRIORITY_INTERACTIVE
+from app.services.collections import create_collection_args, missing_indexes
+from app.services.vector_store import VectorStore, create_vector_store
+
+
+def _already_exists(error: UnexpectedResponse) -> bool:
+    """Whether create_collection lost a race with another process creating it"""
+    return error.status_code == 409
+
+
+class ClientRegistry:
+    """Lazily builds and caches long-lived clients"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._qdrant: Optional[QdrantClient] = None
+        self._async_qdrant: Optional[AsyncQdrantClient] = None
+        self._vector_backend: Optional[VectorStore] = None
+        self._embeddings: Dict[str, Embeddings] = {}
+        self._collection_info: Dict[str, Tuple[float, models.CollectionInfo]] = {}
+        self._generative_model = None
+        # Event loop -> {downstream: semaphore} (semaphores are bound to a loop)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return os.getenv('GEMINI_API_KEY')
+
+    def qdrant(self) -> QdrantClient:
+        """Shared sync Qdrant client (keeps its HTTP connection pool open)"""
+        with self.lock:
+            if self._qdrant is None:
+                self._qdrant = QdrantClient(url=settings.QDRANT_URL, timeout=settings.QDRANT_TIMEOUT)
+            return self._qdrant
+
+    def async_qdrant(self) -> AsyncQdrantClient:
+        """Shared async Qdrant client (use from the API event loop)"""
+        with self.lock:
+            if self._async_qdrant is None:
+                self._async_qdrant = AsyncQdrantClient(url=settings.QDRANT_URL, timeout=settings.QDRANT_TIMEOUT)
+            return self._async_qdrant
+
+    def vector_backend(self) -> VectorStore:
+        """Shared vector store of VECTOR_STORE_BACKEND (used by ingest and retrieval)"""
+        with self.lock:
+            if self._vector_backend is None:
+                self._vector_backend = create_vector_store(self)
+            return self._vector_backend
+
+    def embeddings_available(self) -> bool:
+        """Whether the configured embedding provider can be used (Gemini needs the API key)"""
+        return embeddings_available(self.api_key)
+
+    def embeddings(self, priority: str = PRIORITY_INTERACTIVE) -> Embeddings:
+        """Shared embeddings stack for a priority"""
+        with self.lock:
+            if priority not in self._embeddings:
+                self._embeddings[priority] = create_embeddings(self.api_key, priority)
+            return self._embeddings[priority]
+
+    def generative_model(self):
+        """Shared Gemini model, or None without an API key"""
+        with self.lock:
+            if self._generative_model is None and self.api_key:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._generative_model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            return self._generative_model
+
+    @staticmethod
+    def _concurrency_limit(downstream: str) -> int:
+        limits = {"qdrant": settings.QDRANT_MAX_CONCURRENCY, "gemini": settings.GEMINI_MAX_CONCURRENCY}
+        if downstream not in limits:
+            raise ValueError(f"Unknown downstream: {downstream}")
+        return limits[downstream]
+
+    def semaphore(self, downstream: str) -> asyncio.Semaphore:
+        """Concurrency limit for async calls to a downstream ("qdrant" or "gemini")"""
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        if downstream not in semaphores:
+            semaphores[downstream] = asyncio.Semaphore(self._concurrency_limit(downstream))
+        return semaphores[downstream]
+
+    def collection_info(self, collection_name: str) -> Optional[models.CollectionInfo]:
+        """Collection info, cached for COLLECTION_INFO_TTL seconds (None if missing)"""
+        cached = self._collection_info.get(collection_name)
+        if cached and time.monotonic() - cached[0] < settings.COLLECTION_INFO_TTL:
+            return cached[1]
+
+        client = self.qdrant()
+        if not client.collection_exists(collection_name):
+            return None
+        info = client.get_collection(collection_name)
+        self._collection_info[collection_name] = (time.monotonic(), info)
+        return info
+
+    async def acollection_info(self, collection_name: str) -> Optional[models.CollectionInfo]:
+        """Async collection_info"""
+        cached = self._collection_info.get(collection_name)
+        if cached and time.monotonic() - cached[0] < settings.COLLECTION_INFO_TTL:
+            return cached[1]
+
+        client = self.async_qdrant()
+        if not await client.collection_exists(collection_name):
+            return None
+        info = await client.get_collection(collection_name)
+        self._collection_info[collection_name] = (time.monotonic(), info)
+        return info
+
+    def invalidate_collection(self, collection_name: str):
+        """Forget cached metadata for a collection"""
+        with self.lock:
+            self._collection_info.pop(collection_name, None)
+
+    def ensure_collection(self, collection_name: str, vector_size: int):
+        """
+        Create the collection (provisioned from the settings) and its payload indexes if missing
+
+        Concurrent first ingests may both try to create the collection; the
+        one that finds it already created goes on with the existing one.
+        """
+        info = self.collection_info(collection_name)
+        if info is None:
+            try:
+                self.qdrant().create_collection(
+                    collection_name=collection_name, **create_collection_args(vector_size)
+                )
+            except UnexpectedResponse as e:
+                if not _already_exists(e):
+                    raise
+            self.invalidate_collection(collection_name)
+            info = self.collection_info(collection_name)
+        missing = missing_indexes(info)
+        for field, kind in missing.items():
+            self.qdrant().create_payload_index(collection_name, field_name=field, field_schema=kind)
+        if missing:
+            self.invalidate_collection(collection_name)
+
+    async def aensure_collection(self, collection_name: str, vector_size: int):
+        """Async ensure_collection"""
+        info = await self.acollection_info(collection_name)
+        if info is None:
+            try:
+                await self.async_qdrant().create_collection(
+                    collection_name=collection_name, **create_collection_args(vector_size)
+                )
+            except UnexpectedResponse as e:
+                if not _already_exists(e):
+                    raise
+            self.invalidate_collection(collection_name)
+            info = await self.acollection_info(collection_name)
+        missing = missing_indexes(info)
+        for field, kind in missing.items():
+            await self.async_qdrant().create_payload_index(collection_name, field_name=field, field_schema=kind)
+        if missing:
+            self.invalidate_collection(collection_name)
+
+    def startup(self):
+        """Build the clients up front so the first request does not pay for it"""
+        self.vector_backend().startup()
+        if self.embeddings_available():
+            self.embeddings(PRIORITY_INTERACTIVE)
+        self.generative_model()
+
+    def close(self):
+        """Close the sync clients"""
+        with self.lock:
+            if self._qdrant is not None:
+                self._qdrant.close()
+                self._qdrant = None
+            if self._vector_backend is not None:
+                self._vector_backend.close()
+                self._vector_backend = None
+
+    async def aclose(self):
+        """Close all clients (async client included)"""
+        if self._async_qdrant is not None:
+            await self._async_qdrant.close()
+            self._async_qdrant = None
+        self.close()
+
+
+# Global client registry instance
+client_registry = ClientRegistry()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Get the process-wide client registry"""
+    return client_registry
@@ -0,0 +1,245 @@
+"""
+Collection Provisioning
+
+Collections are created from the declarative QDRANT_* settings (HNSW graph
+parameters, on-disk storage, scalar or binary quantization) instead of the
+Qdrant defaults. Provisioning an existing collection compares its config
+with the settings and applies only the difference through
+update_collection; Qdrant rebuilds the index in the background. The vector
+size and distance cannot be migrated in place and are reported as errors.
+
+search_params() builds the matching search-time parameters (hnsw_ef,
+exact search, rescoring and oversampling of quantized candidates).
+
+VECTOR_STORAGE_MODE decides where a category lives: its own collection
+("per_category") or one shared collection filtered on the indexed
+metadata.category payload ("shared").
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from qdrant_client import QdrantClient, models
+from app.core.config import settings
+from app.services.lexical import has_lexical_index, sparse_vectors_config
+from app.services.vector_index import PAYLOAD_INDEXES
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+STORAGE_MODES = ("per_category", "shared")
+
+# Category values that mean "search every category" ("category" was the old default)
+ALL_CATEGORIES = ("", "all", "category")
+
+Quantization = Union[models.ScalarQuantization, models.BinaryQuantization]
+
+
+class CollectionConfigError(ValueError):
+    """Raised when a collection cannot be migrated to the settings in place"""
+
+
+def shared_storage() -> bool:
+    """Whether all categories are stored in SHARED_COLLECTION_NAME"""
+    mode = settings.VECTOR_STORAGE_MODE.lower()
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"VECTOR_STORAGE_MODE must be one of {STORAGE_MODES}, got {mode!r}")
+    return mode == "shared"
+
+
+def resolve_categories(category: Union[str, Sequence[str], None]) -> Optional[Tuple[str, ...]]:
+    """
+    Validated categories of a query, or None for all categories
+
+    Accepts one category, a comma-separated string or a list of categories
+    ("contracts,policy", ["contracts", "policy"]); the result is sorted and
+    deduplicated, so equal selections share answer cache entries.
+    """
+    if category is None:
+        return None
+    values = category.split(",") if isinstance(category, str) else list(category)
+    categories = set()
+    for value in values:
+        value = value.strip().lower()
+        if value in ALL_CATEGORIES:
+            return None
+        if value not in settings.DOCUMENT_CATEGORIES:
+            raise ValueError(f"Unknown category '{value}', expected one of {settings.DOCUMENT_CATEGORIES} or 'all'")
+        categories.add(value)
+    if not categories or categories >= set(settings.DOCUMENT_CATEGORIES):
+        return None
+    return tuple(sorted(categories))
+
+
+def categories_label(categories: Optional[Sequence[str]]) -> str:
+    """Readable name of a category selection ("contracts+policy", or "all")"""
+    return "+".join(categories) if categories else "all"
+
+
+def collection_for(category: str) -> str:
+    """Collection the documents of a category are stored in"""
+    return settings.SHARED_COLLECTION_NAME if shared_storage() else category
+
+
+def storage_collections() -> List[str]:
+    """Every collection documents are stored in"""
+    if shared_storage():
+        return [settings.SHARED_COLLECTION_NAME]
+    return list(settings.DOCUMENT_CATEGORIES)
+
+
+def hnsw_config() -> models.HnswConfigDiff:
+    """HNSW graph parameters from the settings"""
+    return models.HnswConfigDiff(
+        m=settings.QDRANT_HNSW_M,
+        ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+        on_disk=settings.QDRANT_HNSW_ON_DISK
+    )
+
+
+def quantization_config() -> Optional[Quantization]:
+    """Quantization config from the settings (None when disabled)"""
+    mode = settings.QDRANT_QUANTIZATION.lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"QDRANT_QUANTIZATION must be one of {QUANTIZATION_MODES}, got {mode!r}")
+    if mode == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=settings.QDRANT_SCALAR_QUANTILE,
+            always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+            always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    return None
+
+
+def create_collection_args(vector_size: int) -> Dict:
+    """Keyword arguments for create_collection"""
+    return {
+        "vectors_config": models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=settings.QDRANT_VECTORS_ON_DISK
+        ),
+        "hnsw_config": hnsw_config(),
+        "quantization_config": quantization_config(),
+        # BM25 sparse vectors for hybrid search (cannot be added to an existing collection)
+        "sparse_vectors_config": sparse_vectors_config() if settings.HYBRID_SEARCH_ENABLED else None
+    }
+
+
+def missing_indexes(info: Optional[models.CollectionInfo]) -> Dict[str, models.PayloadSchemaType]:
+    """Payload indexes the collection does not have yet"""
+    schema = (info.payload_schema or {}) if info is not None else {}
+    return {field: kind for field, kind in PAYLOAD_INDEXES.items() if field not in schema}
+
+
+def _quantization_key(config) -> Tuple:
+    """Comparable summary of a quantization config"""
+    if isinstance(config, models.ScalarQuantization):
+        return ("scalar", config.scalar.quantile, bool(config.scalar.always_ram))
+    if isinstance(config, models.BinaryQuantization):
+        return ("binary", bool(config.binary.always_ram))
+    if config is None or config == models.Disabled.DISABLED:
+        return ("none",)
+    return (type(config).__name__,)
+
+
+def config_changes(info: models.CollectionInfo, vector_size: Optional[int] = None) -> Dict:
+    """
+    update_collection arguments that bring a collection in line with the settings
+
+    Args:
+        info (models.CollectionInfo): Current collection info
+        vector_size (Optional[int]): Expected vector size (not checked if None)
+
+    Returns:
+        Dict: Keyword arguments for update_collection (empty when up to date)
+    """
+    vectors = info.config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors.get("")
+    if vectors is None:
+        raise CollectionConfigError("Collection has no unnamed dense vector")
+    if vector_size is not None and vectors.size != vector_size:
+        raise CollectionConfigError(
+            f"Vector size is {vectors.size}, expected {vector_size} (re-ingest into a new collection)"
+        )
+    if vectors.distance != models.Distance.COSINE:
+        raise CollectionConfigError(f"Distance is {vectors.distance}, expected Cosine")
+
+    changes = {}
+    if bool(vectors.on_disk) != settings.QDRANT_VECTORS_ON_DISK:
+        changes["vectors_config"] = {"": models.VectorParamsDiff(on_disk=settings.QDRANT_VECTORS_ON_DISK)}
+
+    current_hnsw = info.config.hnsw_config
+    wanted_hnsw = hnsw_config()
+    hnsw_diff = {
+        field: getattr(wanted_hnsw, field)
+        for field in ("m", "ef_construct", "on_disk")
+        if (getattr(current_hnsw, field) or False) != getattr(wanted_hnsw, field)
+    }
+    if hnsw_diff:
+        changes["hnsw_config"] = models.HnswConfigDiff(**hnsw_diff)
+
+    wanted_quantization = quantization_config()
+    if _quantization_key(info.config.quantization_config) != _quantization_key(wanted_quantization):
+        changes["quantization_config"] = wanted_quantization or models.Disabled.DISABLED
+    return changes
+
+
+def _result(collection_name: str, action: str, changes: List[str], lexical_index: bool) -> Dict:
+    return {"collection": collection_name, "action": action, "changes": changes, "lexical_index": lexical_index}
+
+
+def provision_collection(client: QdrantClient, collection_name: str,
+                         vector_size: Optional[int] = None, dry_run: bool = False) -> Dict:
+    """
+    Create a collection from the settings, or migrate an existing one to them
+
+    Returns:
+        Dict: collection, action ("created", "updated" or "unchanged"), the changed
+        settings and whether the collection has the BM25 index for hybrid search
+    """
+    if not client.collection_exists(collection_name):
+        if not dry_run:
+            client.create_collection(
+                collection_name=collection_name,
+                **create_collection_args(vector_size or settings.QDRANT_VECTOR_SIZE)
+            )
+            for field, kind in PAYLOAD_INDEXES.items():
+                client.create_payload_index(collection_name, field_name=field, field_schema=kind)
+        return _result(collection_name, "created", [], settings.HYBRID_SEARCH_ENABLED)
+
+    info = client.get_collection(collection_name)
+    changes = config_changes(info, vector_size)
+    indexes = missing_indexes(info)
+    if not dry_run:
+        if changes:
+            client.update_collection(collection_name=collection_name, **changes)
+        for field, kind in indexes.items():
+            client.create_payload_index(collection_name, field_name=field, field_schema=kind)
+    changed = list(changes) + [f"index:{field}" for field in indexes]
+    return _result(collection_name, "updated" if changed else "unchanged", changed, has_lexical_index(info))
+
+
+def search_params(hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                  rescore: Optional[bool] = None, oversampling: Optional[float] = None) -> models.SearchParams:
+    """
+    Search-time parameters, falling back to the QDRANT_SEARCH_* settings
+
+    Args:
+        hnsw_ef (Optional[int]): Candidate list size of the HNSW search (higher = better recall)
+        exact (Optional[bool]): Skip the index and scan all vectors
+        rescore (Optional[bool]): Re-rank quantized candidates with the original vectors
+        oversampling (Optional[float]): Fetch limit * oversampling quantized candidates before rescoring
+    """
+    quantization = None
+    if settings.QDRANT_QUANTIZATION.lower() != "none" or rescore is not None or oversampling is not None:
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.QDRANT_SEARCH_RESCORE if rescore is None else rescore,
+            oversampling=settings.QDRANT_SEARCH_OVERSAMPLING if oversampling is None else oversampling
+        )
+    return models.SearchParams(
+        hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF if hnsw_ef is None else hnsw_ef,
+        exact=settings.QDRANT_SEARCH_EXACT if exact is None else exact,
+        quantization=quantization
+    )
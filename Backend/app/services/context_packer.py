@@ -0,0 +1,220 @@
+"""
+Context Packer
+
+Chunks overlap by CHUNK_OVERLAP characters, so the top hits of a query
+often repeat each other, and neighbouring hits of one document are sent
+as separate passages. The packer turns the retrieval candidates into the
+prompt context:
+
+1. near-duplicates (same text, or dense vectors above
+   CONTEXT_DEDUP_SIMILARITY) are dropped;
+2. the remaining candidates are ordered by maximal marginal relevance
+   (the rank of their search score - the fused BM25 + dense rank of a
+   hybrid search - traded against dense similarity to what is already
+   selected, weighted by CONTEXT_MMR_LAMBDA);
+3. candidates are taken in that order while they fit CONTEXT_TOKEN_BUDGET,
+   counting only the text an overlapping chunk adds;
+4. overlapping or adjacent chunks of the same document are merged into one
+   passage.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from app.core.config import settings
+
+
+class Candidate:
+    """A retrieved chunk with its search score and dense vector (if fetched)"""
+
+    __slots__ = ("doc", "score", "vector")
+
+    def __init__(self, doc: Document, score: float, vector: Optional[Sequence[float]] = None):
+        self.doc = doc
+        self.score = score
+        self.vector = None
+        if vector is not None:
+            array = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(array)
+            self.vector = array / norm if norm else array
+
+    @property
+    def span(self) -> Optional[Tuple[str, int, int]]:
+        """(document_id, start, end) in the document text, if known"""
+        metadata = self.doc.metadata
+        if metadata.get("document_id") is None or metadata.get("start_index") is None:
+            return None
+        start = metadata["start_index"]
+        return metadata["document_id"], start, start + len(self.doc.page_content)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count of a text"""
+    return int(len(text) / settings.CONTEXT_CHARS_PER_TOKEN) + 1
+
+
+def _normalized_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def deduplicate(candidates: List[Candidate], threshold: float) -> List[Candidate]:
+    """Drop candidates with the same text as, or a near-identical vector to, a better one"""
+    kept: List[Candidate] = []
+    texts = set()
+    for candidate in candidates:
+        text = _normalized_text(candidate.doc.page_content)
+        if text in texts:
+            continue
+        if candidate.vector is not None and any(
+            other.vector is not None and float(candidate.vector @ other.vector) >= threshold for other in kept
+        ):
+            continue
+        texts.add(text)
+        kept.append(candidate)
+    return kept
+
+
+def rank_relevance(candidates: List[Candidate]) -> np.ndarray:
+    """
+    Relevance of each candidate from the rank of its search score, from 1.0
+    (best) down to 1/n
+
+    Ranks keep hybrid (RRF) and dense scores on the same 0-1 scale as the
+    cosine similarities MMR subtracts from them.
+    """
+    count = len(candidates)
+    relevance = np.empty(count, dtype=np.float32)
+    by_score = sorted(range(count), key=lambda i: candidates[i].score, reverse=True)
+    for rank, index in enumerate(by_score):
+        relevance[index] = (count - rank) / count
+    return relevance
+
+
+def mmr_order(candidates: List[Candidate], lambda_mult: float) -> List[Candidate]:
+    """
+    Candidates in maximal-marginal-relevance order
+
+    Relevance comes from the search scores (see rank_relevance), so the
+    lexical matches of a hybrid search keep their rank; the dense vectors
+    only measure redundancy. Without vectors the search order is kept.
+    """
+    if not candidates or any(c.vector is None for c in candidates):
+        return list(candidates)
+    vectors = np.stack([c.vector for c in candidates])
+    relevance = rank_relevance(candidates)
+    similarity = vectors @ vectors.T
+
+    order: List[int] = []
+    remaining = list(range(len(candidates)))
+    while remaining:
+        if order:
+            redundancy = similarity[np.ix_(remaining, order)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        order.append(best)
+        remaining.remove(best)
+    return [candidates[i] for i in order]
+
+
+def _added_chars(candidate: Candidate, selected: List[Candidate]) -> int:
+    """Characters a candidate adds to the passages already selected"""
+    span = candidate.span
+    length = len(candidate.doc.page_content)
+    if span is None:
+        return length
+    document_id, start, end = span
+    # Selected chunks overlap each other too, so count the union of their overlaps
+    overlaps = sorted(
+        (max(start, other.span[1]), min(end, other.span[2]))
+        for other in selected
+        if other.span and other.span[0] == document_id and other.span[1] < end and start < other.span[2]
+    )
+    covered = 0
+    covered_to = start
+    for overlap_start, overlap_end in overlaps:
+        covered += max(0, overlap_end - max(overlap_start, covered_to))
+        covered_to = max(covered_to, overlap_end)
+    return max(length - covered, 0)
+
+
+def _merge(group: List[Candidate]) -> Document:
+    """One passage from overlapping/adjacent chunks of a document (in text order)"""
+    group = sorted(group, key=lambda c: c.span[1])
+    text = group[0].doc.page_content
+    end = group[0].span[2]
+    for candidate in group[1:]:
+        _, start, candidate_end = candidate.span
+        if candidate_end > end:
+            text += candidate.doc.page_content[end - start:]
+            end = candidate_end
+    metadata = dict(group[0].doc.metadata)
+    pages = sorted({c.doc.metadata.get("page") for c in group if c.doc.metadata.get("page") is not None})
+    if len(pages) > 1:
+        metadata["page"] = f"{pages[0]}-{pages[-1]}"
+    metadata["chunks"] = len(group)
+    return Document(page_content=text, metadata=metadata)
+
+
+def merge_passages(selected: List[Candidate]) -> List[Document]:
+    """
+    Merge overlapping or adjacent chunks of a document
+
+    Passages keep the order of their best (first selected) chunk.
+    """
+    passages: List[List[Candidate]] = []
+    for candidate in selected:
+        span = candidate.span
+        target = None
+        if span is not None:
+            for passage in passages:
+                if any(
+                    other.span and other.span[0] == span[0]
+                    and span[1] <= other.span[2] and other.span[1] <= span[2]
+                    for other in passage
+                ):
+                    if target is None:
+                        target = passage
+                        passage.append(candidate)
+                    else:
+                        # The chunk bridges two passages
+                        target.extend(passage)
+                        passage.clear()
+        if target is None:
+            passages.append([candidate])
+    return [
+        _merge(passage) if len(passage) > 1 else passage[0].doc
+        for passage in passages if passage
+    ]
+
+
+def pack_context(candidates: List[Candidate], token_budget: Optional[int] = None) -> List[Document]:
+    """
+    Passages for the prompt: deduplicated, MMR-ordered, within the token budget and merged
+
+    Args:
+        candidates (List[Candidate]): Retrieved chunks, best first
+        token_budget (Optional[int]): Token budget of the context (CONTEXT_TOKEN_BUDGET by default)
+    """
+    budget = (token_budget or settings.CONTEXT_TOKEN_BUDGET) * settings.CONTEXT_CHARS_PER_TOKEN
+    candidates = deduplicate(candidates, settings.CONTEXT_DEDUP_SIMILARITY)
+    selected: List[Candidate] = []
+    used = 0
+    for candidate in mmr_order(candidates, settings.CONTEXT_MMR_LAMBDA):
+        added = _added_chars(candidate, selected)
+        if used + added > budget:
+            continue  # A shorter (or more overlapping) candidate may still fit
+        selected.append(candidate)
+        used += added
+    return merge_passages(selected)
+
+
+def packing_stats(candidates: List[Candidate], passages: List[Document]) -> Dict[str, int]:
+    """Prompt tokens before and after packing (for logging)"""
+    return {
+        "candidates": len(candidates),
+        "passages": len(passages),
+        "tokens_before": sum(estimate_tokens(c.doc.page_content) for c in candidates),
+        "tokens_after": sum(estimate_tokens(p.page_content) for p in passages)
+    }
@@ -0,0 +1,251 @@
+"""
+Local Document Classifier
+
+Multinomial naive Bayes over TF-IDF weighted terms, trained from the
+documents already stored in the category collections. The decision node
+asks it first and only escalates to Gemini when its confidence is below
+CLASSIFIER_CONFIDENCE_THRESHOLD, which removes the LLM round trip from
+most uploads.
+
+The model is a small JSON file written by train_classifier.py; the API
+and the worker reload it when the file changes.
+"""
+
+import json
+import math
+import os
+import random
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.services.collections import collection_for, shared_storage
+from app.services.vector_index import scope_filter
+from app.services.vector_store import VectorStore
+
+_TOKEN_RE = re.compile(r"[a-z][a-z]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens over the classifier window of the text"""
+    return _TOKEN_RE.findall(text[:settings.CLASSIFIER_MAX_CHARS].lower())
+
+
+class NaiveBayesClassifier:
+    """
+    Multinomial naive Bayes on log-scaled, IDF weighted, length normalized
+    term frequencies
+
+    Normalizing each document to unit length keeps long documents from
+    saturating the posterior, so the confidence is usable as a threshold.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.labels: List[str] = []
+        self.idf: Dict[str, float] = {}
+        self.priors: Dict[str, float] = {}
+        self.log_probs: Dict[str, Dict[str, float]] = {}
+        self.unseen: Dict[str, float] = {}
+
+    def _weights(self, tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(token for token in tokens if token in self.idf)
+        weights = {term: (1 + math.log(count)) * self.idf[term] for term, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return {term: w / norm for term, w in weights.items()} if norm else {}
+
+    def fit(self, texts: List[str], labels: List[str], min_df: int = 1) -> "NaiveBayesClassifier":
+        """Train on documents and their category labels"""
+        if len(set(labels)) < 2:
+            raise ValueError("Training needs documents from at least two categories")
+
+        documents = [tokenize(text) for text in texts]
+        df = Counter(term for tokens in documents for term in set(tokens))
+        total = len(documents)
+        self.idf = {
+            term: math.log((1 + total) / (1 + count)) + 1
+            for term, count in df.items() if count >= min_df
+        }
+
+        self.labels = sorted(set(labels))
+        label_counts = Counter(labels)
+        self.priors = {label: math.log(label_counts[label] / total) for label in self.labels}
+
+        term_weights: Dict[str, Dict[str, float]] = {label: defaultdict(float) for label in self.labels}
+        for tokens, label in zip(documents, labels):
+            for term, weight in self._weights(tokens).items():
+                term_weights[label][term] += weight
+
+        vocabulary_size = len(self.idf)
+        self.log_probs = {}
+        for label in self.labels:
+            denominator = sum(term_weights[label].values()) + self.alpha * vocabulary_size
+            self.log_probs[label] = {
+                term: math.log((weight + self.alpha) / denominator)
+                for term, weight in term_weights[label].items()
+            }
+            self.unseen[label] = math.log(self.alpha / denominator)
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Posterior probability of each category"""
+        weights = self._weights(tokenize(text))
+        scores = {}
+        for label in self.labels:
+            log_probs, unseen = self.log_probs[label], self.unseen[label]
+            scores[label] = self.priors[label] + sum(
+                weight * log_probs.get(term, unseen) for term, weight in weights.items()
+            )
+        top = max(scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {label: score / total for label, score in exp_scores.items()}
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Most likely category and its probability"""
+        probabilities = self.predict_proba(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def to_dict(self) -> Dict:
+        return {
+            "alpha": self.alpha,
+            "labels": self.labels,
+            "idf": self.idf,
+            "priors": self.priors,
+            "log_probs": self.log_probs,
+            "unseen": self.unseen
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NaiveBayesClassifier":
+        classifier = cls(alpha=data["alpha"])
+        classifier.labels = data["labels"]
+        classifier.idf = data["idf"]
+        classifier.priors = data["priors"]
+        classifier.log_probs = data["log_probs"]
+        classifier.unseen = data["unseen"]
+        return classifier
+
+    def save(self, path: str):
+        """Write the model atomically so a running API never reads half a file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesClassifier":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_training_samples(store: VectorStore, categories: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Rebuild one training text per stored document from its chunks
+
+    Chunks are grouped by metadata.document_id and ordered by start_index.
+    Chunks stored without a document ID become samples on their own. In
+    shared storage mode the category's chunks are selected by payload.
+    """
+    texts, labels = [], []
+    for category in categories:
+        collection_name = collection_for(category)
+        if not store.collection_exists(collection_name):
+            continue
+        # Per-category collections hold only that category (older chunks have no category field)
+        category_filter = scope_filter([category]) if shared_storage() else None
+        documents: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        payloads = store.payloads(
+            collection_name, category_filter, ["page_content", "metadata.document_id", "metadata.start_index"]
+        )
+        for point_id, payload in payloads.items():
+            metadata = payload.get("metadata") or {}
+            document_id = metadata.get("document_id") or point_id
+            documents[document_id].append((metadata.get("start_index") or 0, payload.get("page_content", "")))
+
+        for chunks in documents.values():
+            texts.append(" ".join(text for _, text in sorted(chunks))[:settings.CLASSIFIER_MAX_CHARS])
+            labels.append(category)
+    return texts, labels
+
+
+def evaluate(texts: List[str], labels: List[str], folds: int = 5,
+             threshold: Optional[float] = None, seed: int = 0) -> Dict[str, object]:
+    """
+    Stratified k-fold cross-validation
+
+    Reports overall accuracy, the share of documents the classifier would
+    answer locally at the threshold (coverage) and the accuracy on those.
+    """
+    threshold = settings.CLASSIFIER_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    by_label: Dict[str, List[int]] = defaultdict(list)
+    for index, label in enumerate(labels):
+        by_label[label].append(index)
+    folds = max(2, min(folds, min(len(indices) for indices in by_label.values())))
+
+    rng = random.Random(seed)
+    fold_of = {}
+    for indices in by_label.values():
+        indices = indices[:]
+        rng.shuffle(indices)
+        for position, index in enumerate(indices):
+            fold_of[index] = position % folds
+
+    correct = confident = confident_correct = 0
+    per_label = {label: {"documents": 0, "correct": 0} for label in by_label}
+    for fold in range(folds):
+        train = [i for i in range(len(texts)) if fold_of[i] != fold]
+        test = [i for i in range(len(texts)) if fold_of[i] == fold]
+        classifier = NaiveBayesClassifier().fit([texts[i] for i in train], [labels[i] for i in train])
+        for i in test:
+            predicted, confidence = classifier.classify(texts[i])
+            hit = predicted == labels[i]
+            correct += hit
+            per_label[labels[i]]["documents"] += 1
+            per_label[labels[i]]["correct"] += hit
+            if confidence >= threshold:
+                confident += 1
+                confident_correct += hit
+
+    total = len(texts)
+    return {
+        "documents": total,
+        "folds": folds,
+        "threshold": threshold,
+        "accuracy": round(correct / total, 4),
+        "coverage": round(confident / total, 4),
+        "confident_accuracy": round(confident_correct / confident, 4) if confident else None,
+        "per_category": per_label
+    }
+
+
+# Process-wide classifier, reloaded when the model file changes
+_classifier: Optional[NaiveBayesClassifier] = None
+_classifier_mtime: Optional[float] = None
+_classifier_lock = threading.Lock()
+
+
+def get_document_classifier() -> Optional[NaiveBayesClassifier]:
+    """Get the trained local classifier, or None when disabled or not trained yet"""
+    global _classifier, _classifier_mtime
+    if not settings.CLASSIFIER_ENABLED:
+        return None
+    try:
+        mtime = os.path.getmtime(settings.CLASSIFIER_MODEL_PATH)
+    except OSError:
+        return None
+
+    with _classifier_lock:
+        if mtime != _classifier_mtime:
+            try:
+                _classifier = NaiveBayesClassifier.load(settings.CLASSIFIER_MODEL_PATH)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Could not load document classifier: {e}")
+                _classifier = None
+            _classifier_mtime = mtime
+    return _classifier
@@ -1,24 +1,273 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
-import tempfile
+import asyncio
 from pathlib import Path
-from typing import Dict
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import Executor
 from fastapi import UploadFile
 from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.document_loaders import TextLoader
+from qdrant_client import models
+from app.core.config import settings
+from app.core.executors import get_process_pool
+from app.services.upload_service import spool_upload
+from app.services.clients import ClientRegistry, get_client_registry
+from app.services.embedding_batcher import PRIORITY_BULK
+from app.services.pdf_extraction import (
+    PAGE_SEPARATOR, ExtractedText, extract_pdf, iter_pdf_pages, aiter_pdf_pages
+)
+from app.services.chunking import StreamingChunker, iter_chunks
+from app.services.doc_classifier import get_document_classifier
+from app.services.collections import collection_for, storage_collections
+from app.services.answer_cache import get_answer_cache
+from app.services.vector_index import IngestPlan, default_document_id
 
 # Load environment variables
 load_dotenv()
 
+# Characters of a TXT file read per block when streaming
+TEXT_BLOCK_SIZE = 64 * 1024
+# Pages extracted per step while reading the classification preview
+PREVIEW_PAGES_PER_SHARD = 4
+
+
 class State(TypedDict):
     file_path: str
-    content: str
+    # Leading text used for classification; the full text is never held in the state
+    preview: str
+    content_length: int
     category: str
+    engine: Optional[str]
+    document_id: Optional[str]
+    # Tenant owning the document (stored on every chunk for filtered search)
+    user_id: Optional[str]
+    ingest: Dict[str, int]
+    # Why the document was not (fully) stored, if it was not
+    error: Optional[str]
+
+
+def load_text(file_path: str, executor: Optional[Executor] = None,
+              engine: Optional[str] = None) -> ExtractedText:
+    """
+    Extract the text of a PDF/TXT file.
+
+    PDF pages are extracted in parallel shards when an executor is given,
+    using the named PDF engine (settings.PDF_ENGINE by default).
+    """
+    ext = Path(file_path).suffix.lower()
+    if ext == ".pdf":
+        return extract_pdf(file_path, executor, engine=engine)
+
+    elif ext == ".txt":
+        loader = TextLoader(file_path)
+        docs = loader.load()
+        text = " ".join([d.page_content for d in docs])
+        return {"text": text, "page_offsets": [0]}
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+def iter_pieces(file_path: str, executor: Optional[Executor] = None, engine: Optional[str] = None,
+                pages_per_shard: Optional[int] = None) -> Iterator[Tuple[str, bool]]:
+    """
+    Stream a PDF/TXT file as (text, new_page) pieces
+
+    PDFs yield one piece per page, parsed in shards ahead of the consumer
+    when an executor is given. TXT files are a single page read in blocks.
+    """
+    ext = Path(file_path).suffix.lower()
+    if ext == ".pdf":
+        for page_text in iter_pdf_pages(file_path, executor, pages_per_shard, engine):
+            yield page_text, True
+    elif ext == ".txt":
+        with open(file_path, encoding="utf-8") as f:
+            new_page = True
+            for block in iter(lambda: f.read(TEXT_BLOCK_SIZE), ""):
+                yield block, new_page
+                new_page = False
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+async def aiter_pieces(file_path: str, executor: Optional[Executor],
+                       engine: Optional[str] = None) -> AsyncIterator[Tuple[str, bool]]:
+    """Async iter_pieces - parsing and file reads stay off the event loop"""
+    ext = Path(file_path).suffix.lower()
+    if ext == ".pdf":
+        async for page_text in aiter_pdf_pages(file_path, executor, engine=engine):
+            yield page_text, True
+    elif ext == ".txt":
+        loop = asyncio.get_running_loop()
+        with open(file_path, encoding="utf-8") as f:
+            new_page = True
+            while True:
+                block = await loop.run_in_executor(None, f.read, TEXT_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block, new_page
+                new_page = False
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+def read_preview(file_path: str, engine: Optional[str] = None, max_chars: Optional[int] = None) -> str:
+    """Leading text of a document (first pages only) for classification"""
+    max_chars = max_chars or max(settings.CLASSIFIER_MAX_CHARS, 2000)
+    parts, length = [], 0
+    pieces = iter_pieces(file_path, engine=engine, pages_per_shard=PREVIEW_PAGES_PER_SHARD)
+    try:
+        for text, new_page in pieces:
+            if new_page and parts:
+                parts.append(PAGE_SEPARATOR)
+            parts.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+    finally:
+        pieces.close()
+    return "".join(parts)[:max_chars]
+
+
+class VectorWriter:
+    """
+    Embeds and upserts the chunks of one document batch by batch
+
+    Only chunks that are not stored yet are embedded (see IngestPlan). If
+    storage fails the document is still processed, just not stored, and
+    the error is kept for the processing result.
+    """
+
+    def __init__(self, registry: ClientRegistry, embeddings: Embeddings, collection_name: str, document_id: str,
+                 user_id: Optional[str] = None, other_collections: Sequence[str] = ()):
+        self.registry = registry
+        self.embeddings = embeddings
+        self.collection_name = collection_name
+        self.document_id = document_id
+        self.user_id = user_id
+        # Collections an earlier version may be in (per-category storage, if it was classified differently)
+        self.other_collections = list(other_collections)
+        self.moved_from: List[str] = []
+        self.moved_chunks = 0
+        self.plan: Optional[IngestPlan] = None
+        # Whether the collection takes BM25 vectors (known once it exists)
+        self.lexical: Optional[bool] = None
+        self.failed = False
+        self.error: Optional[str] = None
+
+    def _fail(self, error: Exception):
+        print(f"⚠️ Vector storage failed: {error}")
+        print("📝 Document processed but not stored in vector DB")
+        self.failed = True
+        self.error = f"Vector storage failed: {type(error).__name__}: {error}"
+
+    def write(self, split_docs: List[Document]):
+        if self.failed or not split_docs:
+            return
+        try:
+            store = self.registry.vector_backend()
+            if self.plan is None:
+                existing = {}
+                if store.collection_exists(self.collection_name):
+                    existing = store.existing_points(self.collection_name, self.document_id, self.user_id)
+                self.plan = IngestPlan(self.document_id, existing, self.user_id)
+
+            batch = self.plan.batch(split_docs)
+            if batch.new:
+                vectors = self.embeddings.embed_documents(batch.new_texts())
+                store.ensure_collection(self.collection_name, len(vectors[0]))
+                if self.lexical is None:
+                    self.lexical = store.lexical(self.collection_name)
+                for points in batch.upsert_batches(vectors, self.lexical):
+                    store.upsert(self.collection_name, points)
+            operations = batch.update_operations()
+            if operations:
+                store.update(self.collection_name, operations)
+        except Exception as e:
+            self._fail(e)
+
+    async def awrite(self, split_docs: List[Document]):
+        if self.failed or not split_docs:
+            return
+        try:
+            store = self.registry.vector_backend()
+            if self.plan is None:
+                existing = {}
+                if await store.acollection_exists(self.collection_name):
+                    existing = await store.aexisting_points(self.collection_name, self.document_id, self.user_id)
+                self.plan = IngestPlan(self.document_id, existing, self.user_id)
+
+            batch = self.plan.batch(split_docs)
+            if batch.new:
+                vectors = await self.embeddings.aembed_documents(batch.new_texts())
+                await store.aensure_collection(self.collection_name, len(vectors[0]))
+                if self.lexical is None:
+                    self.lexical = await store.alexical(self.collection_name)
+                for points in batch.upsert_batches(vectors, self.lexical):
+                    await store.aupsert(self.collection_name, points)
+            operations = batch.update_operations()
+            if operations:
+                await store.aupdate(self.collection_name, operations)
+        except Exception as e:
+            self._fail(e)
+
+    def _moved(self, collection_name: str, point_ids: List[str]) -> List:
+        """Delete operations for the chunks of an earlier version stored in another collection"""
+        if not point_ids:
+            return []
+        print(f"🧹 Removing {len(point_ids)} chunks of the previous version from '{collection_name}'")
+        self.moved_from.append(collection_name)
+        self.moved_chunks += len(point_ids)
+        return [models.DeleteOperation(delete=models.PointIdsList(points=point_ids))]
+
+    def _stats(self) -> Dict[str, int]:
+        stats = self.plan.stats()
+        stats["chunks_deleted"] += self.moved_chunks
+        print(f"✅ Document successfully stored in '{self.collection_name}' collection ({stats})")
+        return stats
+
+    def finish(self) -> Dict[str, int]:
+        """Delete stale chunks of the previous version and return the ingest stats"""
+        if self.failed or self.plan is None:
+            return {}
+        try:
+            store = self.registry.vector_backend()
+            operations = self.plan.finish_operations()
+            if operations:
+                store.update(self.collection_name, operations)
+            for collection_name in self.other_collections:
+                if store.collection_exists(collection_name):
+                    existing = store.existing_points(collection_name, self.document_id, self.user_id)
+                    operations = self._moved(collection_name, list(existing))
+                    if operations:
+                        store.update(collection_name, operations)
+        except Exception as e:
+            self._fail(e)
+            return {}
+        return self._stats()
+
+    async def afinish(self) -> Dict[str, int]:
+        """Async finish"""
+        if self.failed or self.plan is None:
+            return {}
+        try:
+            store = self.registry.vector_backend()
+            operations = self.plan.finish_operations()
+            if operations:
+                await store.aupdate(self.collection_name, operations)
+            for collection_name in self.other_collections:
+                if await store.acollection_exists(collection_name):
+                    existing = await store.aexisting_points(collection_name, self.document_id, self.user_id)
+                    operations = self._moved(collection_name, list(existing))
+                    if operations:
+                        await store.aupdate(collection_name, operations)
+        except Exception as e:
+            self._fail(e)
+            return {}
+        return self._stats()
+
 
 class DocumentService:
     """Service for handling document upload and processing - exact same logic as retrievel.py"""
@@ -26,10 +275,10 @@ class DocumentService:
     def __init__(self):
         # Configure Gemini AI with actual API key
         self.api_key = os.getenv('GEMINI_API_KEY')
+        # Long-lived Qdrant/Gemini clients shared by the whole process
+        self.registry = get_client_registry()
         if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.client = genai
-            self.model = genai.GenerativeModel("gemini-1.5-flash")
+            self.model = self.registry.generative_model()
             self.ai_enabled = True
         else:
             print("⚠️ GEMINI_API_KEY not found - using mock AI responses")
@@ -37,72 +286,119 @@ class DocumentService:
             self.ai_enabled = False
         
         # Create the workflow graph - exact same as original
-        self.graph = StateGraph(State)
-        self.graph.add_node("load_doc", self.load_doc)
-        self.graph.add_node("decision", self.decision)
-        self.graph.add_node("embed_and_store", self.embed_and_store)
-        
-        self.graph.set_entry_point("load_doc")
-        self.graph.add_edge("load_doc", "decision")
-        self.graph.add_edge("decision", "embed_and_store")
-        self.graph.add_edge("embed_and_store", END)
-        
+        self.graph = self._build_graph(self.load_doc, self.decision, self.embed_and_store)
         self.app = self.graph.compile()
+
+        # Same workflow with async nodes, used by the API so it never blocks the event loop
+        self.async_graph = self._build_graph(self.aload_doc, self.adecision, self.aembed_and_store)
+        self.async_app = self.async_graph.compile()
+
+    @staticmethod
+    def _build_graph(load_doc, decision, embed_and_store) -> StateGraph:
+        """Wire load_doc -> decision -> embed_and_store into a StateGraph"""
+        graph = StateGraph(State)
+        graph.add_node("load_doc", load_doc)
+        graph.add_node("decision", decision)
+        graph.add_node("embed_and_store", embed_and_store)
+        
+        graph.set_entry_point("load_doc")
+        graph.add_edge("load_doc", "decision")
+        graph.add_edge("decision", "embed_and_store")
+        graph.add_edge("embed_and_store", END)
+        return graph
     
-    async def process_uploaded_file(self, file: UploadFile) -> Dict[str, str]:
+    async def process_uploaded_file(self, file: UploadFile, engine: Optional[str] = None,
+                                    document_id: Optional[str] = None,
+                                    user_id: Optional[str] = None) -> Dict[str, str]:
         """
         Process an uploaded file using the exact same workflow as retrievel.py
         """
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        # Stream the upload to a spool file in fixed-size chunks
+        temp_file_path = await spool_upload(file)
         
         try:
-            # Initialize state
-            initial_state: State = {
-                "file_path": temp_file_path,
-                "content": "",
-                "category": ""
-            }
-            
-            # Process through the graph workflow
-            final_state = self.app.invoke(initial_state)
-            
-            return {
-                "file_path": temp_file_path,
-                "content_length": len(final_state["content"]),
-                "category": final_state["category"],
-                "status": "success"
-            }
-            
+            return await self.aprocess_file(temp_file_path, engine, document_id, user_id, filename=file.filename)
         finally:
             # Clean up temporary file
             if os.path.exists(temp_file_path):
                 os.unlink(temp_file_path)
+
+    @staticmethod
+    def _initial_state(file_path: str, engine: Optional[str], document_id: Optional[str],
+                       user_id: Optional[str] = None, filename: Optional[str] = None) -> State:
+        """
+        Initial graph state; document_id defaults to the file name (filename,
+        or the name of file_path), so re-uploading a revised file updates it
+        in place. Different files with the same name need explicit IDs.
+        """
+        document_id = document_id or default_document_id(filename or file_path)
+        return {
+            "file_path": file_path,
+            "preview": "",
+            "content_length": 0,
+            "category": "",
+            "engine": engine,
+            "document_id": document_id,
+            "user_id": user_id,
+            "ingest": {},
+            "error": None
+        }
+
+    async def aprocess_file(self, file_path: str, engine: Optional[str] = None,
+                            document_id: Optional[str] = None, user_id: Optional[str] = None,
+                            filename: Optional[str] = None) -> Dict[str, str]:
+        """Run a file on disk through the async graph workflow (filename: original name of an upload)"""
+        initial_state = self._initial_state(file_path, engine, document_id, user_id, filename)
+        final_state = await self.async_app.ainvoke(initial_state)
+        return self._result(final_state)
+
+    def process_file(self, file_path: str, engine: Optional[str] = None,
+                     document_id: Optional[str] = None, user_id: Optional[str] = None,
+                     filename: Optional[str] = None) -> Dict[str, str]:
+        """Run a file on disk through the sync graph workflow (used by the RQ worker)"""
+        initial_state = self._initial_state(file_path, engine, document_id, user_id, filename)
+        final_state = self.app.invoke(initial_state)
+        return self._result(final_state)
+
+    @staticmethod
+    def _result(final_state: State) -> Dict[str, str]:
+        """
+        Build the processing result from the final graph state
+
+        The status is "failed" (with the error) when the chunks were not
+        stored, so callers such as bulk_ingest.py retry the file.
+        """
+        result = {
+            "file_path": final_state["file_path"],
+            "content_length": final_state["content_length"],
+            "category": final_state["category"],
+            "document_id": final_state.get("document_id"),
+            **(final_state.get("ingest") or {}),
+            "status": "success"
+        }
+        if final_state.get("error"):
+            result.update({"status": "failed", "error": final_state["error"]})
+        return result
     
     def load_doc(self, state: State):
-        """Load document - exact same logic as original load_doc function"""
+        """
+        Load document - reads only the leading pages needed for classification;
+        the full text is streamed later by embed_and_store
+        """
         file_path = state["file_path"]
-        ext = Path(file_path).suffix.lower()
-        if ext == ".pdf":
-            loader = PyPDFLoader(file_path=file_path)
-            docs = loader.load()
-            text = " ".join([d.page_content for d in docs])
-
-        elif ext == ".txt":
-            loader = TextLoader(file_path)
-            docs = loader.load()
-            text = " ".join([d.page_content for d in docs])
-        else:
-            raise ValueError(f"Unsupported file type: {ext}")
-        
-        return {"file_path": file_path, "content": text, "category": ""}
+        preview = read_preview(file_path, state.get("engine"))
+        return {"file_path": file_path, "preview": preview, "category": ""}
 
-    def decision(self, state: State):
-        """Document categorization - exact same logic as original decision function"""
-        prompt = f"""You are a professional leader document classifier.
+    async def aload_doc(self, state: State):
+        """Async load_doc - parsing runs in the shared process pool"""
+        file_path = state["file_path"]
+        loop = asyncio.get_running_loop()
+        preview = await loop.run_in_executor(get_process_pool(), read_preview, file_path, state.get("engine"))
+        return {"file_path": file_path, "preview": preview, "category": ""}
+
+    def _classification_prompt(self, content: str) -> str:
+        """Build the classification prompt used by decision"""
+        return f"""You are a professional leader document classifier.
         check the document loaded by user belong to which category.
         For example:
         when user upload document related to  :
@@ -126,8 +422,47 @@ class DocumentService:
         In the same why various documents will be uploaded . you will categorize them as contracts or policy.
         
         Document content to classify:
-        {state['content'][:2000]}...
+        {content[:2000]}...
         """
+
+    def _mock_category(self, content: str) -> str:
+        """Keyword-based category used when AI is disabled"""
+        content_lower = content[:500].lower()
+        if any(word in content_lower for word in ['contract', 'agreement', 'employment', 'service', 'nda', 'rent']):
+            return "contracts"
+        elif any(word in content_lower for word in ['policy', 'refund', 'privacy', 'terms', 'warranty']):
+            return "policy"
+        return "contracts"  # default fallback
+
+    @staticmethod
+    def _local_category(content: str) -> Optional[str]:
+        """Category from the local classifier, or None when it is not confident enough"""
+        classifier = get_document_classifier()
+        if classifier is None:
+            return None
+        category, confidence = classifier.classify(content)
+        if confidence < settings.CLASSIFIER_CONFIDENCE_THRESHOLD:
+            print(f"🤔 Local classifier unsure ({category}, {confidence:.2f}) - asking Gemini")
+            return None
+        print(f"⚡ Classified locally as {category} ({confidence:.2f})")
+        return category
+
+    @staticmethod
+    def _normalize_category(category: str) -> str:
+        """Map the raw model answer onto a known category"""
+        if "contract" in category:
+            return "contracts"
+        elif "policy" in category:
+            return "policy"
+        return "unknown"
+
+    def decision(self, state: State):
+        """Document categorization - exact same logic as original decision function"""
+        category = self._local_category(state['preview'])
+        if category:
+            return {"file_path": state["file_path"], "category": category}
+
+        prompt = self._classification_prompt(state['preview'])
         
         if self.ai_enabled and self.model:
             # Use the model directly, not client.models
@@ -135,50 +470,123 @@ class DocumentService:
             category = response.candidates[0].content.parts[0].text.strip().lower()
         else:
             # Mock AI response for testing
-            content_lower = state['content'][:500].lower()
-            if any(word in content_lower for word in ['contract', 'agreement', 'employment', 'service', 'nda', 'rent']):
-                category = "contracts"
-            elif any(word in content_lower for word in ['policy', 'refund', 'privacy', 'terms', 'warranty']):
-                category = "policy"
-            else:
-                category = "contracts"  # default fallback
+            category = self._mock_category(state['preview'])
         
-        if "contract" in category:
-            category = "contracts"
-        elif "policy" in category:
-            category = "policy"
+        category = self._normalize_category(category)
+
+        return {"file_path": state["file_path"], "category": category}
+
+    async def adecision(self, state: State):
+        """Async decision - uses Gemini's async generation API"""
+        # The first call loads the classifier model from disk
+        category = await asyncio.to_thread(self._local_category, state['preview'])
+        if category:
+            return {"file_path": state["file_path"], "category": category}
+
+        prompt = self._classification_prompt(state['preview'])
+
+        if self.ai_enabled and self.model:
+            response = await self.model.generate_content_async(prompt)
+            category = response.candidates[0].content.parts[0].text.strip().lower()
         else:
-            category = "unknown"
+            category = self._mock_category(state['preview'])
+
+        category = self._normalize_category(category)
+
+        return {"file_path": state["file_path"], "category": category}
+
+    @staticmethod
+    def _stored(chunker: StreamingChunker, writer: Optional[VectorWriter], ingest: Dict[str, int]) -> Dict:
+        """embed_and_store state update, with the error when the document was not stored"""
+        error = None
+        if writer is None:
+            error = "Embeddings unavailable - document not stored in vector DB"
+        elif writer.failed:
+            error = writer.error
+        return {"content_length": chunker.length, "ingest": ingest, "error": error}
+
+    def _writer(self, state: State) -> Optional[VectorWriter]:
+        """VectorWriter for the document, or None when AI is disabled"""
+        if not self.registry.embeddings_available():
+            print("📝 Embeddings unavailable - document processed but not stored in vector DB")
+            return None
+        # Collection named after the category ("contracts" or "policy"), or the shared collection
+        collection_name = collection_for(state["category"])
+        return VectorWriter(
+            self.registry, self.registry.embeddings(PRIORITY_BULK), collection_name,
+            state["document_id"], state.get("user_id"),
+            other_collections=[name for name in storage_collections() if name != collection_name]
+        )
+
+    @staticmethod
+    def _invalidate_answers(state: State, writer: VectorWriter):
+        """Drop cached answers that may not reflect the chunks just written"""
+        cache = get_answer_cache()
+        if cache is not None and writer.plan is not None and (writer.plan.changed() or writer.moved_from):
+            # Per-category collections are named after their category
+            for category in [state["category"], *writer.moved_from]:
+                cache.invalidate(category)
+
+    @staticmethod
+    def _chunker(state: State) -> StreamingChunker:
+        """Chunker tagging every chunk with the payload fields searches filter on"""
+        return StreamingChunker(metadata={
+            "document_id": state["document_id"],
+            "category": state["category"],
+            "user_id": state.get("user_id")
+        })
+
+    @staticmethod
+    def _flush_size() -> int:
+        """Chunks handed to the embedder at once - enough to keep every in-flight slot busy"""
+        return settings.EMBEDDING_BATCH_SIZE * settings.EMBEDDING_MAX_IN_FLIGHT
 
-        return {"file_path": state["file_path"], "content": state["content"], "category": category}
-        
     def embed_and_store(self, state: State):
-        """Embed and store - exact same logic as original embed_and_store function"""
-        if self.ai_enabled and self.api_key:
-            try:
-                # Pass API key explicitly to avoid credential issues
-                embeddings = GoogleGenerativeAIEmbeddings(
-                    model="models/embedding-001",
-                    google_api_key=self.api_key
-                )
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=300)
-
-                # Split the loaded text into documents
-                split_docs = text_splitter.create_documents([state["content"]])
-
-                # Create or append to collection dynamically using category name
-                vector_store = QdrantVectorStore.from_documents(
-                    documents=split_docs,
-                    url="http://localhost:6333",
-                    collection_name=state["category"],  # "contracts" or "policy"
-                    embedding=embeddings,
-                    force_recreate=False  # don't overwrite old data
-                )
-                print(f"✅ Document successfully stored in '{state['category']}' collection")
-            except Exception as e:
-                print(f"⚠️ Vector storage failed: {e}")
-                print("📝 Document processed but not stored in vector DB")
-        else:
-            print("📝 AI disabled - document processed but not stored in vector DB")
+        """
+        Embed and store - pages stream from the parser through the chunker into
+        the embedder, so embedding starts before parsing finishes and memory
+        stays bounded by the chunk batch
+        """
+        chunker = self._chunker(state)
+        writer = self._writer(state)
+
+        batch = []
+        pieces = iter_pieces(state["file_path"], get_process_pool(), state.get("engine"))
+        for doc in iter_chunks(pieces, chunker):
+            batch.append(doc)
+            if len(batch) >= self._flush_size():
+                if writer:
+                    writer.write(batch)
+                batch = []
+        ingest = {}
+        if writer:
+            writer.write(batch)
+            ingest = writer.finish()
+            self._invalidate_answers(state, writer)
+
+        return self._stored(chunker, writer, ingest)
+
+    async def aembed_and_store(self, state: State):
+        """
+        Async embed_and_store - embeds with the async Gemini client and upserts
+        through the shared AsyncQdrantClient while the process pool parses ahead
+        """
+        chunker = self._chunker(state)
+        writer = self._writer(state)
+
+        batch = []
+        async for text, new_page in aiter_pieces(state["file_path"], get_process_pool(), state.get("engine")):
+            batch.extend(chunker.feed(text, new_page))
+            if len(batch) >= self._flush_size():
+                if writer:
+                    await writer.awrite(batch)
+                batch = []
+        batch.extend(chunker.finish())
+        ingest = {}
+        if writer:
+            await writer.awrite(batch)
+            ingest = await writer.afinish()
+            # A Valkey round trip (and its first connection), so off the event loop
+            await asyncio.to_thread(self._invalidate_answers, state, writer)
 
-        return state
\ No newline at end of file
+        return self._stored(chunker, writer, ingest)
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""
+Batched, Rate-limited Embedding
+
+Splits embedding work into fixed-size batches, bounds the number of
+requests in flight and paces them with a token bucket. The bucket
+lives in Valkey, so every API process and RQ worker draws from the same
+Gemini quota. A 429 drains the shared bucket so every process backs off.
+
+Bulk ingest may not take the last EMBEDDING_INTERACTIVE_RESERVE share of
+the bucket, which keeps quota free for interactive /queries traffic.
+"""
+
+import asyncio
+import inspect
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+
+# Request priorities
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+# Gemini task type of query embeddings (embed_documents defaults to RETRIEVAL_DOCUMENT)
+QUERY_TASK_TYPE = "RETRIEVAL_QUERY"
+
+# After a Valkey error the bucket is local for this long, then Valkey is tried again
+SHARED_RETRY_SECONDS = 5.0
+
+# Atomically refill the bucket and take tokens. Returns the seconds to wait
+# (0 when the tokens were taken). Uses the server clock so hosts agree.
+# A request is granted once `needed` tokens are free but always charged
+# in full, so one larger than the bucket leaves it in debt.
+_TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local needed = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens - needed >= reserve then
+    tokens = tokens - requested
+else
+    wait = (needed + reserve - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+# Push the bucket into debt so every process waits for the penalty
+_PENALIZE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local debt = -tonumber(ARGV[1]) * tonumber(ARGV[2])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens')) or 0
+redis.call('HSET', KEYS[1], 'tokens', math.min(tokens, debt), 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return 1
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket shared through Valkey, with an in-process fallback
+
+    One token is one embedded text.
+    """
+
+    def __init__(self, key: str, rate_per_minute: float, capacity: float, redis_connection=None):
+        self.key = key
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.redis = redis_connection
+        self.lock = threading.Lock()
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+        self._take = self._penalize = None
+        self._shared_retry_at = 0.0
+        if self.redis is not None:
+            self._take = self.redis.register_script(_TAKE_SCRIPT)
+            self._penalize = self.redis.register_script(_PENALIZE_SCRIPT)
+
+    def _shared(self) -> bool:
+        """Whether to use the Valkey bucket (not while backing off after an error)"""
+        return self._take is not None and time.monotonic() >= self._shared_retry_at
+
+    def _shared_failed(self, error: Exception):
+        """Fall back to the local bucket for SHARED_RETRY_SECONDS"""
+        self._shared_retry_at = time.monotonic() + SHARED_RETRY_SECONDS
+        print(f"⚠️ Shared rate limiter unavailable, using local bucket for {SHARED_RETRY_SECONDS:.0f}s: {error}")
+
+    def reserve_for(self, priority: str) -> float:
+        """Tokens a request of this priority must leave in the bucket"""
+        if priority == PRIORITY_BULK:
+            return self.capacity * settings.EMBEDDING_INTERACTIVE_RESERVE
+        return 0.0
+
+    def try_take(self, count: int, priority: str = PRIORITY_INTERACTIVE) -> float:
+        """
+        Take count tokens if available
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds to wait before retrying
+        """
+        reserve = self.reserve_for(priority)
+        # A request larger than the usable bucket could never be granted in
+        # one go: it waits for a full bucket and is charged in full (debt)
+        needed = min(count, max(1.0, self.capacity - reserve))
+        if self._shared():
+            try:
+                return float(self._take(keys=[self.key], args=[self.rate, self.capacity, count, reserve, needed]))
+            except Exception as e:
+                self._shared_failed(e)
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens - needed >= reserve:
+                self.tokens -= count
+                return 0.0
+            return (needed + reserve - self.tokens) / self.rate
+
+    def take(self, count: int, priority: str = PRIORITY_INTERACTIVE):
+        """Block until count tokens were taken"""
+        while True:
+            wait = self.try_take(count, priority)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def atake(self, count: int, priority: str = PRIORITY_INTERACTIVE):
+        """Wait (without blocking the event loop) until count tokens were taken"""
+        while True:
+            # The shared bucket is a Valkey round trip
+            wait = await asyncio.to_thread(self.try_take, count, priority)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Drain the bucket so all processes pause for roughly seconds"""
+        if self._shared():
+            try:
+                self._penalize(keys=[self.key], args=[self.rate, seconds])
+                return
+            except Exception as e:
+                self._shared_failed(e)
+
+        with self.lock:
+            self.tokens = min(self.tokens, -self.rate * seconds)
+            self.updated_at = time.monotonic()
+
+    async def apenalize(self, seconds: float):
+        """Async penalize (off the event loop)"""
+        await asyncio.to_thread(self.penalize, seconds)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an embedding error is a quota/429 error"""
+    message = str(error)
+    return (
+        "429" in message
+        or "RESOURCE_EXHAUSTED" in message.upper()
+        or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+    )
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for retry attempt (0-based)"""
+    delay = min(settings.EMBEDDING_BACKOFF_MAX, settings.EMBEDDING_BACKOFF_BASE * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper that batches, bounds concurrency and
+    paces requests with a shared token bucket
+    """
+
+    def __init__(self, embeddings: Embeddings, bucket: TokenBucket,
+                 priority: str = PRIORITY_INTERACTIVE,
+                 batch_size: Optional[int] = None, max_in_flight: Optional[int] = None):
+        self.embeddings = embeddings
+        self.bucket = bucket
+        self.priority = priority
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_in_flight = max_in_flight or settings.EMBEDDING_MAX_IN_FLIGHT
+        # Shared by every call on this instance so in-flight requests stay bounded
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed")
+        self.async_semaphores = weakref.WeakKeyDictionary()
+        # Gemini embeds a batch of queries in one request when given the query task type
+        self.batch_queries = "task_type" in inspect.signature(embeddings.embed_documents).parameters
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to an event loop
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_semaphores:
+            self.async_semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return self.async_semaphores[loop]
+
+    def _embed(self, batch: List[str], queries: bool) -> List[List[float]]:
+        if not queries:
+            return self.embeddings.embed_documents(batch)
+        if self.batch_queries:
+            return self.embeddings.embed_documents(batch, task_type=QUERY_TASK_TYPE)
+        return [self.embeddings.embed_query(text) for text in batch]
+
+    async def _aembed(self, batch: List[str], queries: bool) -> List[List[float]]:
+        if not queries:
+            return await self.embeddings.aembed_documents(batch)
+        if self.batch_queries:
+            return await self.embeddings.aembed_documents(batch, task_type=QUERY_TASK_TYPE)
+        return [await self.embeddings.aembed_query(text) for text in batch]
+
+    def _embed_batch(self, batch: List[str], queries: bool = False) -> List[List[float]]:
+        for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+            self.bucket.take(len(batch), self.priority)
+            try:
+                return self._embed(batch, queries)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == settings.EMBEDDING_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"⏳ Embedding rate limited, backing off {delay:.1f}s")
+                self.bucket.penalize(delay)
+
+    async def _aembed_batch(self, batch: List[str], queries: bool = False) -> List[List[float]]:
+        async with self._async_semaphore():
+            for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+                await self.bucket.atake(len(batch), self.priority)
+                try:
+                    return await self._aembed(batch, queries)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == settings.EMBEDDING_MAX_RETRIES:
+                        raise
+                    delay = backoff_delay(attempt)
+                    print(f"⏳ Embedding rate limited, backing off {delay:.1f}s")
+                    await self.bucket.apenalize(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for result in self.executor.map(self._embed_batch, self._batches(texts)):
+            vectors.extend(result)
+        return vectors
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        results = await asyncio.gather(*[self._aembed_batch(batch) for batch in self._batches(texts)])
+        return [vector for result in results for vector in result]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query embeddings of many texts, in batched requests"""
+        vectors = []
+        for result in self.executor.map(lambda batch: self._embed_batch(batch, True), self._batches(texts)):
+            vectors.extend(result)
+        return vectors
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        results = await asyncio.gather(*[self._aembed_batch(batch, True) for batch in self._batches(texts)])
+        return [vector for result in results for vector in result]
+
+    def embed_query(self, text: str) -> List[float]:
+        for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+            self.bucket.take(1, self.priority)
+            try:
+                return self.embeddings.embed_query(text)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == settings.EMBEDDING_MAX_RETRIES:
+                    raise
+                self.bucket.penalize(backoff_delay(attempt))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        async with self._async_semaphore():
+            for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+                await self.bucket.atake(1, self.priority)
+                try:
+                    return await self.embeddings.aembed_query(text)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == settings.EMBEDDING_MAX_RETRIES:
+                        raise
+                    await self.bucket.apenalize(backoff_delay(attempt))
+
+
+# Process-wide token bucket (created lazily)
+_token_bucket: Optional[TokenBucket] = None
+_token_bucket_lock = threading.Lock()
+
+
+def get_token_bucket() -> TokenBucket:
+    """Get the embedding token bucket shared through Valkey"""
+    global _token_bucket
+    with _token_bucket_lock:
+        if _token_bucket is None:
+            redis_connection = None
+            try:
+                from Queue.connection import queue_connection
+                if queue_connection.is_connected():
+                    redis_connection = queue_connection.redis_connection
+            except ImportError:
+                pass
+            if redis_connection is None:
+                print("⚠️ Valkey not available - embedding rate limit is per process")
+            _token_bucket = TokenBucket(
+                f"ratelimit:embeddings:{settings.EMBEDDING_MODEL}",
+                settings.EMBEDDING_RATE_LIMIT_PER_MINUTE,
+                settings.EMBEDDING_RATE_LIMIT_BURST,
+                redis_connection
+            )
+    return _token_bucket
@@ -0,0 +1,320 @@
+"""
+Content-addressed Embedding Cache
+
+Contract boilerplate repeats constantly across the corpus, so embeddings
+are cached under (embedding model, task, SHA-256 of the text). Vectors
+live in a local SQLite file capped by an LRU policy and can optionally be
+shared between API processes and RQ workers through Valkey.
+
+CachedEmbeddings wraps any LangChain embeddings object, so ingest and
+query both go through the same cache.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+
+# Gemini embeds documents and queries with different task types, so they are cached separately
+TASK_DOCUMENT = "document"
+TASK_QUERY = "query"
+
+
+def cache_key(model: str, task: str, text: str) -> str:
+    """Cache key for a text embedded by model for task"""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{task}:{digest}"
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCacheStats:
+    """Hit/miss counters for the embedding cache (per process)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, hits: int = 0, shared_hits: int = 0, misses: int = 0, evictions: int = 0):
+        with self.lock:
+            self.hits += hits
+            self.shared_hits += shared_hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def to_dict(self) -> Dict[str, float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class EmbeddingCache:
+    """
+    SQLite embedding store with an LRU size cap and an optional Valkey tier
+
+    The SQLite file runs in WAL mode, so the API and a worker on the same
+    host can share it. Valkey is used as a second tier when enabled.
+    """
+
+    def __init__(self, path: str, max_entries: int, valkey_enabled: bool = False):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = EmbeddingCacheStats()
+        self.lock = threading.Lock()
+        self.writes_since_eviction = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self.db.commit()
+
+        self.valkey = self._connect_valkey() if valkey_enabled else None
+
+    def _connect_valkey(self):
+        """Connect to Valkey for the shared tier (binary responses)"""
+        try:
+            from redis import Redis
+            client = Redis(
+                host=os.getenv('VALKEY_HOST', 'localhost'),
+                port=int(os.getenv('VALKEY_PORT', 6379)),
+                db=int(os.getenv('VALKEY_DB', 0)),
+                socket_timeout=2,
+                socket_connect_timeout=2
+            )
+            client.ping()
+            print("✅ Embedding cache shared through Valkey")
+            return client
+        except Exception as e:
+            print(f"⚠️ Valkey not available for embedding cache: {e}")
+            return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up keys, returning the vectors that were found"""
+        if not keys:
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self.lock:
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = _unpack(blob)
+
+            if found:
+                now = time.time()
+                self.db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self.db.commit()
+
+        shared = {}
+        missing = [key for key in unique_keys if key not in found]
+        if missing and self.valkey is not None:
+            try:
+                blobs = self.valkey.mget([f"emb:{key}" for key in missing])
+                shared = {key: _unpack(blob) for key, blob in zip(missing, blobs) if blob is not None}
+            except Exception as e:
+                print(f"⚠️ Valkey embedding lookup failed: {e}")
+            if shared:
+                self._put_local(shared)
+                found.update(shared)
+
+        hits = sum(1 for key in keys if key in found)
+        self.stats.record(hits=hits, shared_hits=len(shared), misses=len(keys) - hits)
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store vectors locally and in the shared tier"""
+        if not vectors:
+            return
+        self._put_local(vectors)
+
+        if self.valkey is not None:
+            try:
+                pipe = self.valkey.pipeline(transaction=False)
+                for key, vector in vectors.items():
+                    pipe.set(f"emb:{key}", _pack(vector), ex=settings.EMBEDDING_CACHE_VALKEY_TTL)
+                pipe.execute()
+            except Exception as e:
+                print(f"⚠️ Valkey embedding write failed: {e}")
+
+    def _put_local(self, vectors: Dict[str, List[float]]):
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, _pack(vector), now) for key, vector in vectors.items()]
+            )
+            self.writes_since_eviction += len(vectors)
+            # Counting rows is cheap, but there is no need to do it on every write
+            if self.writes_since_eviction >= 1000:
+                self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries above max_entries (caller holds the lock)"""
+        self.writes_since_eviction = 0
+        count = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            )
+            self.stats.record(evictions=excess)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Counters plus the current size of the local store"""
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        stats = self.stats.to_dict()
+        stats.update({
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "valkey_shared": self.valkey is not None
+        })
+        return stats
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain embeddings wrapper that reads and fills the embedding cache"""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def _lookup(self, texts: List[str], task: str):
+        keys = [cache_key(self.model, task, text) for text in texts]
+        found = self.cache.get_many(keys)
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        return keys, found, missing
+
+    def _store(self, missing: List[str], vectors: List[List[float]], task: str, found: Dict):
+        new = {cache_key(self.model, task, text): list(vector) for text, vector in zip(missing, vectors)}
+        self.cache.put_many(new)
+        found.update(new)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts, TASK_DOCUMENT)
+        if missing:
+            self._store(missing, self.embeddings.embed_documents(missing), TASK_DOCUMENT, found)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._lookup([text], TASK_QUERY)
+        if missing:
+            self._store(missing, [self.embeddings.embed_query(text)], TASK_QUERY, found)
+        return found[keys[0]]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query embeddings of many texts (the misses in one batched call)"""
+        keys, found, missing = self._lookup(texts, TASK_QUERY)
+        if missing:
+            self._store(missing, embed_queries(self.embeddings, missing), TASK_QUERY, found)
+        return [found[key] for key in keys]
+
+    # The async variants run the cache (SQLite commits, Valkey round trips) off the event loop
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await asyncio.to_thread(self._lookup, texts, TASK_DOCUMENT)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing)
+            await asyncio.to_thread(self._store, missing, vectors, TASK_DOCUMENT, found)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await asyncio.to_thread(self._lookup, [text], TASK_QUERY)
+        if missing:
+            vectors = [await self.embeddings.aembed_query(text)]
+            await asyncio.to_thread(self._store, missing, vectors, TASK_QUERY, found)
+        return found[keys[0]]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await asyncio.to_thread(self._lookup, texts, TASK_QUERY)
+        if missing:
+            vectors = await aembed_queries(self.embeddings, missing)
+            await asyncio.to_thread(self._store, missing, vectors, TASK_QUERY, found)
+        return [found[key] for key in keys]
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Query embeddings of many texts, batched when the embeddings support it"""
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+async def aembed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Async embed_queries"""
+    if hasattr(embeddings, "aembed_queries"):
+        return await embeddings.aembed_queries(texts)
+    return [await embeddings.aembed_query(text) for text in texts]
+
+
+# Process-wide cache instance (created lazily)
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get the shared embedding cache, or None when caching is disabled"""
+    global _embedding_cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH,
+                settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                settings.EMBEDDING_CACHE_VALKEY
+            )
+    return _embedding_cache
+
+
+def with_embedding_cache(embeddings: Embeddings, model: str) -> Embeddings:
+    """Wrap embeddings with the shared cache when it is enabled"""
+    cache = get_embedding_cache()
+    if cache is None:
+        return embeddings
+    return CachedEmbeddings(embeddings, model, cache)
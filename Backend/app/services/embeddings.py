@@ -0,0 +1,79 @@
+"""
+Embedding Factory
+
+Builds the embeddings object used by ingest and query from the provider
+named by EMBEDDING_PROVIDER:
+
+- "gemini" (default): Gemini embeddings behind the shared rate-limited
+  batcher, behind the embedding cache (so cache hits never spend quota).
+  Needs GEMINI_API_KEY.
+- "hashing" / "random_projection": deterministic local embeddings of
+  QDRANT_VECTOR_SIZE dimensions (see local_embeddings). No network or key,
+  so ingest and query run end to end in benchmarks and air-gapped tests.
+
+Other providers can be added with register_embedding_provider.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+from app.services.embedding_batcher import BatchedEmbeddings, PRIORITY_INTERACTIVE, get_token_bucket
+from app.services.embedding_cache import with_embedding_cache
+from app.services.local_embeddings import HashingEmbeddings, RandomProjectionEmbeddings
+
+# (api_key, priority) -> embeddings
+EmbeddingFactory = Callable[[Optional[str], str], Embeddings]
+
+
+def _gemini_embeddings(api_key: Optional[str], priority: str) -> Embeddings:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    gemini = GoogleGenerativeAIEmbeddings(
+        model=settings.EMBEDDING_MODEL,
+        google_api_key=api_key
+    )
+    batched = BatchedEmbeddings(gemini, get_token_bucket(), priority)
+    return with_embedding_cache(batched, settings.EMBEDDING_MODEL)
+
+
+# Provider name -> (factory, needs an API key)
+_providers: Dict[str, Tuple[EmbeddingFactory, bool]] = {
+    "gemini": (_gemini_embeddings, True),
+    "hashing": (lambda api_key, priority: HashingEmbeddings(settings.QDRANT_VECTOR_SIZE), False),
+    "random_projection": (lambda api_key, priority: RandomProjectionEmbeddings(settings.QDRANT_VECTOR_SIZE), False),
+}
+
+
+def register_embedding_provider(name: str, factory: EmbeddingFactory, requires_api_key: bool = False):
+    """Make an embeddings implementation selectable through EMBEDDING_PROVIDER"""
+    _providers[name.lower()] = (factory, requires_api_key)
+
+
+def embedding_providers() -> List[str]:
+    return list(_providers)
+
+
+def _provider() -> Tuple[EmbeddingFactory, bool]:
+    name = settings.EMBEDDING_PROVIDER.lower()
+    if name not in _providers:
+        raise ValueError(f"EMBEDDING_PROVIDER must be one of {embedding_providers()}, got {name!r}")
+    return _providers[name]
+
+
+def embeddings_available(api_key: Optional[str]) -> bool:
+    """Whether texts can be embedded (a local provider, or a key for one that needs it)"""
+    return bool(api_key) or not _provider()[1]
+
+
+def create_embeddings(api_key: Optional[str], priority: str = PRIORITY_INTERACTIVE) -> Embeddings:
+    """
+    Create the embeddings stack of the configured provider
+
+    Args:
+        api_key (Optional[str]): Gemini API key
+        priority (str): PRIORITY_INTERACTIVE for queries, PRIORITY_BULK for ingest
+
+    Returns:
+        Embeddings: Cached, batched, rate-limited Gemini embeddings, or a local provider
+    """
+    factory, _ = _provider()
+    return factory(api_key, priority)
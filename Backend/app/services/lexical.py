@@ -0,0 +1,72 @@
+"""
+Lexical (BM25) Sparse Vectors
+
+Dense embeddings miss exact legal terms such as clause numbers, defined
+terms and party names. Every chunk therefore also gets a sparse BM25 term
+vector at ingest time, stored next to the dense vector in Qdrant. The
+collection applies the IDF modifier, so the dot product of a query's term
+vector with a chunk vector is the chunk's BM25 score.
+
+Terms are hashed into a 32-bit index space, so no vocabulary has to be
+stored or shared between the API and the workers.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import List
+from qdrant_client import models
+from app.core.config import settings
+
+# Name of the sparse vector in the collection (the dense vector is unnamed)
+SPARSE_VECTOR_NAME = "bm25"
+
+# Words and numbers, keeping clause numbers and hyphenated terms together ("12.3(b)" -> "12.3", "b")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of a text, without stopwords"""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def term_index(term: str) -> int:
+    """Stable 32-bit index of a term"""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def _sparse(weights: dict) -> models.SparseVector:
+    merged = {}
+    for term, weight in weights.items():
+        index = term_index(term)
+        merged[index] = merged.get(index, 0.0) + weight
+    indices = sorted(merged)
+    return models.SparseVector(indices=indices, values=[merged[i] for i in indices])
+
+
+def document_vector(text: str) -> models.SparseVector:
+    """BM25 term weights of a chunk (IDF is applied by Qdrant)"""
+    counts = Counter(tokenize(text))
+    length = sum(counts.values())
+    k1, b = settings.BM25_K1, settings.BM25_B
+    norm = k1 * (1 - b + b * length / settings.BM25_AVG_CHUNK_TERMS)
+    return _sparse({term: tf * (k1 + 1) / (tf + norm) for term, tf in counts.items()})
+
+
+def query_vector(text: str) -> models.SparseVector:
+    """Term vector of a query (each distinct term counts once)"""
+    return _sparse({term: 1.0 for term in set(tokenize(text))})
+
+
+def sparse_vectors_config() -> dict:
+    """sparse_vectors_config for collections with lexical search"""
+    return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def has_lexical_index(info: models.CollectionInfo) -> bool:
+    """Whether a collection stores BM25 sparse vectors"""
+    return SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
@@ -0,0 +1,115 @@
+"""
+Local Deterministic Embeddings
+
+Embedding providers that need no network and no API key, for benchmarks,
+perf CI and air-gapped testing. Both produce stable vectors of a fixed
+dimension (QDRANT_VECTOR_SIZE, 768 by default, like Gemini's
+embedding-001), so collections, HNSW and quantization behave as they do in
+production. They are not semantic: texts are similar when they share terms.
+
+- "hashing": signed feature hashing of word unigrams and bigrams. Sparse,
+  and the fastest.
+- "random_projection": every term gets a fixed pseudo-random Gaussian
+  vector and a text is the weighted sum of its term vectors. This is a
+  random projection of the term counts, so the vectors are dense like real
+  embeddings.
+
+Queries and documents are embedded the same way.
+"""
+
+import asyncio
+import hashlib
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.services.lexical import tokenize
+
+# Term vectors kept per process by random_projection (768 floats each)
+TERM_VECTOR_CACHE_SIZE = 8192
+
+
+def _terms(text: str) -> Counter:
+    """Unigrams and bigrams of a text, with sublinear (1 + log tf) weights"""
+    tokens = tokenize(text)
+    counts = Counter(tokens)
+    counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return Counter({term: 1.0 + math.log(tf) for term, tf in counts.items()})
+
+
+def _digest(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=1 << 16)
+def _hashed(term: str, dim: int) -> Tuple[int, float]:
+    """Bucket and sign of a term"""
+    digest = _digest(term)
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+
+@lru_cache(maxsize=TERM_VECTOR_CACHE_SIZE)
+def _term_vector(term: str, dim: int) -> np.ndarray:
+    """Fixed Gaussian vector of a term"""
+    return np.random.default_rng(_digest(term)).standard_normal(dim, dtype=np.float32)
+
+
+def _normalized(vector: np.ndarray) -> List[float]:
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+class LocalEmbeddings(Embeddings):
+    """Base class of the local providers (symmetric: queries embed like documents)"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_documents(self, texts: List[str], task_type: Optional[str] = None) -> List[List[float]]:
+        # task_type is accepted (and ignored) so the batcher sends query batches in one call
+        return [_normalized(self._vector(text)) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return _normalized(self._vector(text))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str], task_type: Optional[str] = None) -> List[List[float]]:
+        # CPU-bound - keep large batches off the event loop
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await self.aembed_documents(texts)
+
+
+class HashingEmbeddings(LocalEmbeddings):
+    """Signed feature hashing of unigrams and bigrams"""
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        terms = _terms(text)
+        if terms:
+            buckets, signs = zip(*(_hashed(term, self.dim) for term in terms))
+            np.add.at(vector, list(buckets), np.array(signs, dtype=np.float32) *
+                      np.fromiter(terms.values(), dtype=np.float32, count=len(terms)))
+        return vector
+
+
+class RandomProjectionEmbeddings(LocalEmbeddings):
+    """Weighted sum of fixed Gaussian term vectors"""
+
+    def _vector(self, text: str) -> np.ndarray:
+        terms = _terms(text)
+        if not terms:
+            return np.zeros(self.dim, dtype=np.float32)
+        weights = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+        return weights @ np.stack([_term_vector(term, self.dim) for term in terms])
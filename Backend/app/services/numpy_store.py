@@ -0,0 +1,629 @@
+"""
+Embedded NumPy Vector Store
+
+A vector store without a server (VECTOR_STORE_BACKEND="numpy"), for
+development, tests and small deployments. Every collection is a directory
+under NUMPY_STORE_PATH:
+
+- vectors.f32: the unit-normalized vectors as a memory-mapped float32
+  matrix, one row per point;
+- points.sqlite3: the row, point ID and payload of every live point.
+
+Search is cosine similarity as one matrix-vector product (a matrix-matrix
+product for batches) over the rows that pass the filter, with argpartition
+for the top k. Collections with NUMPY_IVF_MIN_POINTS points or more are also
+partitioned into an inverted file of k-means lists (trained in memory on
+first use); a search then scores only the NUMPY_IVF_PROBES lists closest to
+the query, unless it asks for exact search or the filter leaves few enough
+points to scan.
+
+Filters are the Qdrant models the services already build (must, should and
+must_not of MatchValue, MatchAny, MatchExcept and IsEmpty conditions) on
+the PAYLOAD_INDEXES fields, which are kept in memory dictionary-encoded.
+
+Writes never overwrite a live row: an upserted point gets a free row and
+its old row is freed, so a reader never sees half-written vectors. A freed
+row can be reused while a search is still scoring it, so a search that
+overlapped a write re-checks its hits before returning them. SQLite
+serializes writers across processes (API and RQ worker), and every
+operation reloads the in-memory state when another process committed.
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import models
+from app.core.config import settings
+from app.services.collections import CollectionConfigError
+from app.services.context_packer import Candidate
+from app.services.vector_index import PAYLOAD_INDEXES, document_filter, mutable_metadata
+from app.services.vector_store import VectorStore
+
+VECTORS_FILE = "vectors.f32"
+POINTS_FILE = "points.sqlite3"
+
+# The vector file grows by at least this many rows (and at least doubles)
+MIN_CAPACITY = 1024
+# Rows scored per matrix product when assigning points to IVF lists
+ASSIGN_BLOCK_ROWS = 65536
+KMEANS_ITERATIONS = 10
+# Training points sampled per IVF list
+KMEANS_SAMPLE_PER_LIST = 64
+# SQLite host parameter limit (older builds allow 999)
+SQL_VARIABLES = 900
+
+_COLLECTION_NAME_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+
+def _dense(vector) -> List[float]:
+    """The unnamed dense vector of a PointStruct (BM25 vectors are not stored)"""
+    return vector.get("") if isinstance(vector, dict) else vector
+
+
+def _normalized(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def _field(payload: Dict, key: str):
+    """Value of a dotted payload key ("metadata.category")"""
+    value = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (-inf scores excluded)"""
+    if len(scores) > k:
+        indices = np.argpartition(-scores, k - 1)[:k]
+    else:
+        indices = np.arange(len(scores))
+    indices = indices[np.argsort(-scores[indices], kind="stable")]
+    return indices[np.isfinite(scores[indices])]
+
+
+class _Column:
+    """A keyword payload field of every row, dictionary-encoded (-1 = missing)"""
+
+    def __init__(self, capacity: int):
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.vocabulary: Dict[str, int] = {}
+
+    def resize(self, capacity: int):
+        codes = np.full(capacity, -1, dtype=np.int32)
+        codes[:min(capacity, len(self.codes))] = self.codes[:capacity]
+        self.codes = codes
+
+    def set(self, row: int, value):
+        if value is None or value == []:
+            self.codes[row] = -1
+            return
+        key = value if isinstance(value, str) else json.dumps(value)
+        self.codes[row] = self.vocabulary.setdefault(key, len(self.vocabulary))
+
+    def _code(self, value) -> int:
+        return self.vocabulary.get(value if isinstance(value, str) else json.dumps(value), -2)
+
+    def equals(self, value) -> np.ndarray:
+        return self.codes == self._code(value)
+
+    def any(self, values: Sequence) -> np.ndarray:
+        return np.isin(self.codes, [self._code(value) for value in values])
+
+    def empty(self) -> np.ndarray:
+        return self.codes == -1
+
+
+class _Collection:
+    """One collection: the vector file, the SQLite payload store and their in-memory state"""
+
+    def __init__(self, path: str, dim: Optional[int] = None):
+        self.path = path
+        self.vectors_path = os.path.join(path, VECTORS_FILE)
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(os.path.join(path, POINTS_FILE), check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS config (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if dim is not None:
+            self.db.execute("INSERT OR IGNORE INTO config (key, value) VALUES ('dim', ?)", (str(dim),))
+        self.dim = int(self.db.execute("SELECT value FROM config WHERE key = 'dim'").fetchone()[0])
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, "ab").close()
+
+        self.vectors: Optional[np.memmap] = None
+        self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self.capacity = 0
+        self.alive = np.zeros(0, dtype=bool)
+        self.rows: Dict[str, int] = {}
+        self.ids: Dict[int, str] = {}
+        self.columns = {field: _Column(0) for field in PAYLOAD_INDEXES}
+        # Inverted file: list centroids, list of every row (-1 = none) and the size it was trained at
+        self.centroids: Optional[np.ndarray] = None
+        self.assignment = np.full(0, -1, dtype=np.int32)
+        self.trained_points = 0
+        self.version = None
+        # Bumped on every commit and reload, so a search can tell whether it overlapped a write
+        self.generation = 0
+        self._load()
+
+    # State
+
+    def _map(self):
+        """(Re)map the vector file and size the per-row arrays to it"""
+        capacity = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        self.vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            if capacity else None
+        )
+        # Plain ndarray view of the same pages (memmap slicing has per-call overhead)
+        self.matrix = self.vectors.view(np.ndarray) if capacity else np.zeros((0, self.dim), dtype=np.float32)
+        if capacity != self.capacity:
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:min(capacity, self.capacity)] = self.alive[:capacity]
+            self.alive = alive
+            assignment = np.full(capacity, -1, dtype=np.int32)
+            assignment[:min(capacity, self.capacity)] = self.assignment[:capacity]
+            self.assignment = assignment
+            for column in self.columns.values():
+                column.resize(capacity)
+            self.capacity = capacity
+
+    def _load(self):
+        """Rebuild the in-memory state from disk"""
+        self._map()
+        fields = list(PAYLOAD_INDEXES)
+        extracted = ", ".join(f"json_extract(payload, '$.{field}')" for field in fields)
+        self.alive[:] = False
+        self.rows, self.ids = {}, {}
+        self.columns = {field: _Column(self.capacity) for field in fields}
+        for record in self.db.execute(f"SELECT row, id, {extracted} FROM points"):
+            row, point_id = record[0], record[1]
+            self.alive[row] = True
+            self.rows[point_id] = row
+            self.ids[row] = point_id
+            for field, value in zip(fields, record[2:]):
+                self.columns[field].set(row, value)
+        if self.centroids is not None:
+            self._assign(np.arange(self.capacity))
+        self.version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        self.generation += 1
+
+    def _refresh(self):
+        """Reload when another process committed since the last look"""
+        if self.db.execute("PRAGMA data_version").fetchone()[0] != self.version:
+            self._load()
+
+    @contextmanager
+    def _writing(self):
+        """One write transaction (the in-memory state is reloaded if it fails)"""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                yield
+                if self.vectors is not None:
+                    self.vectors.flush()
+                self.db.execute("COMMIT")
+                self.generation += 1
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                self._load()
+                raise
+
+    def _free_rows(self, count: int) -> np.ndarray:
+        """count rows without a live point, growing the vector file if needed"""
+        free = np.flatnonzero(~self.alive)
+        if len(free) < count:
+            capacity = max(self.capacity + count - len(free), self.capacity * 2, MIN_CAPACITY)
+            os.truncate(self.vectors_path, capacity * self.dim * 4)
+            self._map()
+            free = np.flatnonzero(~self.alive)
+        return free[:count]
+
+    def _index(self, row: int, point_id: str, payload: Dict):
+        self.alive[row] = True
+        self.rows[point_id] = row
+        self.ids[row] = point_id
+        for field, column in self.columns.items():
+            column.set(row, _field(payload, field))
+
+    def _unindex(self, row: int):
+        self.alive[row] = False
+        self.assignment[row] = -1
+        self.rows.pop(self.ids.pop(row, None), None)
+        for column in self.columns.values():
+            column.set(row, None)
+
+    def _fetch(self, rows: Sequence[int], columns: str = "row, payload") -> List[Tuple]:
+        records = []
+        rows = [int(row) for row in rows]
+        for i in range(0, len(rows), SQL_VARIABLES):
+            chunk = rows[i:i + SQL_VARIABLES]
+            records.extend(self.db.execute(
+                f"SELECT {columns} FROM points WHERE row IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return records
+
+    # Filters
+
+    def _column(self, key: str) -> _Column:
+        if key not in self.columns:
+            raise ValueError(f"Payload field '{key}' is not indexed by the embedded vector store")
+        return self.columns[key]
+
+    def _condition(self, condition) -> np.ndarray:
+        if isinstance(condition, models.Filter):
+            return self._mask(condition)
+        if isinstance(condition, models.IsEmptyCondition):
+            return self._column(condition.is_empty.key).empty()
+        if isinstance(condition, models.HasIdCondition):
+            mask = np.zeros(self.capacity, dtype=bool)
+            mask[[self.rows[str(i)] for i in condition.has_id if str(i) in self.rows]] = True
+            return mask
+        if isinstance(condition, models.FieldCondition):
+            column = self._column(condition.key)
+            match = condition.match
+            if isinstance(match, models.MatchValue):
+                return column.equals(match.value)
+            if isinstance(match, models.MatchAny):
+                return column.any(match.any)
+            if isinstance(match, models.MatchExcept):
+                return ~column.any(match.except_) & ~column.empty()
+        raise ValueError(f"Filter condition not supported by the embedded vector store: {condition!r}")
+
+    @staticmethod
+    def _conditions(value) -> List:
+        if value is None:
+            return []
+        return list(value) if isinstance(value, list) else [value]
+
+    def _mask(self, query_filter: Optional[models.Filter]) -> np.ndarray:
+        """Rows that pass a filter (live or not)"""
+        mask = np.ones(self.capacity, dtype=bool)
+        if query_filter is None:
+            return mask
+        for condition in self._conditions(query_filter.must):
+            mask &= self._condition(condition)
+        should = self._conditions(query_filter.should)
+        if should:
+            mask &= np.logical_or.reduce([self._condition(condition) for condition in should])
+        for condition in self._conditions(query_filter.must_not):
+            mask &= ~self._condition(condition)
+        return mask
+
+    # Inverted file
+
+    def _assign(self, rows: np.ndarray):
+        """Put rows into their closest IVF list"""
+        for i in range(0, len(rows), ASSIGN_BLOCK_ROWS):
+            block = rows[i:i + ASSIGN_BLOCK_ROWS]
+            self.assignment[block] = np.argmax(self.matrix[block] @ self.centroids.T, axis=1)
+
+    def _train(self, points: int):
+        """Spherical k-means over a sample of the live rows"""
+        lists = settings.NUMPY_IVF_LISTS or max(1, int(round(math.sqrt(points))))
+        rng = np.random.default_rng(0)
+        live = np.flatnonzero(self.alive)
+        sample = np.sort(rng.choice(live, size=min(len(live), lists * KMEANS_SAMPLE_PER_LIST), replace=False))
+        data = self.matrix[sample]
+        centroids = data[rng.choice(len(data), size=min(lists, len(data)), replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, data)
+            filled = np.bincount(nearest, minlength=len(centroids)) > 0
+            centroids[filled] = _normalized(sums[filled])
+        self.centroids = centroids
+        self.trained_points = points
+        self.assignment[:] = -1
+        self._assign(live)
+        print(f"🗂️ Trained {len(centroids)} IVF lists over {points} points in {self.path}")
+
+    def _inverted_file(self, points: int) -> Optional[np.ndarray]:
+        """IVF centroids for a collection of this size (trained or retrained when it doubled)"""
+        if points < settings.NUMPY_IVF_MIN_POINTS:
+            return None
+        if self.centroids is None or points > 2 * self.trained_points:
+            self._train(points)
+        return self.centroids
+
+    # Operations
+
+    def upsert(self, points: List[models.PointStruct]):
+        # The last write of a point ID in the batch wins
+        latest = {str(point.id): point for point in points}
+        dense = np.asarray([_dense(point.vector) for point in latest.values()], dtype=np.float32)
+        if dense.ndim != 2 or dense.shape[1] != self.dim:
+            raise CollectionConfigError(f"Vector size is {dense.shape[-1]}, expected {self.dim}")
+        with self._writing():
+            rows = self._free_rows(len(latest))
+            self.vectors[rows] = _normalized(dense)
+            payloads = [json.dumps(point.payload or {}, default=str) for point in latest.values()]
+            self.db.executemany(
+                "INSERT OR REPLACE INTO points (row, id, payload) VALUES (?, ?, ?)",
+                zip(rows.tolist(), latest, payloads)
+            )
+            for row, (point_id, point) in zip(rows.tolist(), latest.items()):
+                if point_id in self.rows:
+                    self._unindex(self.rows[point_id])
+                self._index(row, point_id, point.payload or {})
+            if self.centroids is not None:
+                self._assign(rows)
+
+    def _selected_rows(self, points: Optional[List], query_filter: Optional[models.Filter]) -> List[int]:
+        if points is not None:
+            return [self.rows[str(point_id)] for point_id in points if str(point_id) in self.rows]
+        return np.flatnonzero(self.alive & self._mask(query_filter)).tolist()
+
+    def _set_payload(self, operation: models.SetPayload):
+        rows = self._selected_rows(operation.points, operation.filter)
+        updated = []
+        for row, payload_json in self._fetch(rows):
+            payload = json.loads(payload_json)
+            target = payload
+            for part in (operation.key.split(".") if operation.key else []):
+                if not isinstance(target.get(part), dict):
+                    target[part] = {}
+                target = target[part]
+            target.update(operation.payload)
+            updated.append((json.dumps(payload, default=str), row))
+            self._index(row, self.ids[row], payload)
+        self.db.executemany("UPDATE points SET payload = ? WHERE row = ?", updated)
+
+    def _delete(self, selector):
+        if isinstance(selector, models.PointIdsList):
+            rows = self._selected_rows(selector.points, None)
+        elif isinstance(selector, models.FilterSelector):
+            rows = self._selected_rows(None, selector.filter)
+        else:
+            raise ValueError(f"Delete selector not supported by the embedded vector store: {selector!r}")
+        self.db.executemany("DELETE FROM points WHERE row = ?", [(row,) for row in rows])
+        for row in rows:
+            self._unindex(row)
+
+    def update(self, operations: List):
+        with self._writing():
+            for operation in operations:
+                if isinstance(operation, models.SetPayloadOperation):
+                    self._set_payload(operation.set_payload)
+                elif isinstance(operation, models.DeleteOperation):
+                    self._delete(operation.delete)
+                else:
+                    raise ValueError(f"Update not supported by the embedded vector store: {type(operation).__name__}")
+
+    def payloads(self, query_filter: Optional[models.Filter]) -> Dict[str, Dict]:
+        """Payload of every point that passes a filter, by point ID"""
+        with self.lock:
+            self._refresh()
+            rows = np.flatnonzero(self.alive & self._mask(query_filter))
+            return {point_id: json.loads(payload) for point_id, payload in self._fetch(rows, "id, payload")}
+
+    def search(self, queries: np.ndarray, query_filter: Optional[models.Filter], exact: bool,
+               k: int) -> List[List[Candidate]]:
+        """Top k of every (normalized) query row"""
+        with self.lock:
+            self._refresh()
+            mask = self.alive & self._mask(query_filter)
+            points = int(np.count_nonzero(self.alive))
+            candidates = int(np.count_nonzero(mask))
+            centroids = None
+            if not exact and candidates > settings.NUMPY_IVF_MIN_POINTS:
+                centroids = self._inverted_file(points)
+            vectors, assignment = self.matrix, self.assignment
+            generation = self.generation
+        if not candidates:
+            return [[] for _ in queries]
+
+        # Scored outside the lock; writes only touch rows that were free when
+        # they began, but a row freed since the search started may be reused
+        hits: List[List[Tuple[int, float]]] = []
+        if centroids is None:
+            rows = np.flatnonzero(mask)
+            # Gathering a small subset is cheaper than scoring every row
+            if len(rows) * 2 < rows[-1] + 1:
+                scores = queries @ vectors[rows].T
+            else:
+                rows = np.arange(rows[-1] + 1)
+                scores = queries @ vectors[:len(rows)].T
+                scores[:, ~mask[:len(rows)]] = -np.inf
+            for query_scores in scores:
+                top = _top_k(query_scores, k)
+                hits.append(list(zip(rows[top].tolist(), query_scores[top].tolist())))
+        else:
+            probes = min(settings.NUMPY_IVF_PROBES, len(centroids))
+            for query, list_scores in zip(queries, queries @ centroids.T):
+                lists = np.argpartition(-list_scores, probes - 1)[:probes]
+                rows = np.flatnonzero(mask & np.isin(assignment, lists))
+                scores = vectors[rows] @ query if len(rows) else np.zeros(0, dtype=np.float32)
+                top = _top_k(scores, k)
+                hits.append(list(zip(rows[top].tolist(), scores[top].tolist())))
+
+        # Stored vectors are unit length already; the packer only needs them when packing
+        with_vectors = settings.CONTEXT_PACKING_ENABLED
+        with self.lock:
+            self._refresh()
+            if self.generation != generation:
+                hits = self._recheck(queries, hits, query_filter)
+            rows = sorted({row for query_hits in hits for row, _ in query_hits})
+            found = {row: json.loads(payload) for row, payload in self._fetch(rows)}
+            # Copies, since a row may be reused once the lock is released
+            stored = {row: self.matrix[row].copy() for row in rows} if with_vectors else {}
+        return [
+            [
+                Candidate(
+                    Document(page_content=found[row].get("page_content", ""),
+                             metadata=found[row].get("metadata") or {}),
+                    score,
+                    stored.get(row)
+                )
+                for row, score in query_hits if row in found
+            ]
+            for query_hits in hits
+        ]
+
+    def _recheck(self, queries: np.ndarray, hits: List[List[Tuple[int, float]]],
+                 query_filter: Optional[models.Filter]) -> List[List[Tuple[int, float]]]:
+        """
+        Hits of a search that overlapped a write, against the current rows
+        (caller holds the lock)
+
+        Rows deleted or no longer passing the filter are dropped, and the
+        others are rescored, since the row may hold another point by now.
+        """
+        mask = self.alive & self._mask(query_filter)
+        checked = []
+        for query, query_hits in zip(queries, hits):
+            rows = [row for row, _ in query_hits if row < self.capacity and mask[row]]
+            scores = (self.matrix[rows] @ query).tolist() if rows else []
+            checked.append(sorted(zip(rows, scores), key=lambda hit: hit[1], reverse=True))
+        return checked
+
+    def close(self):
+        with self.lock:
+            self.vectors = None
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self.db.close()
+
+
+class NumpyStore(VectorStore):
+    """Embedded vector store with one directory per collection"""
+
+    name = "numpy"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.collections: Dict[str, _Collection] = {}
+
+    def _directory(self, collection_name: str) -> str:
+        if not _COLLECTION_NAME_RE.match(collection_name):
+            raise ValueError(f"Invalid collection name for the embedded vector store: {collection_name!r}")
+        return os.path.join(self.path, collection_name)
+
+    def _collection(self, collection_name: str, vector_size: Optional[int] = None) -> Optional[_Collection]:
+        """An open collection; created when a vector size is given, None if missing otherwise"""
+        with self.lock:
+            collection = self.collections.get(collection_name)
+            if collection is None:
+                directory = self._directory(collection_name)
+                if vector_size is None and not os.path.exists(os.path.join(directory, POINTS_FILE)):
+                    return None
+                os.makedirs(directory, exist_ok=True)
+                collection = self.collections[collection_name] = _Collection(directory, vector_size)
+        if vector_size is not None and collection.dim != vector_size:
+            raise CollectionConfigError(
+                f"Vector size is {collection.dim}, expected {vector_size} (re-ingest into a new collection)"
+            )
+        return collection
+
+    def _existing(self, collection_name: str) -> _Collection:
+        collection = self._collection(collection_name)
+        if collection is None:
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        return collection
+
+    def startup(self):
+        os.makedirs(self.path, exist_ok=True)
+        print(f"✅ Using the embedded vector store at {os.path.abspath(self.path)}")
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return self._collection(collection_name) is not None
+
+    def ensure_collection(self, collection_name: str, vector_size: int):
+        self._collection(collection_name, vector_size)
+
+    def lexical(self, collection_name: str) -> bool:
+        return False
+
+    def existing_points(self, collection_name: str, document_id: str,
+                        user_id: Optional[str] = None) -> Dict[str, Tuple]:
+        payloads = self._existing(collection_name).payloads(document_filter(document_id, user_id))
+        return {point_id: mutable_metadata(payload) for point_id, payload in payloads.items()}
+
+    def upsert(self, collection_name: str, points: List[models.PointStruct]):
+        self._existing(collection_name).upsert(points)
+
+    def update(self, collection_name: str, operations: List):
+        self._existing(collection_name).update(operations)
+
+    def search(self, collection_name: str, embedding: List[float], lexical_query: models.SparseVector,
+               query_filter: Optional[models.Filter], params: models.SearchParams, k: int) -> List[Candidate]:
+        return self.search_batch(collection_name, [embedding], [lexical_query], query_filter, params, k)[0]
+
+    def search_batch(self, collection_name: str, embeddings: List[List[float]],
+                     lexical_queries: List[models.SparseVector], query_filter: Optional[models.Filter],
+                     params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        """Dense search only (lexical_queries are ignored)"""
+        collection = self._collection(collection_name)
+        if collection is None:
+            return [[] for _ in embeddings]
+        queries = _normalized(np.asarray(embeddings, dtype=np.float32))
+        return collection.search(queries, query_filter, bool(params.exact), k)
+
+    def payloads(self, collection_name: str, query_filter: Optional[models.Filter] = None,
+                 fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Whole payloads (fields are not projected)"""
+        return self._existing(collection_name).payloads(query_filter)
+
+    def delete_collection(self, collection_name: str):
+        with self.lock:
+            collection = self.collections.pop(collection_name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(self._directory(collection_name), ignore_errors=True)
+
+    # The async API runs the work in a thread, off the event loop
+
+    async def acollection_exists(self, collection_name: str) -> bool:
+        return await asyncio.to_thread(self.collection_exists, collection_name)
+
+    async def aensure_collection(self, collection_name: str, vector_size: int):
+        await asyncio.to_thread(self.ensure_collection, collection_name, vector_size)
+
+    async def alexical(self, collection_name: str) -> bool:
+        return False
+
+    async def aexisting_points(self, collection_name: str, document_id: str,
+                               user_id: Optional[str] = None) -> Dict[str, Tuple]:
+        return await asyncio.to_thread(self.existing_points, collection_name, document_id, user_id)
+
+    async def aupsert(self, collection_name: str, points: List[models.PointStruct]):
+        await asyncio.to_thread(self.upsert, collection_name, points)
+
+    async def aupdate(self, collection_name: str, operations: List):
+        await asyncio.to_thread(self.update, collection_name, operations)
+
+    async def asearch(self, collection_name: str, embedding: List[float], lexical_query: models.SparseVector,
+                      query_filter: Optional[models.Filter], params: models.SearchParams,
+                      k: int) -> List[Candidate]:
+        return await asyncio.to_thread(
+            self.search, collection_name, embedding, lexical_query, query_filter, params, k
+        )
+
+    async def asearch_batch(self, collection_name: str, embeddings: List[List[float]],
+                            lexical_queries: List[models.SparseVector], query_filter: Optional[models.Filter],
+                            params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        return await asyncio.to_thread(
+            self.search_batch, collection_name, embeddings, lexical_queries, query_filter, params, k
+        )
+
+    def close(self):
+        with self.lock:
+            for collection in self.collections.values():
+                collection.close()
+            self.collections.clear()
@@ -0,0 +1,285 @@
+"""
+Page-sharded PDF Text Extraction
+
+Large agreements are split into page ranges that are extracted in
+parallel by a process pool. Shard results are merged back in page order
+and the character offset of every page in the joined text is kept, so
+chunks can later be mapped back to the page they came from.
+
+The PDF library is pluggable: pypdf is always available, pypdfium2 and
+PyMuPDF are used when installed. The engine is chosen per request or by
+settings.PDF_ENGINE ("auto" picks the fastest installed engine).
+"""
+
+import asyncio
+import importlib.util
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from typing_extensions import TypedDict
+from app.core.config import settings
+
+# Separator used between pages - same as the original " ".join over PyPDFLoader pages
+PAGE_SEPARATOR = " "
+
+
+class ExtractedText(TypedDict):
+    """Merged extraction result"""
+    text: str
+    page_offsets: List[int]  # start offset of each page (1-based page i is at index i-1)
+
+
+class PdfEngine:
+    """
+    Base class for PDF text-extraction engines
+
+    Engines are stateless; every call opens the file itself so calls can
+    run in separate processes with only the path crossing the boundary.
+    """
+    name = ""
+    module = ""  # import name used to check whether the engine is installed
+
+    def is_available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    def count_pages(self, file_path: str) -> int:
+        raise NotImplementedError
+
+    def extract_range(self, file_path: str, start: int, end: int) -> List[str]:
+        """Extract the text of pages [start, end)"""
+        raise NotImplementedError
+
+
+class PypdfEngine(PdfEngine):
+    """Pure-Python pypdf engine (same library PyPDFLoader uses)"""
+    name = "pypdf"
+    module = "pypdf"
+
+    def count_pages(self, file_path: str) -> int:
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+
+    def extract_range(self, file_path: str, start: int, end: int) -> List[str]:
+        from pypdf import PdfReader
+        reader = PdfReader(file_path)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+class PdfiumEngine(PdfEngine):
+    """pypdfium2 engine (PDFium bindings)"""
+    name = "pypdfium2"
+    module = "pypdfium2"
+
+    def count_pages(self, file_path: str) -> int:
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def extract_range(self, file_path: str, start: int, end: int) -> List[str]:
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            pages = []
+            for i in range(start, end):
+                page = pdf[i]
+                text_page = page.get_textpage()
+                pages.append(text_page.get_text_range())
+                text_page.close()
+                page.close()
+            return pages
+        finally:
+            pdf.close()
+
+
+class PyMuPDFEngine(PdfEngine):
+    """PyMuPDF engine (MuPDF bindings)"""
+    name = "pymupdf"
+    module = "pymupdf"
+
+    def count_pages(self, file_path: str) -> int:
+        import pymupdf
+        with pymupdf.open(file_path) as doc:
+            return doc.page_count
+
+    def extract_range(self, file_path: str, start: int, end: int) -> List[str]:
+        import pymupdf
+        with pymupdf.open(file_path) as doc:
+            return [doc.load_page(i).get_text() for i in range(start, end)]
+
+
+# Registered engines
+PDF_ENGINES: Dict[str, PdfEngine] = {
+    engine.name: engine for engine in (PypdfEngine(), PdfiumEngine(), PyMuPDFEngine())
+}
+
+# Fastest first, as measured by benchmarks/bench_pdf_engines.py
+ENGINE_PREFERENCE = ["pypdfium2", "pymupdf", "pypdf"]
+
+
+def available_engines() -> List[str]:
+    """Names of the engines that are installed, fastest first"""
+    return [name for name in ENGINE_PREFERENCE if PDF_ENGINES[name].is_available()]
+
+
+def resolve_engine(name: Optional[str] = None) -> str:
+    """
+    Resolve an engine name
+
+    Args:
+        name (str, optional): Engine name, "auto" or None for settings.PDF_ENGINE
+
+    Returns:
+        str: Name of an installed engine
+
+    Raises:
+        ValueError: If the engine is unknown or not installed
+    """
+    name = (name or settings.PDF_ENGINE).lower()
+    if name == "auto":
+        return available_engines()[0]
+    if name not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine: {name} (choose from {', '.join(PDF_ENGINES)})")
+    if not PDF_ENGINES[name].is_available():
+        raise ValueError(f"PDF engine '{name}' is not installed")
+    return name
+
+
+def count_pages(file_path: str, engine: str = "pypdf") -> int:
+    """Number of pages in a PDF"""
+    return PDF_ENGINES[engine].count_pages(file_path)
+
+
+def extract_page_range(file_path: str, start: int, end: int, engine: str = "pypdf") -> List[str]:
+    """
+    Extract the text of pages [start, end)
+
+    Module-level so it can run inside a process pool. Each shard opens
+    its own document, nothing but the path crosses the process boundary.
+    """
+    return PDF_ENGINES[engine].extract_range(file_path, start, end)
+
+
+def shard_ranges(page_count: int, pages_per_shard: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into consecutive ranges of at most pages_per_shard pages"""
+    pages_per_shard = max(1, pages_per_shard)
+    return [
+        (start, min(start + pages_per_shard, page_count))
+        for start in range(0, page_count, pages_per_shard)
+    ]
+
+
+def merge_pages(shards: List[List[str]]) -> ExtractedText:
+    """Join shard results (already in page order) and record per-page offsets"""
+    page_offsets = []
+    parts = []
+    offset = 0
+    for pages in shards:
+        for page_text in pages:
+            if parts:
+                parts.append(PAGE_SEPARATOR)
+                offset += len(PAGE_SEPARATOR)
+            page_offsets.append(offset)
+            parts.append(page_text)
+            offset += len(page_text)
+    return {"text": "".join(parts), "page_offsets": page_offsets}
+
+
+def extract_pdf(file_path: str, executor: Optional[Executor] = None,
+                pages_per_shard: Optional[int] = None, engine: Optional[str] = None) -> ExtractedText:
+    """
+    Extract a PDF, fanning page ranges out to executor when one is given
+
+    Args:
+        file_path (str): Path of the PDF
+        executor (Executor, optional): Pool to run shards in (serial when None)
+        pages_per_shard (int, optional): Pages per shard (settings.PDF_PAGES_PER_SHARD by default)
+        engine (str, optional): Engine name (settings.PDF_ENGINE by default)
+
+    Returns:
+        ExtractedText: Joined text and per-page offsets
+    """
+    engine = resolve_engine(engine)
+    pages_per_shard = pages_per_shard or settings.PDF_PAGES_PER_SHARD
+    ranges = shard_ranges(count_pages(file_path, engine), pages_per_shard)
+
+    if executor is None or len(ranges) <= 1:
+        shards = [extract_page_range(file_path, start, end, engine) for start, end in ranges]
+    else:
+        # map() yields results in submission order, so pages stay in order
+        shards = list(executor.map(
+            extract_page_range,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [engine] * len(ranges)
+        ))
+    return merge_pages(shards)
+
+
+def iter_pdf_pages(file_path: str, executor: Optional[Executor] = None,
+                   pages_per_shard: Optional[int] = None, engine: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield page texts in order without extracting the whole PDF up front
+
+    With an executor, at most PARSE_WORKERS + 1 shards are in flight ahead
+    of the consumer, so parsing overlaps with whatever the caller does with
+    the pages and memory stays bounded by the lookahead.
+    """
+    engine = resolve_engine(engine)
+    pages_per_shard = pages_per_shard or settings.PDF_PAGES_PER_SHARD
+    ranges = iter(shard_ranges(count_pages(file_path, engine), pages_per_shard))
+
+    if executor is None:
+        for start, end in ranges:
+            yield from extract_page_range(file_path, start, end, engine)
+        return
+
+    pending = deque()
+
+    def submit():
+        shard = next(ranges, None)
+        if shard is not None:
+            pending.append(executor.submit(extract_page_range, file_path, shard[0], shard[1], engine))
+
+    try:
+        for _ in range(settings.PARSE_WORKERS + 1):
+            submit()
+        while pending:
+            pages = pending.popleft().result()
+            submit()
+            yield from pages
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def aiter_pdf_pages(file_path: str, executor: Optional[Executor],
+                          pages_per_shard: Optional[int] = None, engine: Optional[str] = None) -> AsyncIterator[str]:
+    """Async iter_pdf_pages - shards run in executor while the event loop stays free"""
+    engine = resolve_engine(engine)
+    pages_per_shard = pages_per_shard or settings.PDF_PAGES_PER_SHARD
+    loop = asyncio.get_running_loop()
+    page_count = await loop.run_in_executor(executor, count_pages, file_path, engine)
+    ranges = iter(shard_ranges(page_count, pages_per_shard))
+
+    pending = deque()
+
+    def submit():
+        shard = next(ranges, None)
+        if shard is not None:
+            pending.append(loop.run_in_executor(executor, extract_page_range, file_path, shard[0], shard[1], engine))
+
+    try:
+        for _ in range(settings.PARSE_WORKERS + 1):
+            submit()
+        while pending:
+            pages = await pending.popleft()
+            submit()
+            for page_text in pages:
+                yield page_text
+    finally:
+        for future in pending:
+            future.cancel()
\ No newline at end of file
@@ -1,73 +1,177 @@
 from dotenv import load_dotenv
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_qdrant import QdrantVectorStore
-import google.generativeai as genai
 import os
-from typing import Dict
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from langchain_core.documents import Document
+from qdrant_client import models
+from app.core.config import settings
+from app.services.answer_cache import Versions, aget_answer_cache, get_answer_cache
+from app.services.clients import get_client_registry
+from app.services.collections import categories_label, resolve_categories, search_params, shared_storage
+from app.services.context_packer import Candidate, pack_context, packing_stats
+from app.services.embedding_cache import aembed_queries, embed_queries
+from app.services.lexical import query_vector
+from app.services.single_flight import aget_single_flight, flight_key, get_single_flight
+from app.services.vector_index import scope_filter
 
 # Load environment variables
 load_dotenv()
 
+
+class Retrieval:
+    """Outcome of the retrieval step of a query"""
+
+    def __init__(self):
+        self.results: List[Document] = []
+        self.context = ""
+        # Query embedding, set only when the search succeeded (the answer may be cached)
+        self.embedding: Optional[List[float]] = None
+        # Category versions the answer is computed against
+        self.versions: Optional[Versions] = None
+        # Answer from the semantic answer cache
+        self.cached: Optional[Dict] = None
+
+
 class QueryService:
     """Service implementing exact user_query function logic from GenrativeAICode/query.py"""
     
     def __init__(self):
         # EXACT same initialization as query.py
         self.api_key = os.getenv('GEMINI_API_KEY')
+        # Long-lived Qdrant/Gemini clients shared by the whole process
+        self.registry = get_client_registry()
         if self.api_key:
-            genai.configure(api_key=self.api_key)  # Fixed: use actual API key instead of hardcoded
-            self.client = genai
-            self.model = genai.GenerativeModel("gemini-1.5-flash")
+            self.model = self.registry.generative_model()
             self.ai_enabled = True
         else:
             print("⚠️ GEMINI_API_KEY not found - using mock AI responses")
             self.model = None
             self.ai_enabled = False
     
-    def user_query(self, query: str, category: str = "category") -> Dict:
+    def _targets(self, categories: Optional[Sequence[str]],
+                 user_id: Optional[str]) -> List[Tuple[str, Optional[models.Filter]]]:
         """
-        EXACT implementation of user_query function from GenrativeAICode/query.py
-        Only change: use actual API key and parameterized category
+        (collection, filter) pairs to search for some categories (None = all) and a tenant
+
+        Shared storage filters one collection on the indexed category/user_id
+        payload; per-category storage searches the collection of every
+        selected category, filtered on the tenant.
         """
-        if self.ai_enabled and self.api_key:
-            try:
-                embeddings = GoogleGenerativeAIEmbeddings(
-                    model="models/embedding-001",
-                    google_api_key=self.api_key
-                )
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=300)
-                split_docs = text_splitter.create_documents(["content"])
-
-                # Create or append to collection dynamically using category name
-                vector_store = QdrantVectorStore.from_existing_collection(
-                    url="http://localhost:6333",
-                    collection_name=category,  # "contracts" or "policy" or "category"
-                    embedding=embeddings
-                )
-                search_results = vector_store.similarity_search(
-                    query=query,
-                    k=5  # Limit to top 5 results
-                )
-                print(f"✅ Found {len(search_results)} relevant documents in vector DB")
-                
-                # Create context from search results
-                context = "\n\n".join([
-                    f"Page Number: {result.metadata.get('page', 'N/A')}\n"
-                    f"File Location: {result.metadata.get('source', 'N/A')}\n"
-                    f"Page Content:\n{result.page_content}"
-                    for result in search_results
-                ])
-                
-            except Exception as e:
-                print(f"⚠️ Vector search failed: {e}")
-                context = "No relevant documents found in vector store."
-        else:
-            print("📝 AI disabled - using mock context")
-            context = f"Mock context for query about '{query}' in category '{category}'"
+        if shared_storage():
+            return [(settings.SHARED_COLLECTION_NAME, scope_filter(categories, user_id))]
+        names = categories or settings.DOCUMENT_CATEGORIES
+        return [(name, scope_filter(None, user_id)) for name in names]
 
+    @staticmethod
+    def _normalize_scores(candidates: List[Candidate]) -> List[Candidate]:
+        """
+        Min-max normalize the scores of one collection's hits to [0, 1]
+
+        Cosine similarities and RRF scores are on different scales, and a
+        collection searched with the BM25 index (RRF) can sit next to an
+        older dense-only one, so raw scores of different collections are not
+        comparable.
+        """
+        if not candidates:
+            return candidates
+        scores = [candidate.score for candidate in candidates]
+        low, high = min(scores), max(scores)
+        for candidate in candidates:
+            candidate.score = (candidate.score - low) / (high - low) if high > low else 1.0
+        return candidates
+
+    @classmethod
+    def _top_k(cls, results: List[List[Candidate]], k: int) -> List[Candidate]:
+        """Best k hits over all searched collections (scores normalized per collection when merging)"""
+        if len(results) > 1:
+            results = [cls._normalize_scores(hits) for hits in results]
+        candidates = [hit for hits in results for hit in hits]
+        candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+        return candidates[:k]
+
+    @staticmethod
+    def _search_limit() -> int:
+        """Chunks to retrieve (packing candidates, or the top 5 results)"""
+        return settings.CONTEXT_CANDIDATES if settings.CONTEXT_PACKING_ENABLED else 5
+
+    @staticmethod
+    def _pack(candidates: List[Candidate]) -> List[Document]:
+        """Passages that go into the prompt"""
+        if not settings.CONTEXT_PACKING_ENABLED:
+            return [candidate.doc for candidate in candidates]
+        passages = pack_context(candidates)
+        print(f"📦 Packed context: {packing_stats(candidates, passages)}")
+        return passages
+
+    def _search(self, query: str, embedding: List[float], categories: Optional[Sequence[str]],
+                user_id: Optional[str], params: models.SearchParams, k: int = 5) -> List[Candidate]:
+        """Top k chunks for the query (one hybrid search per target collection, run concurrently)"""
+        store = self.registry.vector_backend()
+        lexical_query = query_vector(query)
+        targets = self._targets(categories, user_id)
+        if len(targets) == 1:
+            collection_name, query_filter = targets[0]
+            return self._top_k([store.search(collection_name, embedding, lexical_query, query_filter, params, k)], k)
+        # The stores are thread-safe; the searches wait on the network (or run in numpy) in parallel
+        with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="search") as executor:
+            results = list(executor.map(
+                lambda target: store.search(target[0], embedding, lexical_query, target[1], params, k),
+                targets
+            ))
+        return self._top_k(results, k)
+
+    async def _asearch(self, query: str, embedding: List[float], categories: Optional[Sequence[str]],
+                       user_id: Optional[str], params: models.SearchParams, k: int = 5) -> List[Candidate]:
+        """Async _search - the collections are searched concurrently"""
+        store = self.registry.vector_backend()
+        lexical_query = query_vector(query)
+        results = await asyncio.gather(*[
+            store.asearch(collection_name, embedding, lexical_query, query_filter, params, k)
+            for collection_name, query_filter in self._targets(categories, user_id)
+        ])
+        return self._top_k(list(results), k)
+
+    def _search_batch(self, queries: List[str], embeddings: List[List[float]], categories: Optional[Sequence[str]],
+                      user_id: Optional[str], params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        """Top k chunks of many queries (one batch search per target collection, run concurrently)"""
+        store = self.registry.vector_backend()
+        lexical_queries = [query_vector(query) for query in queries]
+        targets = self._targets(categories, user_id)
+        with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="search") as executor:
+            per_collection = list(executor.map(
+                lambda target: store.search_batch(target[0], embeddings, lexical_queries, target[1], params, k),
+                targets
+            ))
+        return [self._top_k([hits[i] for hits in per_collection], k) for i in range(len(queries))]
+
+    async def _asearch_batch(self, queries: List[str], embeddings: List[List[float]],
+                             categories: Optional[Sequence[str]], user_id: Optional[str],
+                             params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        """Async _search_batch"""
+        store = self.registry.vector_backend()
+        lexical_queries = [query_vector(query) for query in queries]
+        per_collection = await asyncio.gather(*[
+            store.asearch_batch(collection_name, embeddings, lexical_queries, query_filter, params, k)
+            for collection_name, query_filter in self._targets(categories, user_id)
+        ])
+        return [self._top_k([hits[i] for hits in per_collection], k) for i in range(len(queries))]
+
+    @staticmethod
+    def _context(search_results: List[Document]) -> str:
+        """Create context from search results"""
+        return "\n\n".join([
+            f"Page Number: {result.metadata.get('page', 'N/A')}\n"
+            f"File Location: {result.metadata.get('source', 'N/A')}\n"
+            f"Page Content:\n{result.page_content}"
+            for result in search_results
+        ])
+
+    @staticmethod
+    def _system_prompt(query: str, context: str) -> str:
         # EXACT same system prompt - DO NOT CHANGE
-        system_prompt = f"""
+        return f"""
     You are an AI legal assistant that helps users understand complex legal documents.
 
     Your responsibilities:
@@ -86,17 +190,485 @@ class QueryService:
 
     Please provide a simplified, user-friendly answer with page references.
     """
+
+    @staticmethod
+    def _mock_response(query: str, categories: Optional[Sequence[str]]) -> str:
+        """Mock AI response for testing"""
+        return f"Mock response for query: '{query}'. AI service is not available. This would normally provide legal analysis based on uploaded documents in the '{categories_label(categories)}' category."
+
+    @staticmethod
+    def _sources(search_results: List[Document]) -> List[Dict]:
+        """Where each retrieved chunk comes from (sent ahead of the streamed answer)"""
+        return [
+            {
+                "document_id": result.metadata.get("document_id"),
+                "category": result.metadata.get("category"),
+                "page": result.metadata.get("page")
+            }
+            for result in search_results
+        ]
+
+    @staticmethod
+    def _cached_result(query: str, cached: Dict) -> Dict:
+        print("⚡ Answered from the semantic answer cache")
+        return {
+            "query": query,
+            "response": cached["response"],
+            "found_documents": cached["found_documents"],
+            "cached": True
+        }
+
+    def _remember(self, retrieval: Retrieval, categories: Optional[Sequence[str]], user_id: Optional[str],
+                  response: str):
+        """Cache a generated answer (only when the search itself succeeded)"""
+        cache = get_answer_cache()
+        if cache is not None and retrieval.embedding is not None:
+            cache.put(retrieval.embedding, categories, user_id, {
+                "response": response,
+                "found_documents": len(retrieval.results),
+                "sources": self._sources(retrieval.results)
+            }, retrieval.versions)
+
+    def _retrieve(self, query: str, categories: Optional[Sequence[str]], user_id: Optional[str],
+                  params: models.SearchParams) -> Retrieval:
+        """Cached answer, or search results and prompt context"""
+        retrieval = Retrieval()
+        if self.registry.embeddings_available():
+            try:
+                embedding = self.registry.embeddings().embed_query(query)
+                cache = get_answer_cache()
+                if cache is not None:
+                    retrieval.versions = cache.current_versions(categories)
+                    retrieval.cached = cache.get(embedding, categories, user_id, retrieval.versions)
+                    if retrieval.cached:
+                        return retrieval
+                candidates = self._search(query, embedding, categories, user_id, params, k=self._search_limit())
+                retrieval.results = self._pack(candidates)
+                print(f"✅ Found {len(retrieval.results)} relevant documents in vector DB")
+                retrieval.context = self._context(retrieval.results)
+                retrieval.embedding = embedding
+            except Exception as e:
+                print(f"⚠️ Vector search failed: {e}")
+                retrieval.context = "No relevant documents found in vector store."
+        else:
+            print("📝 AI disabled - using mock context")
+            retrieval.context = f"Mock context for query about '{query}' in category '{categories_label(categories)}'"
+        return retrieval
+
+    async def _aretrieve(self, query: str, categories: Optional[Sequence[str]], user_id: Optional[str],
+                         params: models.SearchParams) -> Retrieval:
+        """Async _retrieve"""
+        retrieval = Retrieval()
+        if self.registry.embeddings_available():
+            try:
+                embedding = await self.registry.embeddings().aembed_query(query)
+                cache = await aget_answer_cache()
+                if cache is not None:
+                    # May be a Valkey round trip - keep it off the event loop
+                    retrieval.versions = await asyncio.to_thread(cache.current_versions, categories)
+                    retrieval.cached = cache.get(embedding, categories, user_id, retrieval.versions)
+                    if retrieval.cached:
+                        return retrieval
+                candidates = await self._asearch(query, embedding, categories, user_id, params, k=self._search_limit())
+                retrieval.results = self._pack(candidates)
+                print(f"✅ Found {len(retrieval.results)} relevant documents in vector DB")
+                retrieval.context = self._context(retrieval.results)
+                retrieval.embedding = embedding
+            except Exception as e:
+                print(f"⚠️ Vector search failed: {e}")
+                retrieval.context = "No relevant documents found in vector store."
+        else:
+            print("📝 AI disabled - using mock context")
+            retrieval.context = f"Mock context for query about '{query}' in category '{categories_label(categories)}'"
+        return retrieval
+
+    def user_query(self, query: str, category: Union[str, Sequence[str], None] = None,
+                   user_id: Optional[str] = None,
+                   hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                   rescore: Optional[bool] = None, oversampling: Optional[float] = None) -> Dict:
+        """
+        EXACT implementation of user_query function from GenrativeAICode/query.py
+        Only change: use actual API key and parameterized category
+
+        category is "contracts", "policy", several categories (a list or
+        "contracts,policy") or None/"all" for every category. The collections
+        of several categories are searched concurrently and their hits merged
+        into one top k before a single generation call;
+        user_id restricts the search to one tenant's documents. hnsw_ef,
+        exact, rescore and oversampling tune the vector search (see
+        collections.search_params); None uses the QDRANT_SEARCH_* settings.
+        Near-duplicate questions are answered from the semantic answer cache,
+        and identical questions asked at the same time share one computation
+        (see single_flight).
+
+        Blocking; the API uses auser_query, this is for the RQ worker.
+        """
+        # Unknown categories are rejected before anything is searched
+        categories = resolve_categories(category)
+        params = search_params(hnsw_ef, exact, rescore, oversampling)
+        flight = get_single_flight()
+        if flight is None:
+            return self._answer(query, categories, user_id, params)
+        result = flight.do(flight_key(query, categories, user_id, params),
+                           lambda: self._answer(query, categories, user_id, params))
+        # Coalesced callers may have phrased the question slightly differently
+        result["query"] = query
+        return result
+
+    def _answer(self, query: str, categories: Optional[Sequence[str]], user_id: Optional[str],
+                params: models.SearchParams) -> Dict:
+        """Retrieval and generation of user_query"""
+        retrieval = self._retrieve(query, categories, user_id, params)
+        if retrieval.cached:
+            return self._cached_result(query, retrieval.cached)
+
+        system_prompt = self._system_prompt(query, retrieval.context)
         
         if self.ai_enabled and self.model:
             # Use the model directly, not client.models
             response = self.model.generate_content(system_prompt)
             ai_response = response.candidates[0].content.parts[0].text
+            self._remember(retrieval, categories, user_id, ai_response)
         else:
-            # Mock AI response for testing
-            ai_response = f"Mock response for query: '{query}'. AI service is not available. This would normally provide legal analysis based on uploaded documents in the '{category}' category."
+            ai_response = self._mock_response(query, categories)
         
         return {
             "query": query,
             "response": ai_response,
-            "found_documents": len(search_results)
-        }
\ No newline at end of file
+            "found_documents": len(retrieval.results)
+        }
+
+    async def auser_query(self, query: str, category: Union[str, Sequence[str], None] = None,
+                          user_id: Optional[str] = None,
+                          hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                          rescore: Optional[bool] = None, oversampling: Optional[float] = None) -> Dict:
+        """
+        Async user_query - retrieval runs on the AsyncQdrantClient and generation
+        on Gemini's async API, so a slow call never blocks the event loop.
+        Concurrent Qdrant searches and Gemini generations are bounded per
+        process by QDRANT_MAX_CONCURRENCY and GEMINI_MAX_CONCURRENCY.
+        """
+        categories = resolve_categories(category)
+        params = search_params(hnsw_ef, exact, rescore, oversampling)
+        flight = await aget_single_flight()
+        if flight is None:
+            return await self._aanswer(query, categories, user_id, params)
+        result = await flight.ado(flight_key(query, categories, user_id, params),
+                                  lambda: self._aanswer(query, categories, user_id, params))
+        result["query"] = query
+        return result
+
+    async def _aanswer(self, query: str, categories: Optional[Sequence[str]], user_id: Optional[str],
+                       params: models.SearchParams) -> Dict:
+        """Async _answer"""
+        retrieval = await self._aretrieve(query, categories, user_id, params)
+        if retrieval.cached:
+            return self._cached_result(query, retrieval.cached)
+
+        system_prompt = self._system_prompt(query, retrieval.context)
+
+        if self.ai_enabled and self.model:
+            async with self.registry.semaphore("gemini"):
+                response = await self.model.generate_content_async(system_prompt)
+            ai_response = response.candidates[0].content.parts[0].text
+            self._remember(retrieval, categories, user_id, ai_response)
+        else:
+            ai_response = self._mock_response(query, categories)
+
+        return {
+            "query": query,
+            "response": ai_response,
+            "found_documents": len(retrieval.results)
+        }
+
+    def stream_query(self, query: str, category: Union[str, Sequence[str], None] = None,
+                     user_id: Optional[str] = None,
+                     hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                     rescore: Optional[bool] = None, oversampling: Optional[float] = None) -> AsyncIterator[Dict]:
+        """
+        Streaming auser_query
+
+        The arguments are validated right away (ValueError for an unknown
+        category), before any event is produced. The returned iterator yields
+        {"event", "data"} dicts: one "retrieval" event with the search
+        results, a "token" event per generated text chunk and a final "done".
+        A cached answer arrives as a single "token" event.
+        """
+        categories = resolve_categories(category)
+        return self._astream(query, categories, user_id, search_params(hnsw_ef, exact, rescore, oversampling))
+
+    async def _astream(self, query: str, categories: Optional[Sequence[str]], user_id: Optional[str],
+                       params: models.SearchParams) -> AsyncIterator[Dict]:
+        retrieval = await self._aretrieve(query, categories, user_id, params)
+        if retrieval.cached:
+            print("⚡ Answered from the semantic answer cache")
+            yield {"event": "retrieval", "data": {
+                "query": query,
+                "category": categories_label(categories),
+                "found_documents": retrieval.cached["found_documents"],
+                "sources": retrieval.cached["sources"],
+                "cached": True
+            }}
+            yield {"event": "token", "data": {"text": retrieval.cached["response"]}}
+            yield {"event": "done", "data": {
+                "found_documents": retrieval.cached["found_documents"],
+                "response_length": len(retrieval.cached["response"])
+            }}
+            return
+
+        yield {"event": "retrieval", "data": {
+            "query": query,
+            "category": categories_label(categories),
+            "found_documents": len(retrieval.results),
+            "sources": self._sources(retrieval.results),
+            "cached": False
+        }}
+
+        system_prompt = self._system_prompt(query, retrieval.context)
+        length = 0
+        if self.ai_enabled and self.model:
+            parts = []
+            # The slot is held until the whole answer has streamed
+            async with self.registry.semaphore("gemini"):
+                response = await self.model.generate_content_async(system_prompt, stream=True)
+                async for chunk in response:
+                    if not chunk.candidates:
+                        continue
+                    text = "".join(part.text for part in chunk.candidates[0].content.parts)
+                    if text:
+                        parts.append(text)
+                        length += len(text)
+                        yield {"event": "token", "data": {"text": text}}
+            self._remember(retrieval, categories, user_id, "".join(parts))
+        else:
+            text = self._mock_response(query, categories)
+            length = len(text)
+            yield {"event": "token", "data": {"text": text}}
+
+        yield {"event": "done", "data": {"found_documents": len(retrieval.results), "response_length": length}}
+
+    @staticmethod
+    def _elapsed_ms(started: float) -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    def check_batch(self, queries: List[str],
+                    category: Union[str, Sequence[str], None] = None) -> Optional[Tuple[str, ...]]:
+        """
+        Validate a batch before any work is done (also used before queueing one)
+
+        Returns:
+            The categories to search (None for every category)
+
+        Raises:
+            ValueError: empty batch, blank question, too many questions or unknown category
+        """
+        if not queries:
+            raise ValueError("At least one query is required")
+        if len(queries) > settings.BATCH_QUERY_MAX_QUESTIONS:
+            raise ValueError(f"At most {settings.BATCH_QUERY_MAX_QUESTIONS} queries per batch, got {len(queries)}")
+        if any(not query.strip() for query in queries):
+            raise ValueError("Queries cannot be empty")
+        return resolve_categories(category)
+
+    def _batch_lookup(self, embeddings: List[List[float]], categories: Optional[Sequence[str]],
+                      user_id: Optional[str], versions: Optional[Versions]) -> List[Retrieval]:
+        """Retrievals of a batch with the answers the semantic answer cache already has"""
+        cache = get_answer_cache()
+        retrievals = []
+        for embedding in embeddings:
+            retrieval = Retrieval()
+            retrieval.versions = versions
+            if cache is not None:
+                retrieval.cached = cache.get(embedding, categories, user_id, versions)
+            retrievals.append(retrieval)
+        return retrievals
+
+    def _batch_context(self, retrievals: List[Retrieval], pending: List[int], embeddings: List[List[float]],
+                       hits: List[List[Candidate]]):
+        for i, candidates in zip(pending, hits):
+            retrievals[i].results = self._pack(candidates)
+            retrievals[i].context = self._context(retrievals[i].results)
+            retrievals[i].embedding = embeddings[i]
+
+    def _mock_batch(self, queries: List[str], categories: Optional[Sequence[str]]) -> List[Retrieval]:
+        print("📝 AI disabled - using mock context")
+        retrievals = []
+        for query in queries:
+            retrieval = Retrieval()
+            retrieval.context = f"Mock context for query about '{query}' in category '{categories_label(categories)}'"
+            retrievals.append(retrieval)
+        return retrievals
+
+    @staticmethod
+    def _search_failed(retrievals: List[Retrieval], error: Exception):
+        print(f"⚠️ Vector search failed: {error}")
+        for retrieval in retrievals:
+            if not retrieval.cached and retrieval.embedding is None:
+                retrieval.context = "No relevant documents found in vector store."
+
+    def _batch_retrieve(self, queries: List[str], categories: Optional[Sequence[str]], user_id: Optional[str],
+                        params: models.SearchParams, timings: Dict) -> List[Retrieval]:
+        """
+        Retrieval step of a batch: one batched embedding call, the answer
+        cache, then one Qdrant batch search per collection for the rest
+        """
+        if not self.registry.embeddings_available():
+            return self._mock_batch(queries, categories)
+        retrievals = [Retrieval() for _ in queries]
+        try:
+            started = time.perf_counter()
+            embeddings = embed_queries(self.registry.embeddings(), queries)
+            timings["embedding_ms"] = self._elapsed_ms(started)
+            cache = get_answer_cache()
+            versions = cache.current_versions(categories) if cache is not None else None
+            retrievals = self._batch_lookup(embeddings, categories, user_id, versions)
+
+            started = time.perf_counter()
+            pending = [i for i, retrieval in enumerate(retrievals) if not retrieval.cached]
+            if pending:
+                hits = self._search_batch([queries[i] for i in pending], [embeddings[i] for i in pending],
+                                          categories, user_id, params, self._search_limit())
+                self._batch_context(retrievals, pending, embeddings, hits)
+            timings["search_ms"] = self._elapsed_ms(started)
+        except Exception as e:
+            self._search_failed(retrievals, e)
+        return retrievals
+
+    async def _abatch_retrieve(self, queries: List[str], categories: Optional[Sequence[str]],
+                               user_id: Optional[str], params: models.SearchParams, timings: Dict) -> List[Retrieval]:
+        """Async _batch_retrieve"""
+        if not self.registry.embeddings_available():
+            return self._mock_batch(queries, categories)
+        retrievals = [Retrieval() for _ in queries]
+        try:
+            started = time.perf_counter()
+            embeddings = await aembed_queries(self.registry.embeddings(), queries)
+            timings["embedding_ms"] = self._elapsed_ms(started)
+            cache = await aget_answer_cache()
+            versions = None
+            if cache is not None:
+                versions = await asyncio.to_thread(cache.current_versions, categories)
+            retrievals = self._batch_lookup(embeddings, categories, user_id, versions)
+
+            started = time.perf_counter()
+            pending = [i for i, retrieval in enumerate(retrievals) if not retrieval.cached]
+            if pending:
+                hits = await self._asearch_batch([queries[i] for i in pending], [embeddings[i] for i in pending],
+                                                 categories, user_id, params, self._search_limit())
+                self._batch_context(retrievals, pending, embeddings, hits)
+            timings["search_ms"] = self._elapsed_ms(started)
+        except Exception as e:
+            self._search_failed(retrievals, e)
+        return retrievals
+
+    @staticmethod
+    def _batch_result(query: str, retrieval: Retrieval, response: str, started: float,
+                      error: Optional[str] = None) -> Dict:
+        result = {
+            "query": query,
+            "response": response,
+            "found_documents": len(retrieval.results),
+            "cached": False,
+            "generation_ms": QueryService._elapsed_ms(started)
+        }
+        if retrieval.cached:
+            result.update(found_documents=retrieval.cached["found_documents"], cached=True)
+        if error:
+            result["error"] = error
+        return result
+
+    def _batch_answer(self, query: str, retrieval: Retrieval, categories: Optional[Sequence[str]],
+                      user_id: Optional[str]) -> Dict:
+        """Answer one question of a batch (failures are reported per question)"""
+        started = time.perf_counter()
+        if retrieval.cached:
+            return self._batch_result(query, retrieval, retrieval.cached["response"], started)
+        try:
+            if self.ai_enabled and self.model:
+                response = self.model.generate_content(self._system_prompt(query, retrieval.context))
+                ai_response = response.candidates[0].content.parts[0].text
+                self._remember(retrieval, categories, user_id, ai_response)
+            else:
+                ai_response = self._mock_response(query, categories)
+        except Exception as e:
+            return self._batch_result(query, retrieval, "", started, f"Failed to process query: {str(e)}")
+        return self._batch_result(query, retrieval, ai_response, started)
+
+    async def _abatch_answer(self, query: str, retrieval: Retrieval, categories: Optional[Sequence[str]],
+                             user_id: Optional[str], slots: asyncio.Semaphore) -> Dict:
+        """Async _batch_answer"""
+        async with slots:
+            started = time.perf_counter()
+            if retrieval.cached:
+                return self._batch_result(query, retrieval, retrieval.cached["response"], started)
+            try:
+                if self.ai_enabled and self.model:
+                    async with self.registry.semaphore("gemini"):
+                        response = await self.model.generate_content_async(
+                            self._system_prompt(query, retrieval.context)
+                        )
+                    ai_response = response.candidates[0].content.parts[0].text
+                    self._remember(retrieval, categories, user_id, ai_response)
+                else:
+                    ai_response = self._mock_response(query, categories)
+            except Exception as e:
+                return self._batch_result(query, retrieval, "", started, f"Failed to process query: {str(e)}")
+            return self._batch_result(query, retrieval, ai_response, started)
+
+    def user_query_batch(self, queries: List[str], category: Union[str, Sequence[str], None] = None,
+                         user_id: Optional[str] = None,
+                         hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                         rescore: Optional[bool] = None, oversampling: Optional[float] = None) -> Dict:
+        """
+        Answer a checklist of questions about the same documents
+
+        All questions are embedded in one batched call and searched with one
+        Qdrant batch search per collection; the answers are generated with at
+        most BATCH_QUERY_CONCURRENCY generations at a time. A failed answer is
+        reported on its question and does not fail the batch.
+
+        Blocking; the API uses auser_query_batch, this is for the RQ worker.
+
+        Returns:
+            Dict: category, count, results (query, response, found_documents,
+            cached, generation_ms and error, in question order) and the
+            timings of the batch in milliseconds
+        """
+        categories = self.check_batch(queries, category)
+        params = search_params(hnsw_ef, exact, rescore, oversampling)
+        started = time.perf_counter()
+        timings = {"embedding_ms": 0.0, "search_ms": 0.0}
+        retrievals = self._batch_retrieve(queries, categories, user_id, params, timings)
+
+        generation_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=settings.BATCH_QUERY_CONCURRENCY, thread_name_prefix="answer") as executor:
+            results = list(executor.map(
+                lambda pair: self._batch_answer(pair[0], pair[1], categories, user_id),
+                zip(queries, retrievals)
+            ))
+        timings["generation_ms"] = self._elapsed_ms(generation_started)
+        timings["total_ms"] = self._elapsed_ms(started)
+        return {"category": categories_label(categories), "count": len(results), "results": results,
+                "timings": timings}
+
+    async def auser_query_batch(self, queries: List[str], category: Union[str, Sequence[str], None] = None,
+                                user_id: Optional[str] = None,
+                                hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                                rescore: Optional[bool] = None, oversampling: Optional[float] = None) -> Dict:
+        """Async user_query_batch"""
+        categories = self.check_batch(queries, category)
+        params = search_params(hnsw_ef, exact, rescore, oversampling)
+        started = time.perf_counter()
+        timings = {"embedding_ms": 0.0, "search_ms": 0.0}
+        retrievals = await self._abatch_retrieve(queries, categories, user_id, params, timings)
+
+        generation_started = time.perf_counter()
+        slots = asyncio.Semaphore(settings.BATCH_QUERY_CONCURRENCY)
+        results = await asyncio.gather(*[
+            self._abatch_answer(query, retrieval, categories, user_id, slots)
+            for query, retrieval in zip(queries, retrievals)
+        ])
+        timings["generation_ms"] = self._elapsed_ms(generation_started)
+        timings["total_ms"] = self._elapsed_ms(started)
+        return {"category": categories_label(categories), "count": len(results), "results": list(results),
+                "timings": timings}
\ No newline at end of file
@@ -9,10 +9,13 @@ Simple and beginner-friendly implementation.
 
 import uuid
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 from Queue.connection import get_chat_queue, get_document_queue, get_default_queue, check_queue_health
-from Queue.worker import process_chat_query, process_document_upload, health_check_job
-from app.models.job_tracking import JobTracker, JobType, JobStatus
+from app.models.job_tracking import JobType, JobStatus, get_job_tracker
+from app.services.blob_store import BlobRef, get_blob_store
+
+# Worker functions are enqueued by import path, so the API process never
+# imports Queue.worker (and the AI services it loads)
 
 
 class QueueService:
@@ -25,16 +28,18 @@ class QueueService:
     
     def __init__(self):
         """Initialize the queue service"""
-        self.job_tracker = JobTracker()
+        self.job_tracker = get_job_tracker()
         print("🔧 Queue Service initialized")
     
-    def submit_chat_query(self, query_text: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    def submit_chat_query(self, query_text: str, user_id: Optional[str] = None,
+                          category: Union[str, List[str], None] = None) -> Dict[str, Any]:
         """
         Submit a chat query for background processing
         
         Args:
             query_text (str): The user's query text
-            user_id (str, optional): User identifier
+            user_id (str, optional): User identifier (scopes the search to the user's documents)
+            category (str or list, optional): Category or categories to search (all categories if omitted)
             
         Returns:
             Dict: Job submission result with job_id
@@ -46,6 +51,7 @@ class QueueService:
             # Prepare job data
             job_data = {
                 'query': query_text,
+                'category': category,
                 'user_id': user_id,
                 'submitted_at': time.time()
             }
@@ -60,7 +66,7 @@ class QueueService:
             
             # Enqueue the job
             rq_job = chat_queue.enqueue(
-                process_chat_query,
+                'Queue.worker.process_chat_query',
                 job_id,
                 job_data,
                 job_timeout='5m'  # 5 minute timeout
@@ -84,15 +90,81 @@ class QueueService:
                 'status': 'failed'
             }
     
-    def submit_document_upload(self, file_content: str, filename: str, 
-                             user_id: Optional[str] = None) -> Dict[str, Any]:
+    def submit_batch_query(self, queries: List[str], user_id: Optional[str] = None,
+                           category: Union[str, List[str], None] = None,
+                           search: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Submit a checklist of questions for background processing
+        
+        Args:
+            queries (List[str]): The questions
+            user_id (str, optional): User identifier (scopes the search to the user's documents)
+            category (str or list, optional): Category or categories to search (all categories if omitted)
+            search (dict, optional): Search parameters (hnsw_ef, exact, rescore, oversampling)
+            
+        Returns:
+            Dict: Job submission result with job_id
+        """
+        try:
+            # Generate unique job ID
+            job_id = f"batch_{uuid.uuid4().hex[:8]}_{int(time.time())}"
+            
+            # Prepare job data
+            job_data = {
+                'queries': queries,
+                'category': category,
+                'user_id': user_id,
+                'search': search or {},
+                'submitted_at': time.time()
+            }
+            
+            # Create job record in MongoDB
+            self.job_tracker.create_job(job_id, JobType.BATCH_QUERY, job_data)
+            
+            # Submit job to queue
+            chat_queue = get_chat_queue()
+            if not chat_queue:
+                raise Exception("Chat queue not available")
+            
+            # Enqueue the job
+            rq_job = chat_queue.enqueue(
+                'Queue.worker.process_batch_query',
+                job_id,
+                job_data,
+                job_timeout='15m'  # Checklists of up to BATCH_QUERY_MAX_QUESTIONS questions
+            )
+            
+            print(f"📤 Batch query submitted: {job_id} ({len(queries)} questions)")
+            
+            return {
+                'job_id': job_id,
+                'status': 'submitted',
+                'message': f'Batch of {len(queries)} queries submitted for processing',
+                'estimated_wait_time': '30 seconds - 2 minutes'
+            }
+            
+        except Exception as e:
+            error_msg = f"Failed to submit batch query: {str(e)}"
+            print(f"❌ {error_msg}")
+            
+            return {
+                'error': error_msg,
+                'status': 'failed'
+            }
+    
+    def submit_document_upload(self, blob: BlobRef, filename: str, 
+                             user_id: Optional[str] = None,
+                             engine: Optional[str] = None,
+                             document_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Submit a document upload for background processing
         
         Args:
-            file_content (str): Document content
+            blob (BlobRef): Reference to the upload in the blob store shared with the worker
             filename (str): Name of the uploaded file
             user_id (str, optional): User identifier
+            engine (str, optional): PDF extraction engine
+            document_id (str, optional): Stable document ID for incremental re-ingest
             
         Returns:
             Dict: Job submission result with job_id
@@ -103,8 +175,10 @@ class QueueService:
             
             # Prepare job data
             job_data = {
-                'content': file_content,
+                'blob': blob,
                 'filename': filename,
+                'engine': engine,
+                'document_id': document_id,
                 'user_id': user_id,
                 'submitted_at': time.time()
             }
@@ -119,7 +193,7 @@ class QueueService:
             
             # Enqueue the job
             rq_job = document_queue.enqueue(
-                process_document_upload,
+                'Queue.worker.process_document_upload',
                 job_id,
                 job_data,
                 job_timeout='10m'  # 10 minute timeout for documents
@@ -165,7 +239,7 @@ class QueueService:
             
             # Enqueue the job
             rq_job = default_queue.enqueue(
-                health_check_job,
+                'Queue.worker.health_check_job',
                 job_id,
                 job_timeout='30s'  # 30 second timeout
             )
@@ -316,9 +390,12 @@ class QueueService:
         """
         try:
             deleted_count = self.job_tracker.cleanup_old_jobs(days)
+            # Uploads of cleaned-up jobs are not needed for retries anymore
+            deleted_blobs = get_blob_store().prune(days * 24 * 60 * 60)
             
             return {
                 'deleted_jobs': deleted_count,
+                'deleted_blobs': deleted_blobs,
                 'days_threshold': days,
                 'status': 'success',
                 'message': f'Cleaned up {deleted_count} old jobs'
@@ -0,0 +1,284 @@
+"""
+Single-Flight Query Coalescing
+
+When many users ask the same question at once (a policy change
+announcement, an incident), every request would run its own embedding,
+Qdrant search and Gemini generation. Identical queries - same normalized
+text, categories, tenant and search parameters - that are in flight at the
+same time share one computation instead:
+
+- inside a process, the first caller (the leader) computes the answer and
+  concurrent callers wait for it;
+- across processes (API replicas, RQ workers), the leader holds a Valkey
+  lock while it computes and publishes the answer under a result key for
+  SINGLE_FLIGHT_RESULT_TTL_SECONDS; callers in other processes poll for the
+  result and take over if the lock expires without one.
+
+Without Valkey, queries are only coalesced per process.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+import weakref
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+from qdrant_client import models
+from app.core.config import settings
+
+# Valkey key prefixes of the leader locks and the published results
+LOCK_KEY_PREFIX = "single_flight:lock:"
+RESULT_KEY_PREFIX = "single_flight:result:"
+
+# Deletes the lock only if this leader still holds it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_TRAILING_PUNCTUATION_RE = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Query text as compared for coalescing (case, whitespace and trailing punctuation ignored)"""
+    return _TRAILING_PUNCTUATION_RE.sub("", " ".join(query.lower().split()))
+
+
+def flight_key(query: str, categories: Optional[Sequence[str]], user_id: Optional[str],
+               params: models.SearchParams) -> str:
+    """Key shared by queries that have the same answer"""
+    raw = json.dumps([
+        normalize_query(query),
+        list(categories or []),
+        user_id or "",
+        params.model_dump(mode="json", exclude_none=True)
+    ], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """An in-flight computation of the blocking path"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent computations with the same key"""
+
+    def __init__(self, redis_connection=None):
+        self.redis = redis_connection
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        # Futures are bound to their event loop, so async flights are tracked per loop
+        self.futures: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = \
+            weakref.WeakKeyDictionary()
+        self._release = self.redis.register_script(_RELEASE_SCRIPT) if self.redis is not None else None
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _count(self, leader: bool):
+        with self.lock:
+            if leader:
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+    # Cross-process coordination through Valkey
+
+    def _try_lead(self, key: str, token: str) -> Optional[Dict]:
+        """
+        One attempt to get the answer of another process or become the leader
+
+        Returns:
+            Optional[Dict]: {"result": ...} when another process published the
+            answer, {} when this process holds the lock, None to keep waiting
+        """
+        published = self.redis.get(RESULT_KEY_PREFIX + key)
+        if published is not None:
+            return {"result": json.loads(published)}
+        ttl_ms = int(settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS * 1000)
+        if self.redis.set(LOCK_KEY_PREFIX + key, token, nx=True, px=ttl_ms):
+            # The previous leader may have published between the two calls
+            published = self.redis.get(RESULT_KEY_PREFIX + key)
+            if published is not None:
+                self._release(keys=[LOCK_KEY_PREFIX + key], args=[token])
+                return {"result": json.loads(published)}
+            return {}
+        return None
+
+    def _publish(self, key: str, token: str, result: Optional[Dict]):
+        """Publish the leader's answer (None when it failed) and release the lock"""
+        try:
+            if result is not None:
+                ttl_ms = int(settings.SINGLE_FLIGHT_RESULT_TTL_SECONDS * 1000)
+                self.redis.set(RESULT_KEY_PREFIX + key, json.dumps(result), px=ttl_ms)
+            self._release(keys=[LOCK_KEY_PREFIX + key], args=[token])
+        except Exception as e:
+            print(f"⚠️ Failed to publish coalesced query result: {e}")
+
+    def _shared(self, key: str, compute: Callable[[], Dict]) -> Dict:
+        if self.redis is None:
+            return compute()
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+        while True:
+            try:
+                outcome = self._try_lead(key, token)
+            except Exception as e:
+                print(f"⚠️ Query coalescing across processes unavailable: {e}")
+                return compute()
+            if outcome is not None:
+                break
+            if time.monotonic() > deadline:
+                return compute()  # The leader is stuck; do not wait any longer
+            time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL_SECONDS)
+        if "result" in outcome:
+            self._count(False)
+            return outcome["result"]
+
+        result = None
+        try:
+            result = compute()
+            return result
+        finally:
+            self._publish(key, token, result)
+
+    async def _ashared(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        if self.redis is None:
+            return await compute()
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+        while True:
+            try:
+                # Valkey round trips - keep them off the event loop
+                outcome = await asyncio.to_thread(self._try_lead, key, token)
+            except Exception as e:
+                print(f"⚠️ Query coalescing across processes unavailable: {e}")
+                return await compute()
+            if outcome is not None:
+                break
+            if time.monotonic() > deadline:
+                return await compute()
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL_SECONDS)
+        if "result" in outcome:
+            self._count(False)
+            return outcome["result"]
+
+        result = None
+        try:
+            result = await compute()
+            return result
+        finally:
+            await asyncio.to_thread(self._publish, key, token, result)
+
+    # In-process coalescing
+
+    def do(self, key: str, compute: Callable[[], Dict]) -> Dict:
+        """Result of compute(), shared with every concurrent call with the same key"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            self._count(False)
+            return dict(call.result)
+
+        self._count(True)
+        try:
+            call.result = self._shared(key, compute)
+            return dict(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Async do - callers on the same event loop share one computation"""
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            futures = self.futures.setdefault(loop, {})
+        while key in futures:
+            future = futures[key]
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue  # The leader was cancelled (client went away) - take over
+                raise
+            self._count(False)
+            return dict(result)
+
+        future = loop.create_future()
+        # Mark the outcome as retrieved even when nobody else waited for it
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        futures[key] = future
+        self._count(True)
+        try:
+            result = await self._ashared(key, compute)
+            future.set_result(result)
+            return dict(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            futures.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "in_flight": len(self.calls) + sum(len(futures) for futures in self.futures.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced
+            }
+
+
+# Process-wide coalescer (created lazily)
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Get the shared coalescer, or None when coalescing is disabled"""
+    global _single_flight
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            redis_connection = None
+            try:
+                from Queue.connection import queue_connection
+                if queue_connection.is_connected():
+                    redis_connection = queue_connection.redis_connection
+            except ImportError:
+                pass
+            if redis_connection is None:
+                print("⚠️ Valkey not available - identical queries are only coalesced per process")
+            _single_flight = SingleFlight(redis_connection)
+    return _single_flight
+
+
+async def aget_single_flight() -> Optional[SingleFlight]:
+    """Async get_single_flight (the first call may wait for Valkey)"""
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return None
+    if _single_flight is not None:
+        return _single_flight
+    return await asyncio.to_thread(get_single_flight)
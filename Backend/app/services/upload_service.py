@@ -0,0 +1,141 @@
+"""
+Upload Service for Legal AI Assistant
+
+Streams uploaded files to disk in fixed-size chunks so memory use per
+upload stays constant no matter how large the document is. The file type
+is sniffed from the first bytes and the size limit is enforced while
+streaming, so bad uploads are rejected before the rest is read.
+"""
+
+import codecs
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+from fastapi import UploadFile
+from app.core.config import settings
+
+
+class UploadError(ValueError):
+    """Raised when an upload is rejected"""
+    status_code = 400
+
+
+class UploadTooLargeError(UploadError):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES"""
+    status_code = 413
+
+
+class UnsupportedFileTypeError(UploadError):
+    """Raised when the extension or the file content is not supported"""
+    status_code = 415
+
+
+def sniff_file_type(head: bytes, ext: str):
+    """
+    Check that the first bytes of a file match its extension
+
+    Args:
+        head (bytes): First bytes of the file
+        ext (str): Lower-case file extension ('.pdf' or '.txt')
+
+    Raises:
+        UnsupportedFileTypeError: If the content does not match the extension
+    """
+    if ext == ".pdf":
+        # The PDF header may be preceded by junk, but must be within the first 1024 bytes
+        if b"%PDF-" not in head[:1024]:
+            raise UnsupportedFileTypeError("File does not look like a PDF document")
+    elif ext == ".txt":
+        if b"\x00" in head or head.lstrip().startswith(b"%PDF-"):
+            raise UnsupportedFileTypeError("File does not look like a text document")
+        try:
+            # Incremental decode so a multi-byte character cut at the boundary is fine
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        except UnicodeDecodeError:
+            raise UnsupportedFileTypeError("Text documents must be UTF-8 encoded")
+    else:
+        raise UnsupportedFileTypeError(f"Unsupported file type: {ext}")
+
+
+async def spool_upload(file: UploadFile, directory: Optional[str] = None, digest=None) -> str:
+    """
+    Stream an uploaded file to a spool file on disk
+
+    Args:
+        file (UploadFile): Uploaded file
+        directory (str, optional): Directory for the spool file (system temp dir by default)
+        digest (optional): hashlib object updated with every chunk written
+
+    Returns:
+        str: Path of the spool file (the caller is responsible for removing it)
+
+    Raises:
+        UploadError: If the file is too large or its type is not supported
+    """
+    ext = Path(file.filename or "").suffix.lower()
+    if ext not in settings.SUPPORTED_FILE_TYPES:
+        raise UnsupportedFileTypeError(f"Unsupported file type: {ext}")
+
+    # Reject early when the client told us the size
+    if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit")
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    spool = tempfile.NamedTemporaryFile(delete=False, suffix=ext, dir=directory)
+    try:
+        with spool:
+            head = await file.read(settings.UPLOAD_SNIFF_BYTES)
+            sniff_file_type(head, ext)
+            spool.write(head)
+            if digest is not None:
+                digest.update(head)
+            total = len(head)
+
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                total += len(chunk)
+                if total > settings.MAX_UPLOAD_BYTES:
+                    raise UploadTooLargeError(f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit")
+                spool.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+
+        if total == 0:
+            raise UploadError("Uploaded file is empty")
+        return spool.name
+
+    except BaseException:
+        os.unlink(spool.name)
+        raise
+
+
+def spool_text(content: str, filename: str, directory: Optional[str] = None) -> str:
+    """
+    Write text content to a spool file (used when documents are submitted as a string)
+
+    Args:
+        content (str): Document text
+        filename (str): Original file name, used for the extension
+        directory (str, optional): Directory for the spool file
+
+    Returns:
+        str: Path of the spool file
+    """
+    data = content.encode("utf-8")
+    if len(data) > settings.MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit")
+
+    ext = Path(filename).suffix.lower() or ".txt"
+    sniff_file_type(data[:settings.UPLOAD_SNIFF_BYTES], ext)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext, dir=directory) as spool:
+        spool.write(data)
+    return spool.name
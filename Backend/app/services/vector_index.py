@@ -0,0 +1,235 @@
+"""
+Vector Index Helpers for Incremental Ingest
+
+Documents have a stable identity (an explicit ID, or the file name, which
+stays the same across revisions) and every chunk gets a deterministic
+point ID derived from the document ID and the chunk text. Re-ingesting a revised document then only
+embeds and upserts new or changed chunks, deletes the stale ones in one
+batch and updates the position metadata of chunks that merely moved.
+"""
+
+import hashlib
+import os
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+from app.core.config import settings
+from app.services.lexical import SPARSE_VECTOR_NAME, document_vector
+
+# Namespace for chunk point IDs (uuid5 needs a fixed namespace)
+POINT_NAMESPACE = uuid.UUID("6f1c0a52-8f0e-4c51-9a4e-4b8d2d4e7a10")
+
+# Payload fields used for filtering (QdrantVectorStore nests metadata)
+DOCUMENT_ID_FIELD = "metadata.document_id"
+CATEGORY_FIELD = "metadata.category"
+USER_ID_FIELD = "metadata.user_id"
+
+# Payload indexes every collection gets (re-ingest filters on the document,
+# queries on the category and the tenant)
+PAYLOAD_INDEXES = {
+    DOCUMENT_ID_FIELD: models.PayloadSchemaType.KEYWORD,
+    CATEGORY_FIELD: models.PayloadSchemaType.KEYWORD,
+    USER_ID_FIELD: models.PayloadSchemaType.KEYWORD
+}
+
+# Metadata that can change while the chunk text stays the same (position, classification)
+MUTABLE_FIELDS = ("page", "start_index", "category")
+
+
+def default_document_id(filename: str) -> str:
+    """
+    Document ID of a file ingested without one: its file name
+
+    A revised file keeps its name, so it replaces the previous version
+    (the tenant is added by the point IDs and the re-ingest filter).
+    """
+    return os.path.basename(filename.replace("\\", "/"))
+
+
+class PointIdAssigner:
+    """
+    Deterministic point IDs for the chunks of a document, in chunk order
+
+    The ID depends on the document ID (scoped to the tenant, if any), the
+    chunk text and how many identical chunks came before it, so unchanged
+    chunks keep their ID across re-uploads even when their position moves.
+    """
+
+    def __init__(self, document_id: str, user_id: Optional[str] = None):
+        self.document_id = f"{user_id}/{document_id}" if user_id else document_id
+        self.seen: Dict[str, int] = {}
+
+    def __call__(self, doc: Document) -> str:
+        text_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+        occurrence = self.seen.get(text_hash, 0)
+        self.seen[text_hash] = occurrence + 1
+        return str(uuid.uuid5(POINT_NAMESPACE, f"{self.document_id}:{text_hash}:{occurrence}"))
+
+
+def _match(field: str, value: str) -> models.FieldCondition:
+    return models.FieldCondition(key=field, match=models.MatchValue(value=value))
+
+
+def document_filter(document_id: str, user_id: Optional[str] = None) -> models.Filter:
+    """Filter matching every point of a document (of one tenant, or without a tenant)"""
+    if user_id:
+        return models.Filter(must=[_match(DOCUMENT_ID_FIELD, document_id), _match(USER_ID_FIELD, user_id)])
+    return models.Filter(must=[
+        _match(DOCUMENT_ID_FIELD, document_id),
+        models.IsEmptyCondition(is_empty=models.PayloadField(key=USER_ID_FIELD))
+    ])
+
+
+def scope_filter(categories: Optional[Sequence[str]] = None, user_id: Optional[str] = None) -> Optional[models.Filter]:
+    """Search filter for some categories and/or one tenant (None searches everything)"""
+    conditions = []
+    if categories and len(categories) == 1:
+        conditions.append(_match(CATEGORY_FIELD, categories[0]))
+    elif categories:
+        conditions.append(models.FieldCondition(key=CATEGORY_FIELD, match=models.MatchAny(any=list(categories))))
+    if user_id:
+        conditions.append(_match(USER_ID_FIELD, user_id))
+    return models.Filter(must=conditions) if conditions else None
+
+
+def mutable_metadata(payload: Optional[dict]) -> Tuple:
+    """Mutable metadata of a stored point, as compared by the ingest plan"""
+    metadata = (payload or {}).get("metadata") or {}
+    return tuple(metadata.get(field) for field in MUTABLE_FIELDS)
+
+
+def existing_points(client: QdrantClient, collection_name: str, document_id: str,
+                    user_id: Optional[str] = None) -> Dict[str, Tuple]:
+    """Point IDs already stored for a document, with their mutable metadata"""
+    points: Dict[str, Tuple] = {}
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=document_filter(document_id, user_id),
+            limit=1000,
+            offset=offset,
+            with_payload=[f"metadata.{field}" for field in MUTABLE_FIELDS],
+            with_vectors=False
+        )
+        for record in records:
+            points[str(record.id)] = mutable_metadata(record.payload)
+        if offset is None:
+            return points
+
+
+async def aexisting_points(client: AsyncQdrantClient, collection_name: str, document_id: str,
+                           user_id: Optional[str] = None) -> Dict[str, Tuple]:
+    """Async existing_points"""
+    points: Dict[str, Tuple] = {}
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            scroll_filter=document_filter(document_id, user_id),
+            limit=1000,
+            offset=offset,
+            with_payload=[f"metadata.{field}" for field in MUTABLE_FIELDS],
+            with_vectors=False
+        )
+        for record in records:
+            points[str(record.id)] = mutable_metadata(record.payload)
+        if offset is None:
+            return points
+
+
+class ChunkBatch:
+    """What has to be written for one batch of chunks"""
+
+    def __init__(self, split_docs: List[Document], point_ids: List[str], existing: Dict[str, Tuple]):
+        self.split_docs = split_docs
+        self.point_ids = point_ids
+        # Chunks that are not stored yet need embedding
+        self.new = [i for i, point_id in enumerate(point_ids) if point_id not in existing]
+        # Unchanged chunks whose page/offset or category changed only need a payload update
+        self.moved = [
+            i for i, point_id in enumerate(point_ids)
+            if point_id in existing and existing[point_id] != mutable_metadata({"metadata": split_docs[i].metadata})
+        ]
+
+    def new_texts(self) -> List[str]:
+        return [self.split_docs[i].page_content for i in self.new]
+
+    def upsert_batches(self, vectors: List[List[float]], lexical: bool = False) -> List[List[models.PointStruct]]:
+        """PointStructs for the new chunks, in upsert-sized batches (with BM25 vectors if lexical)"""
+        points = [
+            models.PointStruct(
+                id=self.point_ids[i],
+                vector={"": vector, SPARSE_VECTOR_NAME: document_vector(self.split_docs[i].page_content)}
+                if lexical else vector,
+                payload={"page_content": self.split_docs[i].page_content, "metadata": self.split_docs[i].metadata}
+            )
+            for i, vector in zip(self.new, vectors)
+        ]
+        size = settings.QDRANT_UPSERT_BATCH_SIZE
+        return [points[i:i + size] for i in range(0, len(points), size)]
+
+    def update_operations(self) -> List:
+        """Metadata updates for chunks that moved or were reclassified"""
+        operations = []
+        for i in self.moved:
+            metadata = self.split_docs[i].metadata
+            operations.append(models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={field: metadata.get(field) for field in MUTABLE_FIELDS},
+                    key="metadata",
+                    points=[self.point_ids[i]]
+                )
+            ))
+        return operations
+
+
+class IngestPlan:
+    """
+    What an (re-)ingest has to write to bring a document up to date
+
+    Chunks are planned batch by batch as they stream in; the stale points
+    of the previous version are known once every chunk has been seen.
+    """
+
+    def __init__(self, document_id: str, existing: Dict[str, Tuple], user_id: Optional[str] = None):
+        self.assign = PointIdAssigner(document_id, user_id)
+        self.existing = existing
+        self.seen = set()
+        self.total = 0
+        self.embedded = 0
+        self.updated = 0
+
+    def batch(self, split_docs: List[Document]) -> ChunkBatch:
+        """Assign point IDs to the next chunks and plan their writes"""
+        point_ids = [self.assign(doc) for doc in split_docs]
+        self.seen.update(point_ids)
+        batch = ChunkBatch(split_docs, point_ids, self.existing)
+        self.total += len(point_ids)
+        self.embedded += len(batch.new)
+        self.updated += len(batch.moved)
+        return batch
+
+    def stale(self) -> List[str]:
+        """Stored chunks that no longer appear in the document"""
+        return [point_id for point_id in self.existing if point_id not in self.seen]
+
+    def finish_operations(self) -> List:
+        """One batch of deletes for the stale chunks"""
+        stale = self.stale()
+        if not stale:
+            return []
+        return [models.DeleteOperation(delete=models.PointIdsList(points=stale))]
+
+    def changed(self) -> bool:
+        """Whether the ingest changes what searches can find"""
+        return bool(self.embedded or self.updated or self.stale())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chunks_total": self.total,
+            "chunks_embedded": self.embedded,
+            "chunks_unchanged": self.total - self.embedded,
+            "chunks_deleted": len(self.stale())
+        }
@@ -0,0 +1,313 @@
+"""
+Vector Store Backends
+
+Ingest (VectorWriter) and retrieval (QueryService) talk to the vector store
+through the small interface below instead of a Qdrant client, so the
+backend is chosen by VECTOR_STORE_BACKEND:
+
+- "qdrant": the Qdrant server at QDRANT_URL (HNSW, quantization, hybrid
+  BM25 search);
+- "numpy": an embedded store in NUMPY_STORE_PATH (see numpy_store), with
+  no server to run. Search is dense only; the BM25 query is ignored.
+
+Both take the same Qdrant models (PointStruct, update operations, Filter),
+so the ingest plan and the scope filters are shared, and both return
+search hits as context_packer Candidates.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from qdrant_client import models
+from app.core.config import settings
+from app.services.context_packer import Candidate
+from app.services.lexical import SPARSE_VECTOR_NAME, has_lexical_index
+from app.services.vector_index import aexisting_points, existing_points
+
+BACKENDS = ("qdrant", "numpy")
+
+
+class VectorStore:
+    """Operations ingest and retrieval need from a vector store"""
+
+    name = ""
+
+    def startup(self):
+        """Connect (or open) up front so the first request does not pay for it"""
+
+    def collection_exists(self, collection_name: str) -> bool:
+        raise NotImplementedError
+
+    def ensure_collection(self, collection_name: str, vector_size: int):
+        """Create the collection if missing"""
+        raise NotImplementedError
+
+    def lexical(self, collection_name: str) -> bool:
+        """Whether the collection takes BM25 vectors next to the dense ones"""
+        raise NotImplementedError
+
+    def existing_points(self, collection_name: str, document_id: str,
+                        user_id: Optional[str] = None) -> Dict[str, Tuple]:
+        """Point IDs already stored for a document, with their mutable metadata"""
+        raise NotImplementedError
+
+    def upsert(self, collection_name: str, points: List[models.PointStruct]):
+        raise NotImplementedError
+
+    def update(self, collection_name: str, operations: List):
+        """Apply SetPayload/Delete operations (as batch_update_points)"""
+        raise NotImplementedError
+
+    def search(self, collection_name: str, embedding: List[float], lexical_query: models.SparseVector,
+               query_filter: Optional[models.Filter], params: models.SearchParams, k: int) -> List[Candidate]:
+        """Top k chunks of one collection (empty if the collection does not exist)"""
+        raise NotImplementedError
+
+    def search_batch(self, collection_name: str, embeddings: List[List[float]],
+                     lexical_queries: List[models.SparseVector], query_filter: Optional[models.Filter],
+                     params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        """Top k chunks of one collection for many queries"""
+        raise NotImplementedError
+
+    def payloads(self, collection_name: str, query_filter: Optional[models.Filter] = None,
+                 fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Payload of every point that passes a filter, by point ID (fields may limit it)"""
+        raise NotImplementedError
+
+    def delete_collection(self, collection_name: str):
+        raise NotImplementedError
+
+    async def acollection_exists(self, collection_name: str) -> bool:
+        raise NotImplementedError
+
+    async def aensure_collection(self, collection_name: str, vector_size: int):
+        raise NotImplementedError
+
+    async def alexical(self, collection_name: str) -> bool:
+        raise NotImplementedError
+
+    async def aexisting_points(self, collection_name: str, document_id: str,
+                               user_id: Optional[str] = None) -> Dict[str, Tuple]:
+        raise NotImplementedError
+
+    async def aupsert(self, collection_name: str, points: List[models.PointStruct]):
+        raise NotImplementedError
+
+    async def aupdate(self, collection_name: str, operations: List):
+        raise NotImplementedError
+
+    async def asearch(self, collection_name: str, embedding: List[float], lexical_query: models.SparseVector,
+                      query_filter: Optional[models.Filter], params: models.SearchParams,
+                      k: int) -> List[Candidate]:
+        raise NotImplementedError
+
+    async def asearch_batch(self, collection_name: str, embeddings: List[List[float]],
+                            lexical_queries: List[models.SparseVector], query_filter: Optional[models.Filter],
+                            params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def scored_candidates(points: List[models.ScoredPoint]) -> List[Candidate]:
+    """Candidates of Qdrant search hits"""
+    # Same payload layout QdrantVectorStore writes and reads
+    candidates = []
+    for point in points:
+        vector = point.vector.get("") if isinstance(point.vector, dict) else point.vector
+        candidates.append(Candidate(
+            Document(page_content=point.payload.get("page_content", ""),
+                     metadata=point.payload.get("metadata") or {}),
+            point.score,
+            vector
+        ))
+    return candidates
+
+
+class QdrantStore(VectorStore):
+    """The Qdrant server, through the registry's shared clients and cached collection info"""
+
+    name = "qdrant"
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def startup(self):
+        try:
+            self.registry.qdrant().get_collections()
+            print(f"✅ Connected to Qdrant at {settings.QDRANT_URL}")
+        except Exception as e:
+            print(f"⚠️ Qdrant not available yet: {e}")
+
+    @staticmethod
+    def _query_args(info: models.CollectionInfo, embedding: List[float], lexical_query: models.SparseVector,
+                    query_filter: Optional[models.Filter], params: models.SearchParams, k: int) -> Dict:
+        """
+        query_points arguments for one collection
+
+        Collections with a BM25 index run the dense and the lexical search as
+        two prefetches that Qdrant fuses with reciprocal-rank fusion; older
+        collections fall back to dense search only.
+        """
+        # The packer needs the dense vectors for deduplication and MMR
+        with_vectors = [""] if settings.CONTEXT_PACKING_ENABLED else False
+        if settings.HYBRID_SEARCH_ENABLED and lexical_query.indices and has_lexical_index(info):
+            limit = max(settings.HYBRID_PREFETCH_LIMIT, k)
+            return {
+                "prefetch": [
+                    models.Prefetch(query=embedding, filter=query_filter, params=params, limit=limit),
+                    models.Prefetch(query=lexical_query, using=SPARSE_VECTOR_NAME, filter=query_filter, limit=limit)
+                ],
+                "query": models.FusionQuery(fusion=models.Fusion.RRF),
+                "limit": k,
+                "with_vectors": with_vectors
+            }
+        return {"query": embedding, "query_filter": query_filter, "search_params": params, "limit": k,
+                "with_vectors": with_vectors}
+
+    @classmethod
+    def _query_request(cls, info: models.CollectionInfo, embedding: List[float],
+                       lexical_query: models.SparseVector, query_filter: Optional[models.Filter],
+                       params: models.SearchParams, k: int) -> models.QueryRequest:
+        """_query_args as one request of a query_batch_points call"""
+        args = cls._query_args(info, embedding, lexical_query, query_filter, params, k)
+        return models.QueryRequest(
+            prefetch=args.get("prefetch"),
+            query=args["query"],
+            filter=args.get("query_filter"),
+            params=args.get("search_params"),
+            limit=args["limit"],
+            with_vector=args["with_vectors"],
+            with_payload=True
+        )
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return self.registry.collection_info(collection_name) is not None
+
+    def ensure_collection(self, collection_name: str, vector_size: int):
+        self.registry.ensure_collection(collection_name, vector_size)
+
+    def lexical(self, collection_name: str) -> bool:
+        return has_lexical_index(self.registry.collection_info(collection_name))
+
+    def existing_points(self, collection_name: str, document_id: str,
+                        user_id: Optional[str] = None) -> Dict[str, Tuple]:
+        return existing_points(self.registry.qdrant(), collection_name, document_id, user_id)
+
+    def upsert(self, collection_name: str, points: List[models.PointStruct]):
+        self.registry.qdrant().upsert(collection_name=collection_name, points=points)
+
+    def update(self, collection_name: str, operations: List):
+        self.registry.qdrant().batch_update_points(collection_name=collection_name, update_operations=operations)
+
+    def search(self, collection_name: str, embedding: List[float], lexical_query: models.SparseVector,
+               query_filter: Optional[models.Filter], params: models.SearchParams, k: int) -> List[Candidate]:
+        info = self.registry.collection_info(collection_name)
+        if info is None:
+            return []  # Nothing stored in this collection yet
+        response = self.registry.qdrant().query_points(
+            collection_name=collection_name,
+            with_payload=True,
+            **self._query_args(info, embedding, lexical_query, query_filter, params, k)
+        )
+        return scored_candidates(response.points)
+
+    def search_batch(self, collection_name: str, embeddings: List[List[float]],
+                     lexical_queries: List[models.SparseVector], query_filter: Optional[models.Filter],
+                     params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        """Search one collection for many queries in one query_batch_points call"""
+        info = self.registry.collection_info(collection_name)
+        if info is None:
+            return [[] for _ in embeddings]
+        responses = self.registry.qdrant().query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                self._query_request(info, embedding, lexical_query, query_filter, params, k)
+                for embedding, lexical_query in zip(embeddings, lexical_queries)
+            ]
+        )
+        return [scored_candidates(response.points) for response in responses]
+
+    def payloads(self, collection_name: str, query_filter: Optional[models.Filter] = None,
+                 fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        payloads: Dict[str, Dict] = {}
+        offset = None
+        while True:
+            records, offset = self.registry.qdrant().scroll(
+                collection_name=collection_name,
+                scroll_filter=query_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=fields if fields else True,
+                with_vectors=False
+            )
+            for record in records:
+                payloads[str(record.id)] = record.payload or {}
+            if offset is None:
+                return payloads
+
+    def delete_collection(self, collection_name: str):
+        self.registry.qdrant().delete_collection(collection_name)
+        self.registry.invalidate_collection(collection_name)
+
+    async def acollection_exists(self, collection_name: str) -> bool:
+        return await self.registry.acollection_info(collection_name) is not None
+
+    async def aensure_collection(self, collection_name: str, vector_size: int):
+        await self.registry.aensure_collection(collection_name, vector_size)
+
+    async def alexical(self, collection_name: str) -> bool:
+        return has_lexical_index(await self.registry.acollection_info(collection_name))
+
+    async def aexisting_points(self, collection_name: str, document_id: str,
+                               user_id: Optional[str] = None) -> Dict[str, Tuple]:
+        return await aexisting_points(self.registry.async_qdrant(), collection_name, document_id, user_id)
+
+    async def aupsert(self, collection_name: str, points: List[models.PointStruct]):
+        await self.registry.async_qdrant().upsert(collection_name=collection_name, points=points)
+
+    async def aupdate(self, collection_name: str, operations: List):
+        await self.registry.async_qdrant().batch_update_points(
+            collection_name=collection_name, update_operations=operations
+        )
+
+    async def asearch(self, collection_name: str, embedding: List[float], lexical_query: models.SparseVector,
+                      query_filter: Optional[models.Filter], params: models.SearchParams,
+                      k: int) -> List[Candidate]:
+        info = await self.registry.acollection_info(collection_name)
+        if info is None:
+            return []
+        async with self.registry.semaphore("qdrant"):
+            response = await self.registry.async_qdrant().query_points(
+                collection_name=collection_name,
+                with_payload=True,
+                **self._query_args(info, embedding, lexical_query, query_filter, params, k)
+            )
+        return scored_candidates(response.points)
+
+    async def asearch_batch(self, collection_name: str, embeddings: List[List[float]],
+                            lexical_queries: List[models.SparseVector], query_filter: Optional[models.Filter],
+                            params: models.SearchParams, k: int) -> List[List[Candidate]]:
+        info = await self.registry.acollection_info(collection_name)
+        if info is None:
+            return [[] for _ in embeddings]
+        async with self.registry.semaphore("qdrant"):
+            responses = await self.registry.async_qdrant().query_batch_points(
+                collection_name=collection_name,
+                requests=[
+                    self._query_request(info, embedding, lexical_query, query_filter, params, k)
+                    for embedding, lexical_query in zip(embeddings, lexical_queries)
+                ]
+            )
+        return [scored_candidates(response.points) for response in responses]
+
+
+def create_vector_store(registry) -> VectorStore:
+    """The VECTOR_STORE_BACKEND store"""
+    backend = settings.VECTOR_STORE_BACKEND.lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"VECTOR_STORE_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    if backend == "numpy":
+        from app.services.numpy_store import NumpyStore
+        return NumpyStore(settings.NUMPY_STORE_PATH)
+    return QdrantStore(registry)
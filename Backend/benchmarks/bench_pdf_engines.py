@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+PDF Extraction Engine Benchmark
+
+Reports pages/sec and chars/sec for every installed PDF engine on the
+synthetic legal fixture corpus or a directory of PDFs. The fastest
+engine is what PDF_ENGINE="auto" should pick (see ENGINE_PREFERENCE).
+
+Usage:
+    python benchmarks/bench_pdf_engines.py [--corpus DIR] [--repeat N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+# Add Backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pdf_extraction import PDF_ENGINES, ENGINE_PREFERENCE, available_engines, extract_pdf
+from benchmarks.pdf_fixtures import build_corpus
+
+
+def bench_engine(engine: str, paths, repeat: int):
+    """Return (pages/s, chars/s) for one engine, best of repeat runs"""
+    best = None
+    for _ in range(repeat):
+        pages = chars = 0
+        start = time.perf_counter()
+        for path in paths:
+            result = extract_pdf(path, engine=engine)
+            pages += len(result["page_offsets"])
+            chars += len(result["text"])
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, pages, chars)
+    elapsed, pages, chars = best
+    return pages / elapsed, chars / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text-extraction engines")
+    parser.add_argument("--corpus", help="Directory of PDFs (default: generated fixture corpus)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(args.corpus, "*.pdf")))
+    else:
+        paths = build_corpus(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+
+    if not paths:
+        print("❌ No PDF files found")
+        return 1
+
+    installed = available_engines()
+    missing = [name for name in PDF_ENGINES if name not in installed]
+
+    print(f"📄 Corpus: {len(paths)} PDFs, best of {args.repeat} runs")
+    print("=" * 60)
+    print(f"{'engine':12} {'pages/s':>12} {'chars/s':>15}")
+
+    results = {}
+    for engine in installed:
+        pages_per_sec, chars_per_sec = bench_engine(engine, paths, args.repeat)
+        results[engine] = pages_per_sec
+        print(f"{engine:12} {pages_per_sec:12.1f} {chars_per_sec:15.0f}")
+
+    for engine in missing:
+        print(f"{engine:12} {'not installed':>12}")
+
+    ranking = sorted(results, key=results.get, reverse=True)
+    print("=" * 60)
+    print(f"🏁 Fastest: {ranking[0]}")
+    expected = [name for name in ENGINE_PREFERENCE if name in results]
+    if ranking != expected:
+        print(f"⚠️ Measured order {ranking} differs from ENGINE_PREFERENCE {expected}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
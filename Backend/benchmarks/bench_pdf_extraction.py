@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Serial vs Parallel PDF Extraction Benchmark
+
+Compares single-process extraction with the page-sharded process pool
+used by load_doc, on the synthetic fixture corpus or a directory of PDFs.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py [--corpus DIR] [--workers N] [--pages-per-shard N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add Backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pdf_extraction import extract_pdf
+from benchmarks.pdf_fixtures import build_corpus
+
+
+def run(paths, executor=None, pages_per_shard=None):
+    """Extract every PDF and return (seconds, pages, chars)"""
+    pages = chars = 0
+    start = time.perf_counter()
+    for path in paths:
+        result = extract_pdf(path, executor=executor, pages_per_shard=pages_per_shard)
+        pages += len(result["page_offsets"])
+        chars += len(result["text"])
+    return time.perf_counter() - start, pages, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel PDF extraction")
+    parser.add_argument("--corpus", help="Directory of PDFs (default: generated fixture corpus)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--pages-per-shard", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(args.corpus, "*.pdf")))
+    else:
+        paths = build_corpus(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+
+    if not paths:
+        print("❌ No PDF files found")
+        return 1
+
+    print(f"📄 Corpus: {len(paths)} PDFs")
+    print("=" * 50)
+
+    serial_time, pages, chars = run(paths)
+    print(f"Serial:   {serial_time:7.2f}s  {pages / serial_time:8.1f} pages/s  {chars / serial_time:12.0f} chars/s")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # Warm up the pool so process start-up is not measured
+        list(executor.map(abs, range(args.workers)))
+        parallel_time, parallel_pages, parallel_chars = run(paths, executor, args.pages_per_shard)
+
+    print(f"Parallel: {parallel_time:7.2f}s  {parallel_pages / parallel_time:8.1f} pages/s  "
+          f"{parallel_chars / parallel_time:12.0f} chars/s  "
+          f"({args.workers} workers, {args.pages_per_shard} pages/shard)")
+    print(f"Speedup:  {serial_time / parallel_time:.2f}x")
+
+    if (parallel_pages, parallel_chars) != (pages, chars):
+        print("❌ Parallel output differs from serial output")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
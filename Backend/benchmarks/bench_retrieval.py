@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Retrieval Benchmark (offline embeddings)
+
+Ingests a synthetic legal corpus and runs queries end to end through
+DocumentService and QueryService with a local embedding provider, so no
+Gemini key or network access is needed (only Qdrant at QDRANT_URL, or no
+server at all with the embedded numpy backend). Reports ingest chunks/sec
+and query latency percentiles, with the raw vector search timed on its own.
+The documents go to a scratch shared collection that is dropped afterwards.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--provider hashing|random_projection] [--backend qdrant|numpy]
+                                            [--documents N] [--queries N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add Backend directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline: an empty key keeps load_dotenv from picking up a real one
+os.environ["GEMINI_API_KEY"] = ""
+
+from app.core.config import settings
+from benchmarks.pdf_fixtures import CLAUSES, PLACES, legal_lines
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest and query with offline embeddings")
+    parser.add_argument("--provider", default="hashing", choices=["hashing", "random_projection"])
+    parser.add_argument("--backend", default=settings.VECTOR_STORE_BACKEND, choices=["qdrant", "numpy"])
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=400, help="Clause lines per document")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--collection", default="bench_retrieval")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch collection")
+    args = parser.parse_args()
+
+    settings.EMBEDDING_PROVIDER = args.provider
+    settings.VECTOR_STORE_BACKEND = args.backend
+    settings.VECTOR_STORAGE_MODE = "shared"
+    settings.SHARED_COLLECTION_NAME = args.collection
+    # Measure retrieval, not the caches in front of it
+    settings.ANSWER_CACHE_ENABLED = False
+    settings.SINGLE_FLIGHT_ENABLED = False
+
+    from app.services.clients import get_client_registry
+    from app.services.collections import search_params
+    from app.services.document_service import DocumentService
+    from app.services.lexical import query_vector
+    from app.services.query_service import QueryService
+
+    registry = get_client_registry()
+    document_service = DocumentService()
+    query_service = QueryService()
+    rng = random.Random(11)
+
+    store = registry.vector_backend()
+    location = settings.QDRANT_URL if args.backend == "qdrant" else settings.NUMPY_STORE_PATH
+    print(f"🧪 Provider: {args.provider} ({settings.QDRANT_VECTOR_SIZE} dims), store: {args.backend} at {location}")
+    print("=" * 60)
+    try:
+        chunks = 0
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            for d in range(args.documents):
+                path = os.path.join(directory, f"agreement_{d:03d}.txt")
+                with open(path, "w") as f:
+                    f.write("\n".join(legal_lines(rng, args.lines)))
+                result = document_service.process_file(path, document_id=f"bench-{d}")
+                chunks += result.get("chunks_embedded", 0)
+            ingest_seconds = time.perf_counter() - start
+        print(f"📥 Ingest: {args.documents} documents, {chunks} chunks in {ingest_seconds:.2f}s "
+              f"({chunks / ingest_seconds:.0f} chunks/s)")
+
+        questions = [
+            rng.choice(CLAUSES).format(n=rng.randint(1, 90), place=rng.choice(PLACES)).split(" shall ")[0]
+            for _ in range(args.queries)
+        ]
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            query_service.user_query(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"🔎 Query: {len(latencies)} queries, p50 {percentile(latencies, 0.5):.1f} ms, "
+              f"p95 {percentile(latencies, 0.95):.1f} ms, mean {statistics.mean(latencies):.1f} ms")
+
+        # The vector search alone, without embedding, packing and generation
+        embeddings = registry.embeddings()
+        vectors = [embeddings.embed_query(question) for question in questions]
+        params = search_params()
+        latencies = []
+        for question, vector in zip(questions, vectors):
+            start = time.perf_counter()
+            store.search(args.collection, vector, query_vector(question), None, params, settings.CONTEXT_CANDIDATES)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"📐 Search: p50 {percentile(latencies, 0.5):.3f} ms, p95 {percentile(latencies, 0.95):.3f} ms")
+    finally:
+        if not args.keep:
+            store.delete_collection(args.collection)
+        registry.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
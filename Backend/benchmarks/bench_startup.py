@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+API Startup Benchmark (guard)
+
+Measures how long a fresh API process takes to become ready: importing
+app.main, running the FastAPI lifespan startup and answering GET /health.
+Every run is a new interpreter, so imports are not cached between runs.
+
+Exits with status 1 (for CI) when the median time to ready is above
+--max-seconds, or when importing the app loads a heavy SDK that should only
+be imported on first use (see app/core/container.py).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--max-seconds S]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the services import on first use, never at app import
+HEAVY_MODULES = (
+    "google.generativeai",
+    "langchain_core",
+    "langchain_community",
+    "langgraph",
+    "qdrant_client",
+    "pymongo",
+    "rq"
+)
+
+
+async def _get(app, path: str) -> int:
+    """Status code of a GET request sent straight to the ASGI app"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("bench", 1), "server": ("bench", 80)
+    }, receive, send)
+    return messages[0]["status"]
+
+
+def measure() -> dict:
+    """One cold start (run in a fresh interpreter)"""
+    sys.path.insert(0, BACKEND_DIR)
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+    heavy = [module for module in HEAVY_MODULES if module in sys.modules]
+
+    async def start_app() -> dict:
+        async with app.router.lifespan_context(app):
+            started = time.perf_counter()
+            status = await _get(app, "/health")
+            ready = time.perf_counter()
+        return {"lifespan": started - imported, "health": ready - started, "status": status, "ready": ready - start}
+
+    return {"import": imported - start, "heavy_modules": heavy, **asyncio.run(start_app())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API cold start and guard it")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="Highest acceptable median time to ready")
+    # Internal: measure one start and write the result to this file (the app prints to stdout)
+    parser.add_argument("--measure", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        result = measure()
+        with open(args.measure, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    print(f"🧪 API cold start, {args.runs} runs (limit {args.max_seconds:.2f}s)")
+    print("=" * 60)
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(args.runs):
+            result_file = os.path.join(directory, f"run_{i}.json")
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", result_file],
+                           cwd=BACKEND_DIR, capture_output=True, check=True)
+            with open(result_file) as f:
+                runs.append(json.load(f))
+    for run in runs:
+        print(f"⏱️ import {run['import'] * 1000:.0f} ms, lifespan {run['lifespan'] * 1000:.0f} ms, "
+              f"/health {run['health'] * 1000:.0f} ms (HTTP {run['status']}) -> ready in {run['ready'] * 1000:.0f} ms")
+
+    ready = statistics.median(run["ready"] for run in runs)
+    heavy = sorted({module for run in runs for module in run["heavy_modules"]})
+    print(f"📊 Median time to ready: {ready * 1000:.0f} ms")
+
+    failed = False
+    if ready > args.max_seconds:
+        print(f"❌ Startup is slower than {args.max_seconds:.2f}s")
+        failed = True
+    if heavy:
+        print(f"❌ Importing the app loaded heavy modules: {', '.join(heavy)}")
+        failed = True
+    if not failed:
+        print("✅ Startup within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Synthetic PDF Fixture Corpus
+
+Writes deterministic multi-page "legal" PDFs for the extraction
+benchmarks, so they can run without shipping real contracts.
+"""
+
+import os
+import random
+from typing import List
+
+CLAUSES = [
+    "The Employee shall give the Employer not less than {n} days written notice of termination.",
+    "This Agreement shall be governed by the laws of the State of {place}.",
+    "The Service Provider agrees to indemnify the Client against all claims arising under clause {n}.",
+    "Refunds will be issued within {n} business days of receipt of the returned goods.",
+    "Confidential Information does not include information that is publicly available in {place}.",
+    "The Tenant shall pay rent of {n} dollars on the first day of each calendar month.",
+    "Any dispute shall be referred to arbitration seated in {place} under clause {n}.",
+    "The warranty period is {n} months from the date of delivery to the Customer.",
+]
+PLACES = ["Delaware", "New York", "California", "Ontario", "Punjab", "Texas"]
+
+
+def legal_lines(rng: random.Random, count: int) -> List[str]:
+    """Generate count clause lines"""
+    return [
+        f"{i + 1}. " + rng.choice(CLAUSES).format(n=rng.randint(1, 90), place=rng.choice(PLACES))
+        for i in range(count)
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: List[List[str]]):
+    """
+    Write a minimal PDF with one text line per entry on each page
+
+    Args:
+        path (str): Output path
+        pages (List[List[str]]): Lines for every page
+    """
+    objects = []  # object bodies, object number = index + 1
+
+    page_count = len(pages)
+    first_page_obj = 4
+    kids = " ".join(f"{first_page_obj + 2 * i} 0 R" for i in range(page_count))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for i, lines in enumerate(pages):
+        content_obj = first_page_obj + 2 * i + 1
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_obj} 0 R >>".encode()
+        )
+        stream = "BT /F1 9 Tf 11 TL 40 760 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n".encode()
+    out += b"0000000000 65535 f \n"
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def build_corpus(directory: str, documents: int = 4, pages: int = 200,
+                 lines_per_page: int = 60, seed: int = 7) -> List[str]:
+    """
+    Create the fixture corpus in directory (existing files are reused)
+
+    Returns:
+        List[str]: Paths of the fixture PDFs
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for d in range(documents):
+        path = os.path.join(directory, f"agreement_{d + 1:02d}_{pages}p.pdf")
+        page_lines = [legal_lines(rng, lines_per_page) for _ in range(pages)]
+        if not os.path.exists(path):
+            write_pdf(path, page_lines)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+    for p in build_corpus(target):
+        print(p)
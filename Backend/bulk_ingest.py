@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Bulk Corpus Ingestion
+
+Ingests a directory or archive (.zip, .tar, .tar.gz) of PDF/TXT files by
+running the DocumentService graph (parse, classify, chunk, embed, upsert)
+in a pool of worker processes. Every finished file is appended to a JSONL
+checkpoint manifest, so an interrupted run resumes where it stopped.
+
+Embedding calls from all workers draw from the shared Valkey token bucket;
+without Valkey the per-process rate limit is divided between the workers.
+
+Usage:
+    python bulk_ingest.py /data/contracts
+    python bulk_ingest.py archive.zip --workers 8 --id-from-path
+    python bulk_ingest.py /data/contracts --manifest run.jsonl   # resume an earlier run
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+
+# Archive suffixes that are read member by member
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def iter_directory(root: str, skip: Callable[[str, int], bool]) -> Iterator[Tuple[str, Optional[str], int]]:
+    """
+    (key, path, size) of every supported file below root, in a stable order
+
+    path is None for files that skip(key, size) says are already done.
+    """
+    for path in sorted(Path(root).rglob("*")):
+        if path.is_file() and path.suffix.lower() in settings.SUPPORTED_FILE_TYPES:
+            key, size = path.relative_to(root).as_posix(), path.stat().st_size
+            yield key, None if skip(key, size) else str(path), size
+
+
+def iter_archive(archive: str, staging_dir: str,
+                 skip: Callable[[str, int], bool]) -> Iterator[Tuple[str, Optional[str], int]]:
+    """
+    (key, path, size) of every supported archive member
+
+    Members are extracted into staging_dir one at a time, right before they
+    are handed to a worker; the worker deletes the staged copy when done.
+    Skipped members are never extracted.
+    """
+    def stage(name: str, source) -> str:
+        fd, staged = tempfile.mkstemp(suffix=Path(name).suffix.lower(), dir=staging_dir)
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(source, out, settings.UPLOAD_CHUNK_SIZE)
+        return staged
+
+    if archive.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive) as zf:
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                if not info.is_dir() and Path(info.filename).suffix.lower() in settings.SUPPORTED_FILE_TYPES:
+                    if skip(info.filename, info.file_size):
+                        yield info.filename, None, info.file_size
+                        continue
+                    with zf.open(info) as source:
+                        yield info.filename, stage(info.filename, source), info.file_size
+    else:
+        with tarfile.open(archive) as tf:
+            for member in tf:
+                if member.isfile() and Path(member.name).suffix.lower() in settings.SUPPORTED_FILE_TYPES:
+                    if skip(member.name, member.size):
+                        yield member.name, None, member.size
+                        continue
+                    with tf.extractfile(member) as source:
+                        yield member.name, stage(member.name, source), member.size
+
+
+class Manifest:
+    """Append-only JSONL checkpoint of processed files (the last record per key wins)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # torn last line of an interrupted run
+                        self.records[record["key"]] = record
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, key: str, size: int) -> bool:
+        record = self.records.get(key)
+        return bool(record) and record["status"] == "success" and record["size"] == size
+
+    def append(self, record: Dict):
+        self.records[record["key"]] = record
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# Per-process state of the ingest workers
+_document_service = None
+
+
+def _init_worker(workers: int, verbose: bool):
+    """Build one DocumentService per worker process"""
+    global _document_service
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+    # Workers are the parallelism; parsing inside them runs inline
+    settings.PARSE_WORKERS = 0
+
+    from app.services.clients import get_client_registry
+    from app.services.document_service import DocumentService
+    from app.services.embedding_batcher import get_token_bucket
+
+    bucket = get_token_bucket()
+    if bucket.redis is None:
+        # Local buckets are per process, so split the quota between the workers
+        bucket.rate /= workers
+        bucket.capacity /= workers
+        bucket.tokens = bucket.capacity
+
+    get_client_registry().startup()
+    _document_service = DocumentService()
+
+
+def _ingest_file(key: str, path: str, size: int, document_id: Optional[str], staged: bool) -> Dict:
+    """Run one file through the graph (in a worker process)"""
+    started = time.perf_counter()
+    record = {"key": key, "size": size}
+    try:
+        # A file that was not stored comes back with status "failed", so the next run retries it
+        # Without a document ID the file name is used (archive members are staged under temporary names)
+        result = _document_service.process_file(path, document_id=document_id, filename=key)
+        record.update({k: v for k, v in result.items() if k != "file_path"})
+    except Exception as e:
+        record.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        if staged and os.path.exists(path):
+            os.unlink(path)
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+class Progress:
+    """Throughput and ETA reporting for the main process"""
+
+    def __init__(self, total_files: Optional[int]):
+        self.total_files = total_files
+        self.started = time.perf_counter()
+        self.files = self.failed = self.skipped = self.bytes = self.chunks = self.embedded = 0
+
+    def record(self, record: Dict):
+        self.files += 1
+        self.bytes += record["size"]
+        if record["status"] != "success":
+            self.failed += 1
+        self.chunks += record.get("chunks_total") or 0
+        self.embedded += record.get("chunks_embedded") or 0
+
+    def line(self, record: Dict) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rate = self.files / elapsed
+        done = f"{self.files + self.skipped}/{self.total_files}" if self.total_files else str(self.files)
+        eta = ""
+        if self.total_files and rate:
+            eta = f" eta {(self.total_files - self.files - self.skipped) / rate:.0f}s"
+        status = "✅" if record["status"] == "success" else "❌"
+        detail = record.get("category", "") if record["status"] == "success" else record.get("error", "")
+        return (
+            f"{status} [{done}] {record['key']} ({detail}) | "
+            f"{rate:.2f} files/s, {self.bytes / elapsed / 1e6:.2f} MB/s, "
+            f"{self.chunks / elapsed:.1f} chunks/s{eta}"
+        )
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "megabytes": round(self.bytes / 1e6, 2),
+            "chunks": self.chunks,
+            "chunks_embedded": self.embedded,
+            "seconds": round(elapsed, 1),
+            "files_per_second": round(self.files / elapsed, 2) if elapsed else 0.0
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory or archive of PDF/TXT files")
+    parser.add_argument("source", help="Directory or .zip/.tar/.tar.gz archive")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--manifest", help="Checkpoint manifest (default: .cache/bulk_ingest/<source>.jsonl)")
+    parser.add_argument("--id-from-path", action="store_true",
+                        help="Use the relative path as document ID instead of the file name "
+                             "(for corpora with the same file name in several directories)")
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry files that failed before")
+    parser.add_argument("--verbose", action="store_true", help="Show per-node output of the workers")
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.source)
+    if not os.path.isdir(source) and not is_archive(source):
+        print(f"❌ Not a directory or supported archive: {args.source}")
+        return 1
+
+    manifest_path = args.manifest or os.path.join(".cache", "bulk_ingest", f"{Path(source).name}.jsonl")
+    manifest = Manifest(manifest_path)
+    print(f"📒 Manifest: {manifest_path} ({len(manifest.records)} files recorded)")
+
+    def skip(key: str, size: int) -> bool:
+        previous = manifest.records.get(key)
+        return manifest.is_done(key, size) or bool(
+            args.skip_failed and previous and previous["status"] == "failed"
+        )
+
+    staging_dir = None
+    if os.path.isdir(source):
+        files = iter_directory(source, skip)
+        total_files = sum(1 for _ in iter_directory(source, lambda key, size: True))
+    else:
+        staging_dir = tempfile.mkdtemp(prefix="bulk_ingest_")
+        files = iter_archive(source, staging_dir, skip)
+        total_files = None
+
+    progress = Progress(total_files)
+    max_in_flight = args.workers * 2
+    pending = set()
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.workers, args.verbose)
+    )
+
+    def collect(done):
+        for future in done:
+            record = future.result()
+            manifest.append(record)
+            progress.record(record)
+            print(progress.line(record))
+
+    try:
+        for key, path, size in files:
+            if path is None:
+                progress.skipped += 1
+                continue
+
+            document_id = key if args.id_from_path else None
+            pending.add(executor.submit(_ingest_file, key, path, size, document_id, staging_dir is not None))
+            # Bounded lookahead keeps archive staging and memory flat
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        done, pending = wait(pending)
+        collect(done)
+    except KeyboardInterrupt:
+        print("\n⏹️ Interrupted - finished files are recorded, rerun to resume")
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        return 130
+    finally:
+        manifest.close()
+        if staging_dir:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    executor.shutdown()
+    print(json.dumps(progress.summary(), indent=2))
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Qdrant Collection Provisioning
+
+Creates the document collections (one per category, or the shared one
+when VECTOR_STORAGE_MODE is "shared") from the QDRANT_* settings in
+app/core/config.py (HNSW m/ef_construct, on-disk storage, quantization
+and payload indexes), or migrates existing collections to them. Run it after
+changing those settings; Qdrant rebuilds the index in the background.
+
+Usage:
+    python provision_collections.py
+    python provision_collections.py --dry-run
+    QDRANT_QUANTIZATION=scalar python provision_collections.py contracts
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.clients import get_client_registry
+from app.services.collections import CollectionConfigError, provision_collection, storage_collections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or migrate Qdrant collections from the settings")
+    parser.add_argument("collections", nargs="*", help="Collections (default: all collections of VECTOR_STORAGE_MODE)")
+    parser.add_argument("--vector-size", type=int, default=settings.QDRANT_VECTOR_SIZE,
+                        help="Embedding dimension of new collections")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    registry = get_client_registry()
+    client = registry.qdrant()
+    failed = 0
+    for name in args.collections or storage_collections():
+        try:
+            result = provision_collection(client, name, vector_size=args.vector_size, dry_run=args.dry_run)
+            registry.invalidate_collection(name)
+            print(json.dumps(result))
+        except CollectionConfigError as e:
+            failed += 1
+            print(f"❌ {name}: {e}")
+    registry.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Train and Evaluate the Local Document Classifier
+
+Builds the naive Bayes model used by the decision node from the documents
+already stored in the category collections, or from a directory of
+labelled files (one sub-directory per category).
+
+Usage:
+    python train_classifier.py train                  # from the vector store, cross-validate, save
+    python train_classifier.py train --from-dir data  # data/contracts/*.pdf, data/policy/*.txt
+    python train_classifier.py evaluate               # cross-validate without saving
+    python train_classifier.py predict contract.pdf   # classify a file with the saved model
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.doc_classifier import NaiveBayesClassifier, evaluate, load_training_samples
+
+
+def load_samples(from_dir=None):
+    """Training texts and labels from a labelled directory or from the vector store"""
+    if from_dir:
+        from app.services.document_service import read_preview
+        texts, labels = [], []
+        for category in settings.DOCUMENT_CATEGORIES:
+            for path in sorted(Path(from_dir, category).glob("*")):
+                if path.suffix.lower() in settings.SUPPORTED_FILE_TYPES:
+                    texts.append(read_preview(str(path), max_chars=settings.CLASSIFIER_MAX_CHARS))
+                    labels.append(category)
+        return texts, labels
+
+    from app.services.clients import get_client_registry
+    return load_training_samples(get_client_registry().vector_backend(), settings.DOCUMENT_CATEGORIES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the local document classifier")
+    parser.add_argument("command", choices=["train", "evaluate", "predict"])
+    parser.add_argument("files", nargs="*", help="Files to classify (predict)")
+    parser.add_argument("--from-dir", help="Directory with one sub-directory of files per category")
+    parser.add_argument("--model", default=settings.CLASSIFIER_MODEL_PATH, help="Model file")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--threshold", type=float, default=settings.CLASSIFIER_CONFIDENCE_THRESHOLD,
+                        help="Confidence needed to skip Gemini")
+    args = parser.parse_args()
+
+    if args.command == "predict":
+        from app.services.document_service import read_preview
+        classifier = NaiveBayesClassifier.load(args.model)
+        for file_path in args.files:
+            category, confidence = classifier.classify(read_preview(file_path))
+            route = "local" if confidence >= args.threshold else "gemini"
+            print(f"{file_path}: {category} ({confidence:.3f}, {route})")
+        return 0
+
+    texts, labels = load_samples(args.from_dir)
+    counts = {label: labels.count(label) for label in sorted(set(labels))}
+    print(f"📚 {len(texts)} documents: {counts}")
+    if len(counts) < 2 or min(counts.values()) < 2:
+        print("❌ Need at least two documents in each of two categories")
+        return 1
+
+    report = evaluate(texts, labels, folds=args.folds, threshold=args.threshold)
+    print(json.dumps(report, indent=2))
+
+    if args.command == "train":
+        NaiveBayesClassifier().fit(texts, labels).save(args.model)
+        print(f"✅ Model saved to {args.model}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())